@@ -0,0 +1,104 @@
+import time
+from collections import OrderedDict
+from typing import Optional
+
+__all__ = ["ResultCache", "MemoryResultCache"]
+
+
+class ResultCache:
+    """
+    The interface of the result cache of SPARQLClient. The values are the
+    results of the queries serialized in JSON (bytes) so an external backend
+    (Redis, memcached, ...) only has to implement get(), set() and
+    invalidate().
+
+    Every entry is tagged with the graph of the query (None if the query has
+    no graph) so the entries of a graph can be invalidated when it is
+    updated. The client counts the hits and the misses in the attributes of
+    the same name.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, key: str) -> Optional[bytes]:
+        """
+        Return the value of a key or None if it is missing or expired.
+        """
+        raise NotImplementedError
+
+    async def set(
+        self, key: str, value: bytes, *, ttl: float, graph: Optional[str] = None
+    ) -> None:
+        """
+        Store the value of a key for ttl seconds.
+        """
+        raise NotImplementedError
+
+    async def invalidate(self, graph: Optional[str] = None) -> None:
+        """
+        Remove the entries of a graph and the entries without graph, or all
+        the entries if graph is None.
+        """
+        raise NotImplementedError
+
+
+class MemoryResultCache(ResultCache):
+    """
+    A result cache in memory: the least recently used entries are evicted
+    when the size of the keys and the values exceeds max_bytes.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        super().__init__()
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._graphs = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    async def get(self, key):
+        try:
+            expires_at, value, _ = self._entries[key]
+        except KeyError:
+            return None
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key, value, *, ttl, graph=None):
+        if key in self._entries:
+            self._remove(key)
+        size = len(key) + len(value)
+        if size > self.max_bytes:
+            return
+        self._entries[key] = (time.monotonic() + ttl, value, graph)
+        self._graphs.setdefault(graph, set()).add(key)
+        self.size += size
+        while self.size > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    async def invalidate(self, graph=None):
+        if graph is None:
+            self._entries.clear()
+            self._graphs.clear()
+            self.size = 0
+            return
+        for tag in (graph, None):
+            for key in list(self._graphs.get(tag, ())):
+                self._remove(key)
+
+    def _remove(self, key):
+        _, value, graph = self._entries.pop(key)
+        self.size -= len(key) + len(value)
+        keys = self._graphs[graph]
+        keys.discard(key)
+        if not keys:
+            del self._graphs[graph]
@@ -1,22 +1,126 @@
 import asyncio
+import json
 import logging
+import random
 import re
+import time
+from collections import OrderedDict
+from functools import partial
+from itertools import count
+from math import ceil
 from io import IOBase
-from math import ceil, log10
 from string import Formatter
 from textwrap import dedent, indent
-from typing import Dict, Optional, Union
+from typing import (
+    AsyncIterable,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+from urllib.parse import quote, urlencode
 
 import aiohttp
 
-from .syntax import IRI, all_prefixes
+from .cache import ResultCache
+from .compression import compress_stream, get_compressor
+from .endpoints import EndpointPolicy, endpoint_policies
+from .escape import escape_string
+from .hooks import ClientHooks, RequestTrace, trace_config, untraced
+from .limiter import AIMDLimiter
+from .ntriples import NTriplesParser, NTriplesSerializer
+from .results import JSONResultsParser, ResultSet, result_formats
+from .retry import RetryPolicy
+from .syntax import IRI, Node, Triples, all_prefixes
+from .turtle import turtle_header, turtle_triples
 
-__all__ = ["SPARQLClient", "SPARQLRequestFailed", "SPARQLQueryFormatter"]
+__all__ = [
+    "SPARQLClient",
+    "SPARQLRequestFailed",
+    "SPARQLQueryFormatter",
+    "SPARQLQueryTemplate",
+    "SPARQLPrefixes",
+]
 
 
 logger = logging.getLogger(__name__)
 
 
+class _Unlimited:
+    """
+    The context manager used in place of a slot when the client has no
+    concurrency limiter.
+    """
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        return None
+
+    def release(self) -> None:
+        pass
+
+
+_unlimited = _Unlimited()
+
+
+class _LogPreview:
+    """
+    A text given as argument to the logger which is only rendered (cut to
+    max_length characters and given to render) when the log record is
+    formatted.
+    """
+
+    __slots__ = ("text", "max_length", "render")
+
+    def __init__(self, text: str, max_length: Optional[int], render=None):
+        self.text = text
+        self.max_length = max_length
+        self.render = render
+
+    def __str__(self):
+        text, more = self.text, 0
+        if self.max_length is not None and len(text) > self.max_length:
+            more = len(text) - self.max_length
+            text = text[: self.max_length]
+        if self.render is not None:
+            text = self.render(text)
+        if more:
+            text += "\n... (%d more characters)" % more
+        return text
+
+
+def _timeout_param(name: str, milliseconds: bool = False):
+    def hint(seconds):
+        value = ceil(seconds * 1000) if milliseconds else ceil(seconds)
+        return {name: str(value)}, {}
+
+    return hint
+
+
+def _timeout_header(name: str):
+    def hint(seconds):
+        return {}, {name: str(ceil(seconds * 1000))}
+
+    return hint
+
+
+# NOTE: the timeout hints return the URL parameters and the headers telling
+#       the database to stop a query after the number of seconds given
+timeout_hints = {
+    "fuseki": _timeout_param("timeout"),
+    "rdf4j": _timeout_param("timeout"),
+    "graphdb": _timeout_param("timeout"),
+    "stardog": _timeout_param("timeout", milliseconds=True),
+    "blazegraph": _timeout_header("X-BIGDATA-MAX-QUERY-MILLIS"),
+}
+
+
 class SPARQLRequestFailed(aiohttp.ClientResponseError):
     def __init__(
         self,
@@ -88,29 +192,347 @@ class SPARQLQueryFormatter(Formatter):
         return indent(format(value, format_spec), self.indent)
 
 
+class SPARQLPrefixes:
+    """
+    The PREFIX declarations of a client: one section per mapping of prefix
+    labels to IRIs, the sections are separated by an empty line.
+
+    It can also generate the header with only the prefixes used in a query,
+    the prefixed names are found with a regex compiled once.
+    """
+
+    def __init__(self, *sections):
+        self.iris = {
+            label: iri
+            for section in sections
+            if section
+            for label, iri in section.items()
+        }
+        self.sections = [
+            [(label, str(iri)) for label, iri in sorted(section.items())]
+            for section in sections
+            if section
+        ]
+        self.header = self._render(None)
+        labels = sorted(
+            {label for section in self.sections for label, _ in section},
+            key=len,
+            reverse=True,
+        )
+        self.matcher = re.compile(
+            r"(?<![\w.:-])(%s):" % "|".join(re.escape(x) for x in labels)
+        )
+        self._headers = {}
+
+    def _render(self, used):
+        lines = []
+        for section in self.sections:
+            declarations = [
+                "PREFIX %s: %s" % x for x in section if used is None or x[0] in used
+            ]
+            if declarations and lines:
+                lines.append("")
+            lines.extend(declarations)
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def scan(self, text: str) -> set:
+        """
+        Return the prefix labels used in a text.
+        """
+        return set(self.matcher.findall(text))
+
+    def header_for(self, used: frozenset) -> str:
+        """
+        Return the header with only the prefixes used.
+        """
+        try:
+            return self._headers[used]
+        except KeyError:
+            header = self._headers[used] = self._render(used)
+            return header
+
+
+class SPARQLQueryTemplate:
+    """
+    A query template compiled once to be formatted many times: the template is
+    dedented, tokenized and its replacement fields are resolved when the
+    object is created so format() only has to join strings. It gives the same
+    result than SPARQLQueryFormatter:
+
+    template = SPARQLQueryTemplate("SELECT * FROM {{graph}} WHERE { {{}} }")
+    template.format(triples, graph=IRI("http://example.org"))
+
+    The prefixes header is prepended to the query. If a SPARQLPrefixes is
+    given instead, only the prefixes used in the query are declared: the
+    template is scanned once and only the values of the fields are scanned
+    when it is formatted.
+    """
+
+    re_simple_field = re.compile(r"(?:(\d+)|([^\W\d]\w*))")
+
+    def __init__(
+        self,
+        query: str,
+        prefixes_header: str = "",
+        *,
+        prefixes: Optional[SPARQLPrefixes] = None
+    ):
+        self.query = query
+        self.prefixes_header = prefixes_header
+        self._prefixes = prefixes
+        self._formatter = SPARQLQueryFormatter()
+        # NOTE: the header, then the text around the fields
+        self._chunks = [prefixes_header + "\n" if prefixes_header else "", ""]
+        self._fields = []
+        auto_arg_index = 0
+        parser = self._formatter.parse(dedent(query).strip())
+        for text, field_name, format_spec, conversion in parser:
+            if field_name is None:
+                self._chunks[-1] += text
+                break
+            # NOTE: same rules than string.Formatter for the fields numbering
+            if field_name == "":
+                if auto_arg_index is False:
+                    raise ValueError(
+                        "cannot switch from manual field specification to "
+                        "automatic field numbering"
+                    )
+                field_name = str(auto_arg_index)
+                auto_arg_index += 1
+            elif field_name.isdigit():
+                if auto_arg_index:
+                    raise ValueError(
+                        "cannot switch from manual field specification to "
+                        "automatic field numbering"
+                    )
+                auto_arg_index = False
+            self._chunks[-1] += text
+            self._fields.append(
+                (
+                    len(self._chunks),
+                    self._compile_field(field_name),
+                    conversion,
+                    format_spec or "",
+                    self._formatter.indent,
+                )
+            )
+            self._chunks.append(None)
+            self._chunks.append("")
+        if prefixes is not None:
+            self._used_prefixes = frozenset(prefixes.scan("".join(self._chunks[1::2])))
+            self._chunks[0] = self._header(self._used_prefixes)
+
+    def _header(self, used):
+        header = self._prefixes.header_for(used)
+        return header + "\n" if header else ""
+
+    def _compile_field(self, field_name):
+        match = self.re_simple_field.fullmatch(field_name)
+        if match and match.group(1):
+            index = int(match.group(1))
+            return lambda args, keywords: args[index]
+        elif match:
+            return lambda args, keywords: keywords[field_name]
+        else:
+            get_field = self._formatter.get_field
+            return lambda args, keywords: get_field(field_name, args, keywords)[0]
+
+    def __repr__(self):
+        return "<SPARQLQueryTemplate %r>" % self.query
+
+    def format(self, *args, **keywords) -> str:
+        chunks = list(self._chunks)
+        for index, get_value, conversion, format_spec, prefix in self._fields:
+            value = get_value(args, keywords)
+            if conversion:
+                value = self._formatter.convert_field(value, conversion)
+            value = format(value, format_spec)
+            chunks[index] = indent(value, prefix) if prefix else value
+        if self._prefixes is not None and self._fields:
+            used = self._used_prefixes.union(
+                *[self._prefixes.scan(chunks[x[0]]) for x in self._fields]
+            )
+            if used != self._used_prefixes:
+                chunks[0] = self._header(used)
+        return "".join(chunks)
+
+
 class SPARQLClient:
+    """
+    The protocol_mode sets how the queries and the updates are sent:
+
+     -  "form": POST of form-URL-encoded parameters (the default, supported
+        by all the databases)
+     -  "direct": POST of the raw query in the body (application/sparql-query
+        or application/sparql-update), no encoding is needed
+     -  "get": GET with the query in the URL parameters so it can be cached,
+        the updates are sent with "form" as GET is not allowed for them
+     -  "auto": "get" for the queries shorter than get_max_length once
+        URL-encoded and "direct" for the others and the updates
+
+    The request bodies (queries, updates and graph uploads) can be compressed
+    with the content encoding given to compression ("gzip" or "br" if brotli
+    is installed): the bodies of at least compression_threshold bytes and the
+    streams are compressed chunk by chunk in the thread pool while they are
+    sent. The responses are already decompressed by aiohttp.
+
+    The results of query() are kept in the cache given (e.g.
+    MemoryResultCache) for cache_ttl seconds (can be changed per call with
+    the argument cache_ttl, 0 disables the cache). The key is the endpoint,
+    the result format and the query once formatted. If
+    invalidate_cache_on_update is set, the results of the queries on a graph
+    are removed from the cache when the graph is modified by the client.
+
+    If coalesce_queries is set, the concurrent calls to query() with the same
+    key share one request and receive the same result object (it must not be
+    modified) or exception.
+
+    The endpoint can also be a list of read endpoints (replicas of the same
+    database) used for the queries (the updates are sent to update_endpoint,
+    the first endpoint by default). The endpoint of every query is chosen by
+    the endpoint_policy: "round-robin", "least-outstanding", "ewma" or a
+    callable that returns an EndpointPolicy from the list of endpoints. The
+    endpoints that fail are ejected for a while. The number of connections
+    per host can be limited with limit_per_host.
+
+    The requests that fail because of a server error or a connection error
+    are retried according to the retry_policy (a RetryPolicy, no retry by
+    default). A query is sent again to the endpoint chosen by the endpoint
+    policy, the bindings of query_iter() are only retried if the error
+    happens before the response is received.
+
+    The number of queries and updates in flight can be limited by a
+    concurrency_limiter (e.g. AIMDLimiter) whose limit follows the latency
+    and the errors of the database. A retry waits for a slot again.
+
+    The queries and the updates that are not finished after request_timeout
+    seconds (can be changed per call with the argument timeout) fail with
+    asyncio.TimeoutError, the retries must finish before the same deadline.
+    The time left is also sent with the queries according to timeout_hint
+    ("fuseki", "rdf4j", "graphdb", "stardog", "blazegraph" or a callable that
+    returns the URL parameters and the headers to send from the number of
+    seconds) so the database stops working on the queries given up.
+
+    The hooks (ClientHooks) are called at every step of the queries and the
+    updates with a RequestTrace holding the durations (formatting, waiting
+    for a connection, first byte, body, decoding) and the number of bytes
+    sent and received. Nothing is measured if there is no hook.
+
+    The queries and the updates are logged (logger aiosparql.client, level
+    DEBUG) with their first query_log_max_length characters (None for no
+    limit) and the extra attributes sparql_operation, sparql_endpoint and
+    sparql_query_length. Only a fraction query_log_sample_rate of them is
+    logged. Nothing is rendered if the level DEBUG is disabled.
+    """
+
+    protocol_modes = ("form", "direct", "get", "auto")
+
     def __init__(
         self,
-        endpoint: str,
+        endpoint: Union[str, List[str]],
         *,
         update_endpoint: Optional[str] = None,
         crud_endpoint: Optional[str] = None,
         prefixes: Optional[Dict[str, IRI]] = None,
         graph: Optional[IRI] = None,
+        result_format: str = "json",
+        template_cache_size: int = 256,
+        minimal_prefixes: bool = False,
+        protocol_mode: str = "form",
+        get_max_length: int = 2048,
+        compression: Optional[str] = None,
+        compression_threshold: int = 65536,
+        cache: Optional[ResultCache] = None,
+        cache_ttl: float = 60.0,
+        invalidate_cache_on_update: bool = False,
+        coalesce_queries: bool = False,
+        endpoint_policy: Union[str, Callable[[List[str]], EndpointPolicy]] = (
+            "round-robin"
+        ),
+        limit_per_host: Optional[int] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        concurrency_limiter: Optional[AIMDLimiter] = None,
+        request_timeout: Optional[float] = None,
+        timeout_hint: Union[str, Callable[[float], Tuple[dict, dict]], None] = None,
+        hooks: Optional[Iterable[ClientHooks]] = None,
+        query_log_max_length: Optional[int] = 4096,
+        query_log_sample_rate: float = 1.0,
         **kwargs
     ):
+        if protocol_mode not in self.protocol_modes:
+            raise ValueError("Unknown protocol mode: %r" % protocol_mode)
+        if compression is not None:
+            get_compressor(compression)
+        if isinstance(timeout_hint, str):
+            try:
+                timeout_hint = timeout_hints[timeout_hint]
+            except KeyError:
+                raise ValueError("Unknown timeout hint: %r" % timeout_hint)
+        endpoints = [endpoint] if isinstance(endpoint, str) else list(endpoint)
+        if isinstance(endpoint_policy, str):
+            try:
+                endpoint_policy = endpoint_policies[endpoint_policy]
+            except KeyError:
+                raise ValueError("Unknown endpoint policy: %r" % endpoint_policy)
+        self._endpoint_policy = endpoint_policy(endpoints)
+        hooks = list(hooks or ()) or None
+        if hooks is not None:
+            trace_configs = list(kwargs.get("trace_configs") or ())
+            kwargs["trace_configs"] = trace_configs + [trace_config()]
+        if limit_per_host is not None and "connector" not in kwargs:
+            kwargs["connector"] = aiohttp.TCPConnector(limit_per_host=limit_per_host)
         self._closed = False
-        self._endpoint = endpoint
+        self._endpoint = endpoints[0]
         self._update_endpoint = update_endpoint
         self._crud_endpoint = crud_endpoint
         self._graph = graph
+        self._result_format = self._get_result_format(result_format or "json")
         self.session = aiohttp.ClientSession(**kwargs)
         self._generate_prefixes(prefixes)
+        self._templates = OrderedDict()
+        self._template_cache_size = template_cache_size
+        self._minimal_prefixes = minimal_prefixes
+        self._protocol_mode = protocol_mode
+        self._get_max_length = get_max_length
+        self._compression = compression
+        self._compression_threshold = compression_threshold
+        self._cache = cache
+        self._cache_ttl = cache_ttl
+        self._invalidate_cache_on_update = invalidate_cache_on_update
+        self._coalesce_queries = coalesce_queries
+        self._in_flight = {}
+        self._retry_policy = retry_policy
+        self._concurrency_limiter = concurrency_limiter
+        self._request_timeout = request_timeout
+        self._timeout_hint = timeout_hint
+        self._hooks = hooks
+        self._query_log_max_length = query_log_max_length
+        self._query_log_sample_rate = query_log_sample_rate
 
     @property
     def endpoint(self):
         return self._endpoint
 
+    @property
+    def endpoints(self):
+        return self._endpoint_policy.endpoints
+
+    @property
+    def endpoint_policy(self):
+        return self._endpoint_policy
+
+    @property
+    def retry_policy(self):
+        return self._retry_policy
+
+    @property
+    def concurrency_limiter(self):
+        return self._concurrency_limiter
+
+    @property
+    def hooks(self):
+        return self._hooks
+
     @property
     def update_endpoint(self):
         return self._update_endpoint or self._endpoint
@@ -123,85 +545,834 @@ class SPARQLClient:
     def graph(self):
         return self._graph
 
+    def _get_result_format(self, result_format):
+        if result_format is None:
+            return self._result_format
+        try:
+            return result_formats[result_format]
+        except KeyError:
+            raise ValueError("Unknown result format: %r" % result_format)
+
     def _generate_prefixes(self, prefixes):
-        header = [
-            "PREFIX %s: %s" % (prefix, ns.__iri__)
-            for prefix, ns in sorted(all_prefixes.items(), key=lambda x: x[0])
-        ]
-        if prefixes:
-            header.append("")
-            header.extend(
-                [
-                    "PREFIX %s: %s" % x
-                    for x in sorted(prefixes.items(), key=lambda x: x[0])
-                ]
-            )
-        self._prefixes_header = "\n".join(header) + "\n"
+        self._prefixes = SPARQLPrefixes(
+            {prefix: ns.__iri__ for prefix, ns in all_prefixes.items()}, prefixes
+        )
+        self._prefixes_header = self._prefixes.header
 
-    def _prepare_query(self, query: str, *args, **keywords) -> dict:
-        lines = [self._prefixes_header]
-        lines.extend([dedent(query).strip()])
-        query_args = {"graph": self.graph} if self.graph else {}
-        query_args.update(keywords)
-        query_formatter = SPARQLQueryFormatter()
-        return query_formatter.vformat("\n".join(lines), args, query_args)
+    def prepare(self, query: str) -> SPARQLQueryTemplate:
+        """
+        Compile a query template with the prefixes of the client (only the
+        ones used by the query if minimal_prefixes is set). The templates are
+        kept in a LRU cache so the same query is only compiled once. The
+        result can be given to query() and update() in place of the query.
+        """
+        try:
+            template = self._templates[query]
+        except KeyError:
+            if self._minimal_prefixes:
+                template = SPARQLQueryTemplate(query, prefixes=self._prefixes)
+            else:
+                template = SPARQLQueryTemplate(query, self._prefixes_header)
+            self._templates[query] = template
+            if len(self._templates) > self._template_cache_size:
+                self._templates.popitem(last=False)
+        else:
+            self._templates.move_to_end(query)
+        return template
+
+    def _prepare_query(
+        self, query: Union[str, SPARQLQueryTemplate], *args, **keywords
+    ) -> str:
+        if not isinstance(query, SPARQLQueryTemplate):
+            query = self.prepare(query)
+        if self.graph:
+            keywords.setdefault("graph", self.graph)
+        return query.format(*args, **keywords)
+
+    def _new_trace(self, operation: str, query) -> Optional[RequestTrace]:
+        if self._hooks is None:
+            return None
+        if isinstance(query, SPARQLQueryTemplate):
+            query = query.query
+        return RequestTrace(self._hooks, operation, query)
+
+    def _prepare_traced(self, operation: str, query, args, keywords):
+        """
+        Same as _prepare_query() but return a RequestTrace (None if there is
+        no hook) with the time spent formatting the query and the query.
+        """
+        trace = self._new_trace(operation, query)
+        if trace is None:
+            return None, self._prepare_query(query, *args, **keywords)
+        started = time.monotonic()
+        full_query = self._prepare_query(query, *args, **keywords)
+        trace.prepare_time = time.monotonic() - started
+        trace.query = full_query
+        trace.emit("on_prepare")
+        return trace, full_query
+
+    def _attempt(self, trace: Optional[RequestTrace], url: str):
+        if trace is None:
+            return untraced
+        return trace.attempt_to(url)
 
     def _pretty_print_query(self, query: str) -> str:
         query = query.rstrip()
-        ln_indent = ceil(log10(query.count("\n")))
+        ln_indent = len(str(query.count("\n") + 1))
         return "\n".join(
             ("{:-%dd}: {}" % ln_indent).format(i, x)
             for i, x in enumerate(query.split("\n"), 1)
         )
 
+    def _log_query(self, operation: str, url: str, full_query: str) -> None:
+        if not logger.isEnabledFor(logging.DEBUG):
+            return
+        rate = self._query_log_sample_rate
+        if rate < 1.0 and random.random() >= rate:
+            return
+        logger.debug(
+            "Sending SPARQL %s to %s:\n%s\n%s",
+            operation,
+            url,
+            _LogPreview(
+                full_query, self._query_log_max_length, self._pretty_print_query
+            ),
+            "=" * 40,
+            extra={
+                "sparql_operation": operation,
+                "sparql_endpoint": url,
+                "sparql_query_length": len(full_query),
+            },
+        )
+
     async def _raise_for_status(self, resp: aiohttp.ClientResponse) -> None:
         if resp.status >= 400:
             explanation = await resp.text()
             resp.release()
-            logger.debug("Server responded:\n%s\n%s", explanation, "=" * 40)
+            logger.debug(
+                "Server responded:\n%s\n%s",
+                _LogPreview(explanation, self._query_log_max_length),
+                "=" * 40,
+            )
             raise SPARQLRequestFailed(
                 resp.request_info,
                 resp.history,
                 status=resp.status,
                 message=resp.reason,
+                headers=resp.headers,
                 explanation=explanation,
             )
 
-    async def query(self, query: str, *args, **keywords) -> dict:
+    def _deadline(self, timeout: Optional[float]) -> Optional[float]:
+        if timeout is None:
+            timeout = self._request_timeout
+        if timeout is None:
+            return None
+        return asyncio.get_event_loop().time() + timeout
+
+    def _sparql_request(
+        self, url, operation, full_query, headers, deadline=None, trace=None
+    ):
+        """
+        Send a query or an update (operation) according to the protocol
+        mode of the client with the time left before the deadline.
+        """
+        kwargs = {"headers": headers}
+        if trace is not None:
+            kwargs["trace_request_ctx"] = trace
+        if deadline is not None:
+            remaining = deadline - asyncio.get_event_loop().time()
+            if remaining <= 0:
+                raise asyncio.TimeoutError()
+            kwargs["timeout"] = aiohttp.ClientTimeout(total=remaining)
+            if self._timeout_hint is not None and operation == "query":
+                kwargs["params"], hint_headers = self._timeout_hint(remaining)
+                headers.update(hint_headers)
+        mode = self._protocol_mode
+        if mode == "auto":
+            if (
+                operation == "query"
+                and len(full_query) <= self._get_max_length
+                and len(quote(full_query)) <= self._get_max_length
+            ):
+                mode = "get"
+            else:
+                mode = "direct"
+        if mode == "get" and operation == "query":
+            params = {"query": full_query}
+            params.update(kwargs.pop("params", ()))
+            return self.session.get(url, params=params, **kwargs)
+        elif mode == "direct":
+            headers["Content-Type"] = "application/sparql-%s" % operation
+            data = full_query.encode("utf-8")
+        elif self._compression is not None:
+            headers["Content-Type"] = "application/x-www-form-urlencoded"
+            data = urlencode({operation: full_query}).encode("ascii")
+        else:
+            return self.session.post(url, data={operation: full_query}, **kwargs)
+        data, encoding = self._compress(data)
+        if encoding is not None:
+            headers["Content-Encoding"] = encoding
+        return self.session.post(url, data=data, **kwargs)
+
+    def _compress(self, data):
+        """
+        Return the data compressed with the content encoding of the client
+        and the content encoding (None when the data is not compressed).
+        """
+        if self._compression is None or data is None:
+            return data, None
+        elif isinstance(data, str):
+            data = data.encode("utf-8")
+        if isinstance(data, (bytes, bytearray)):
+            if len(data) < self._compression_threshold:
+                return data, None
+        elif not isinstance(data, IOBase) and not hasattr(data, "__aiter__"):
+            return data, None
+        return compress_stream(self._compression, data), self._compression
+
+    def _slot(self, deadline: Optional[float] = None):
+        if self._concurrency_limiter is None:
+            return _unlimited
+        if deadline is None:
+            return self._concurrency_limiter.slot()
+        # NOTE: the time spent waiting for a slot is taken from the deadline
+        timeout = deadline - asyncio.get_event_loop().time()
+        return self._concurrency_limiter.slot(max(timeout, 0.0))
+
+    def _graph_tag(self, graph) -> Optional[str]:
+        graph = graph or self.graph
+        if graph is None:
+            return None
+        return graph.value if isinstance(graph, IRI) else str(graph)
+
+    async def _invalidate_cache(self, graph) -> None:
+        if self._cache is not None and self._invalidate_cache_on_update:
+            await self._cache.invalidate(self._graph_tag(graph))
+
+    async def query(
+        self,
+        query: str,
+        *args,
+        result_format: Optional[str] = None,
+        cache_ttl: Optional[float] = None,
+        timeout: Optional[float] = None,
+        **keywords
+    ) -> dict:
+        content_type, parser_class = self._get_result_format(result_format)
+        trace, full_query = self._prepare_traced("query", query, args, keywords)
+        deadline = self._deadline(timeout)
+        if cache_ttl is None:
+            cache_ttl = self._cache_ttl
+        use_cache = self._cache is not None and cache_ttl > 0
+        if not use_cache and not self._coalesce_queries:
+            result, _ = await self._fetch_query(
+                parser_class, content_type, full_query, deadline, trace
+            )
+            return result
+        key = "%s\n%s\n%s" % (self.endpoint, content_type, full_query)
+        if use_cache:
+            data = await self._cache.get(key)
+            if data is not None:
+                self._cache.hits += 1
+                return json.loads(data.decode("utf-8"))
+            self._cache.misses += 1
+
+        async def fetch(deadline):
+            result, data = await self._fetch_query(
+                parser_class, content_type, full_query, deadline, trace
+            )
+            if use_cache:
+                if data is None:
+                    data = json.dumps(result).encode("utf-8")
+                graph = self._graph_tag(keywords.get("graph"))
+                await self._cache.set(key, data, ttl=cache_ttl, graph=graph)
+            return result
+
+        if self._coalesce_queries:
+            return await self._coalesce(key, fetch, deadline)
+        return await fetch(deadline)
+
+    async def _coalesce(self, key: str, fetch, deadline=None):
+        """
+        Run fetch() once for all the concurrent calls with the same key: the
+        first call starts a task and the others wait for its result (or its
+        exception). A waiter cancelled or timed out (deadline) does not
+        cancel the task unless it is the last one.
+        """
+        timeout = None
+        if deadline is not None:
+            timeout = deadline - asyncio.get_event_loop().time()
+            if timeout <= 0:
+                raise asyncio.TimeoutError()
+        try:
+            entry = self._in_flight[key]
+        except KeyError:
+            # NOTE: the task is shared by callers with different deadlines,
+            #       every caller waits for it until its own deadline
+            task = asyncio.ensure_future(fetch(None))
+            entry = self._in_flight[key] = [task, 0]
+            task.add_done_callback(partial(self._forget_in_flight, key, task))
+        task = entry[0]
+        entry[1] += 1
+        try:
+            if timeout is None:
+                return await asyncio.shield(task)
+            return await asyncio.wait_for(asyncio.shield(task), timeout)
+        finally:
+            entry[1] -= 1
+            if not entry[1] and not task.done():
+                self._forget_in_flight(key, task)
+                task.cancel()
+
+    def _forget_in_flight(self, key: str, task, _=None) -> None:
+        if key in self._in_flight and self._in_flight[key][0] is task:
+            del self._in_flight[key]
+
+    async def _fetch_query(
+        self,
+        parser_class,
+        content_type: str,
+        full_query: str,
+        deadline=None,
+        trace=None,
+    ):
+        """
+        Return the result of a query as a dict like the JSON result and the
+        body of the response if it is the JSON result.
+        """
+        if parser_class is not JSONResultsParser:
+            # NOTE: the result is built like the JSON result so the format
+            #       can be changed without changing the code that uses it
+            parser = parser_class()
+            bindings = self._query_bindings(
+                parser, content_type, full_query, deadline, trace
+            )
+            result = {"results": {"bindings": [x async for x in bindings]}}
+            result["head"] = parser.head or {"vars": []}
+            return result, None
+        if self._retry_policy is None:
+            return await self._fetch_json(full_query, deadline, trace)
+        return await self._retry_policy.run(
+            self._fetch_json, full_query, deadline, trace, deadline=deadline
+        )
+
+    async def _fetch_json(self, full_query: str, deadline=None, trace=None):
         headers = {"Accept": "application/json"}
-        full_query = self._prepare_query(query, *args, **keywords)
-        logger.debug(
-            "Sending SPARQL query to %s: \n%s\n%s",
-            self.endpoint,
-            self._pretty_print_query(full_query),
-            "=" * 40,
+        async with self._slot(deadline):
+            endpoint = self._endpoint_policy.select()
+            self._log_query("query", endpoint.url, full_query)
+            with self._endpoint_policy.track(endpoint), self._attempt(
+                trace, endpoint.url
+            ):
+                async with self._sparql_request(
+                    endpoint.url, "query", full_query, headers, deadline, trace
+                ) as resp:
+                    if trace is not None:
+                        trace.received_headers(resp.status)
+                    await self._raise_for_status(resp)
+                    if trace is None:
+                        if self._cache is None:
+                            return await resp.json(), None
+                        data = await resp.read()
+                        return await resp.json(), data
+                    data = await resp.read()
+                    trace.received_body(len(data))
+                    result = await resp.json()
+                    trace.decoded()
+                    return result, data if self._cache is not None else None
+
+    async def _query_bindings(
+        self, parser, content_type: str, full_query: str, deadline=None, trace=None
+    ):
+        headers = {"Accept": content_type}
+        policy = self._retry_policy
+        if policy is not None:
+            policy.started()
+        attempt = 0
+        while True:
+            endpoint = self._endpoint_policy.select()
+            self._log_query("query", endpoint.url, full_query)
+            received = False
+            try:
+                async with self._slot(deadline) as slot:
+                    with self._endpoint_policy.track(endpoint), self._attempt(
+                        trace, endpoint.url
+                    ):
+                        async with self._sparql_request(
+                            endpoint.url,
+                            "query",
+                            full_query,
+                            dict(headers),
+                            deadline,
+                            trace,
+                        ) as resp:
+                            if trace is not None:
+                                trace.received_headers(resp.status)
+                            await self._raise_for_status(resp)
+                            # NOTE: the slot is not held while the caller
+                            #       reads the bindings at its own pace
+                            slot.release()
+                            received = True
+                            async for chunk in resp.content.iter_any():
+                                if trace is not None:
+                                    trace.bytes_received += len(chunk)
+                                for binding in parser.feed(chunk):
+                                    yield binding
+                            for binding in parser.close():
+                                yield binding
+                            if trace is not None:
+                                trace.received_body()
+                                trace.decoded()
+                return
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                # NOTE: the bindings may have been given to the caller
+                if policy is None or received:
+                    raise
+                delay = policy.delay(attempt, exc, deadline)
+                if delay is None:
+                    raise
+                logger.debug("Query failed (%s), retrying in %.2fs", exc, delay)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    def query_iter(
+        self,
+        query: str,
+        *args,
+        result_format: Optional[str] = None,
+        timeout: Optional[float] = None,
+        **keywords
+    ) -> AsyncIterator[dict]:
+        """
+        Same as query() but the bindings are yielded one by one as soon as
+        they are received instead of loading the whole result in memory:
+
+        async for binding in client.query_iter("SELECT * WHERE {?s ?p ?o}"):
+            print(binding["s"]["value"])
+        """
+        content_type, parser_class = self._get_result_format(result_format)
+        trace, full_query = self._prepare_traced("query", query, args, keywords)
+        return self._query_bindings(
+            parser_class(), content_type, full_query, self._deadline(timeout), trace
         )
-        async with self.session.post(
-            self.endpoint, data={"query": full_query}, headers=headers
-        ) as resp:
-            await self._raise_for_status(resp)
-            return await resp.json()
 
-    async def update(self, query: str, *args, **keywords) -> dict:
+    async def query_results(
+        self,
+        query: str,
+        *args,
+        result_format: Optional[str] = None,
+        timeout: Optional[float] = None,
+        **keywords
+    ) -> ResultSet:
+        """
+        Same as query() but the bindings are returned in a ResultSet which is
+        much more compact than the JSON result.
+        """
+        content_type, parser_class = self._get_result_format(result_format)
+        parser = parser_class()
+        result_set = ResultSet()
+        trace, full_query = self._prepare_traced("query", query, args, keywords)
+        bindings = self._query_bindings(
+            parser, content_type, full_query, self._deadline(timeout), trace
+        )
+        async for binding in bindings:
+            if not result_set.vars and parser.vars:
+                result_set.add_vars(parser.vars)
+            result_set.append(binding)
+        result_set.add_vars(parser.vars or [])
+        result_set.boolean = parser.boolean
+        return result_set
+
+    async def _run_many(
+        self, calls, *, concurrency: int, ordered: bool, return_exceptions: bool
+    ):
+        """
+        Run the coroutine functions of the iterable calls and yield tuples
+        (index, result). A call is only started when less than concurrency
+        calls are running or have their result waiting to be yielded, this
+        keeps the memory bounded when the consumer is slower than the server.
+        """
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        semaphore = asyncio.Semaphore(concurrency)
+        finished = asyncio.Queue()
+        tasks = set()
+
+        async def run(index, call):
+            try:
+                result = await call()
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                finished.put_nowait((index, exc, True))
+            else:
+                finished.put_nowait((index, result, False))
+
+        async def schedule():
+            count = 0
+            calls_iter = iter(calls)
+            try:
+                while True:
+                    # NOTE: the next call is only taken once it can be run
+                    await semaphore.acquire()
+                    try:
+                        call = next(calls_iter)
+                    except StopIteration:
+                        break
+                    task = asyncio.ensure_future(run(count, call))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+                    count += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                finished.put_nowait((None, exc, True))
+            else:
+                semaphore.release()
+                finished.put_nowait((None, count, False))
+
+        scheduler = asyncio.ensure_future(schedule())
+        try:
+            pending = {}
+            next_index = 0
+            count = None
+            while count is None or next_index < count:
+                index, result, failed = await finished.get()
+                if index is None:
+                    if failed:
+                        raise result
+                    count = result
+                    continue
+                if not ordered:
+                    pending[next_index] = (index, result, failed)
+                else:
+                    pending[index] = (index, result, failed)
+                while next_index in pending:
+                    index, result, failed = pending.pop(next_index)
+                    next_index += 1
+                    semaphore.release()
+                    if failed and not return_exceptions:
+                        raise result
+                    yield index, result
+        finally:
+            scheduler.cancel()
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(scheduler, *tasks, return_exceptions=True)
+
+    def query_many(
+        self,
+        queries: Iterable,
+        *,
+        concurrency: int = 10,
+        ordered: bool = True,
+        return_exceptions: bool = False
+    ) -> AsyncIterator[Tuple[int, dict]]:
+        """
+        Run many queries concurrently and yield tuples (index, result) as
+        they finish. At most `concurrency` queries are running or have their
+        result waiting to be consumed at the same time.
+
+        Every query is either a query (string or prepared template) or a tuple
+        (query, args) or (query, args, keywords) with the arguments of the
+        query. The results are yielded in the order of the queries unless
+        ordered is False, in which case they are yielded as soon as they are
+        received.
+
+        The first error is raised and the remaining queries are cancelled
+        unless return_exceptions is True: the exceptions are then yielded in
+        place of the results of the queries that failed:
+
+        queries = [("SELECT * WHERE { {{}} ?p ?o }", [s]) for s in subjects]
+        async for i, result in client.query_many(queries, concurrency=20):
+            ...
+        """
+
+        def calls():
+            for query in queries:
+                args, keywords = (), {}
+                if isinstance(query, tuple):
+                    if len(query) == 3:
+                        query, args, keywords = query
+                    else:
+                        query, args = query
+                yield partial(self.query, query, *args, **keywords)
+
+        return self._run_many(
+            calls(),
+            concurrency=concurrency,
+            ordered=ordered,
+            return_exceptions=return_exceptions,
+        )
+
+    def paginate(
+        self,
+        query: str,
+        *args,
+        page_size: int = 1000,
+        prefetch: int = 2,
+        order_by: Optional[str] = None,
+        result_format: Optional[str] = None,
+        timeout: Optional[float] = None,
+        **keywords
+    ) -> AsyncIterator[dict]:
+        """
+        Run a SELECT query page by page and yield its bindings. The pages are
+        read until one has less than page_size bindings, so page_size must not
+        be greater than the maximum number of rows returned by the server.
+
+        By default the pages are requested with LIMIT and OFFSET appended to
+        the query (which must not have them already and should have an ORDER
+        BY to get a stable order). The next `prefetch` pages are requested
+        while the current page is consumed.
+
+        If order_by is the name of a variable, the pages are requested with a
+        filter on the last value of this variable instead of an OFFSET which
+        is slow on most databases when it gets big. The filter replaces the
+        field {{keyset}} that the query must have in its WHERE clause (so the
+        database can use it to skip the previous pages) and ORDER BY and
+        LIMIT are appended to the query. The variable must be bound in every
+        binding and have a different value in every binding. Only the next
+        page is prefetched as it needs the last value of the current page.
+        The timeout applies to every page:
+
+        query = "SELECT ?s FROM {{graph}} WHERE { ?s a foaf:Person {{keyset}} }"
+        async for binding in client.paginate(query, order_by="s"):
+            ...
+        """
+        if page_size < 1:
+            raise ValueError("page_size must be at least 1")
+        if prefetch < 0:
+            raise ValueError("prefetch must be positive")
+        content_type, parser_class = self._get_result_format(result_format)
+
+        def fetch(page_query):
+            trace = self._new_trace("query", query)
+            if trace is not None:
+                trace.query = page_query
+            return self._fetch_query(
+                parser_class, content_type, page_query, self._deadline(timeout), trace
+            )
+
+        if order_by is None:
+            full_query = self._prepare_query(query, *args, **keywords)
+            return self._paginate_offset(fetch, full_query, page_size, prefetch)
+        template = query.query if isinstance(query, SPARQLQueryTemplate) else query
+        if "{{keyset}}" not in template:
+            raise ValueError("The query must have a {{keyset}} field with order_by")
+        variable = order_by.lstrip("?$")
+
+        def page_query(condition):
+            full_query = self._prepare_query(
+                query, *args, **dict(keywords, keyset=condition)
+            )
+            return "%s\nORDER BY ?%s\nLIMIT %d" % (
+                full_query.rstrip(),
+                variable,
+                page_size,
+            )
+
+        return self._paginate_keyset(fetch, page_query, page_size, variable)
+
+    async def _paginate_offset(self, fetch, full_query, page_size, prefetch):
+        full_query = full_query.rstrip()
+
+        def pages():
+            for offset in count(0, page_size):
+                page_query = "%s\nLIMIT %d\nOFFSET %d" % (full_query, page_size, offset)
+                yield partial(fetch, page_query)
+
+        if prefetch == 0:
+            for page in pages():
+                result, _ = await page()
+                bindings = result["results"]["bindings"]
+                for binding in bindings:
+                    yield binding
+                if len(bindings) < page_size:
+                    return
+        # NOTE: _run_many() starts the next call as soon as a result is
+        #       yielded so `prefetch` calls are running while a page is read
+        results = self._run_many(
+            pages(), concurrency=prefetch, ordered=True, return_exceptions=False
+        )
+        try:
+            async for _, (result, _) in results:
+                bindings = result["results"]["bindings"]
+                for binding in bindings:
+                    yield binding
+                if len(bindings) < page_size:
+                    break
+        finally:
+            await results.aclose()
+
+    async def _paginate_keyset(self, fetch, page_query, page_size, variable):
+        page = asyncio.ensure_future(fetch(page_query("")))
+        try:
+            while True:
+                result, _ = await page
+                bindings = result["results"]["bindings"]
+                if len(bindings) < page_size:
+                    for binding in bindings:
+                        yield binding
+                    return
+                try:
+                    last = bindings[-1][variable]
+                except KeyError:
+                    raise ValueError("?%s is not bound in the last binding" % variable)
+                condition = "FILTER(%s)" % self._keyset_filter(variable, last)
+                page = asyncio.ensure_future(fetch(page_query(condition)))
+                for binding in bindings:
+                    yield binding
+        finally:
+            page.cancel()
+            await asyncio.gather(page, return_exceptions=True)
+
+    def _keyset_filter(self, variable: str, term: dict) -> str:
+        """
+        Return the condition of the bindings that come after a term of the
+        JSON result when they are ordered by a variable.
+        """
+        value = escape_string(term["value"])
+        if term["type"] == "uri":
+            # NOTE: the IRIs are ordered and compared as strings
+            return "STR(?%s) > %s" % (variable, value)
+        elif term["type"] in ("literal", "typed-literal"):
+            if "datatype" in term:
+                return "?%s > %s^^<%s>" % (variable, value, term["datatype"])
+            elif "xml:lang" in term:
+                return "STR(?%s) > %s" % (variable, value)
+            return "?%s > %s" % (variable, value)
+        raise ValueError(
+            "Cannot paginate on ?%s which is a %s" % (variable, term["type"])
+        )
+
+    async def update(
+        self, query: str, *args, timeout: Optional[float] = None, **keywords
+    ) -> dict:
+        return await self._update(query, args, keywords, timeout)
+
+    async def _update(
+        self, query: str, args, keywords, timeout=None, idempotent=False, policy=None
+    ) -> dict:
+        """
+        Send an update, retried by the retry policy (the one of the client if
+        None) if it allows it or if the update can be applied twice
+        (idempotent).
+        """
+        trace, full_query = self._prepare_traced("update", query, args, keywords)
+        graph = keywords.get("graph")
+        deadline = self._deadline(timeout)
+        if policy is None:
+            policy = self._retry_policy
+        if policy is not None and (idempotent or policy.retry_updates):
+            return await policy.run(
+                self._send_update, full_query, graph, deadline, trace, deadline=deadline
+            )
+        return await self._send_update(full_query, graph, deadline, trace)
+
+    async def _send_update(
+        self, full_query: str, graph, deadline=None, trace=None
+    ) -> dict:
         headers = {"Accept": "application/json"}
-        full_query = self._prepare_query(query, *args, **keywords)
-        logger.debug(
-            "Sending SPARQL query to %s:\n%s\n%s",
-            self.endpoint,
-            self._pretty_print_query(full_query),
-            "=" * 40,
+        self._log_query("update", self.update_endpoint, full_query)
+        async with self._slot(deadline):
+            with self._attempt(trace, self.update_endpoint):
+                async with self._sparql_request(
+                    self.update_endpoint, "update", full_query, headers, deadline, trace
+                ) as resp:
+                    if trace is not None:
+                        trace.received_headers(resp.status)
+                    await self._raise_for_status(resp)
+                    await self._invalidate_cache(graph)
+                    if trace is not None:
+                        trace.received_body(len(await resp.read()))
+                    # NOTE: some databases may still return HTML instead of JSON
+                    if "application/json" not in resp.content_type:
+                        result = {"body": await resp.text()}
+                    else:
+                        result = await resp.json()
+                    if trace is not None:
+                        trace.decoded()
+                    return result
+
+    async def insert_triples(
+        self,
+        triples: Triples,
+        *,
+        graph: Optional[IRI] = None,
+        max_bytes: Optional[int] = 1024 * 1024,
+        max_triples: Optional[int] = 10000,
+        concurrency: int = 4,
+        retries: int = 2,
+        retry_delay: float = 1.0
+    ) -> int:
+        """
+        Insert triples with as many INSERT DATA updates as needed so every
+        update contains at most max_triples triples and max_bytes bytes of
+        triples. The triples of a subject are always sent in the same update.
+
+        At most `concurrency` updates are sent at the same time. The updates
+        that fail are retried by the retry policy of the client (even if its
+        retry_updates is not set). If the client has none, they are retried
+        by RetryPolicy(retries, backoff=retry_delay).
+
+        Return the number of updates sent.
+        """
+        graph = graph or self.graph
+        if graph:
+            template = self.prepare(
+                """
+                INSERT DATA {
+                    GRAPH {{graph}} {
+                        {{}}
+                    }
+                }
+                """
+            )
+        else:
+            template = self.prepare(
+                """
+                INSERT DATA {
+                    {{}}
+                }
+                """
+            )
+
+        policy = self._retry_policy
+        if policy is None:
+            policy = RetryPolicy(retries, backoff=retry_delay, retry_updates=True)
+
+        def calls():
+            # NOTE: INSERT DATA can be sent again safely
+            for chunk in triples.chunks(max_bytes=max_bytes, max_triples=max_triples):
+                yield partial(
+                    self._update,
+                    template,
+                    (chunk,),
+                    {"graph": graph},
+                    idempotent=True,
+                    policy=policy,
+                )
+
+        count = 0
+        updates = self._run_many(
+            calls(), concurrency=concurrency, ordered=False, return_exceptions=False
         )
-        async with self.session.post(
-            self.update_endpoint, data={"update": full_query}, headers=headers
-        ) as resp:
-            await self._raise_for_status(resp)
-            # NOTE: some databases may still return HTML instead of JSON
-            if "application/json" not in resp.content_type:
-                return {"body": await resp.text()}
-            return await resp.json()
+        async for _ in updates:
+            count += 1
+        return count
 
     def _crud_request(
-        self, method, graph=None, data=None, accept=None, content_type=None
+        self,
+        method,
+        graph=None,
+        data=None,
+        accept=None,
+        content_type=None,
+        content_encoding=None,
     ):
         if not self.crud_endpoint:
             raise ValueError("CRUD endpoint not specified")
@@ -218,6 +1389,8 @@ class SPARQLClient:
             headers["Content-Type"] = content_type
         if accept:
             headers["Accept"] = accept
+        if content_encoding:
+            headers["Content-Encoding"] = content_encoding
         logger.debug(
             "Sending %s request to CRUD endpoint %s with headers " "%r, and params %r",
             method,
@@ -229,28 +1402,167 @@ class SPARQLClient:
             method, url, params=params, headers=headers, data=data
         )
 
+    def _graph_header(self, format: str) -> bytes:
+        if format == "text/turtle":
+            return (turtle_header(self._prefixes.iris) + "\n").encode("utf-8")
+        return b""
+
+    def _serialize_triples(self, triples: Triples, format: str) -> bytes:
+        if format == "text/turtle":
+            return turtle_triples(triples).encode("utf-8")
+        elif format in ("application/n-triples", "text/plain"):
+            serializer = NTriplesSerializer(self._prefixes.iris)
+            return serializer.serialize(triples).encode("utf-8")
+        raise ValueError(
+            "Triples can only be sent as text/turtle or application/n-triples"
+        )
+
+    async def _stream_graph_data(self, data: AsyncIterable, format: str):
+        """
+        Read the bytes or Triples of an async iterable and yield them as
+        bytes. The Triples are serialized in a thread while the previous data
+        is uploaded, at most 2 chunks are waiting to be uploaded.
+        """
+        loop = asyncio.get_event_loop()
+        chunks = asyncio.Queue(maxsize=2)
+
+        async def produce():
+            header_sent = False
+            try:
+                async for item in data:
+                    if isinstance(item, Triples):
+                        if not header_sent:
+                            header = self._graph_header(format)
+                            if header:
+                                await chunks.put(header)
+                            header_sent = True
+                        item = await loop.run_in_executor(
+                            None, self._serialize_triples, item, format
+                        )
+                    elif isinstance(item, str):
+                        item = item.encode("utf-8")
+                    await chunks.put(item)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                await chunks.put(exc)
+            else:
+                await chunks.put(None)
+
+        producer = asyncio.ensure_future(produce())
+        try:
+            while True:
+                chunk = await chunks.get()
+                if chunk is None:
+                    break
+                elif isinstance(chunk, Exception):
+                    raise chunk
+                yield chunk
+        finally:
+            producer.cancel()
+            await asyncio.gather(producer, return_exceptions=True)
+
+    def _graph_data(self, data, format):
+        if isinstance(data, Triples):
+            return self._graph_header(format) + self._serialize_triples(data, format)
+        elif hasattr(data, "__aiter__"):
+            return self._stream_graph_data(data, format)
+        return data
+
     def get(self, *, format: str, graph: Optional[IRI] = None):
         return self._crud_request("GET", graph=graph, accept=format)
 
+    async def iter_graph(
+        self, graph: Optional[IRI] = None, *, format: str = "application/n-triples"
+    ) -> AsyncIterator[tuple]:
+        """
+        Download a graph from the CRUD endpoint and yield its triples as
+        tuples (subject, predicate, object) as soon as they are received:
+
+        async for s, p, o in client.iter_graph(IRI("http://example.org/g")):
+            ...
+        """
+        if format not in ("application/n-triples", "text/plain"):
+            raise ValueError("Only N-Triples can be parsed, not %r" % format)
+        parser = NTriplesParser()
+        async with self._crud_request("GET", graph=graph, accept=format) as resp:
+            await self._raise_for_status(resp)
+            async for chunk in resp.content.iter_any():
+                for triple in parser.feed(chunk):
+                    yield triple
+            for triple in parser.close():
+                yield triple
+
     async def put(
-        self, data: Union[bytes, IOBase], *, format: str, graph: Optional[IRI] = None
+        self,
+        data: Union[bytes, IOBase, Triples, AsyncIterable],
+        *,
+        format: str,
+        graph: Optional[IRI] = None
     ):
+        """
+        The data can also be Triples or an async iterable of bytes or Triples
+        which is streamed to the server while it is produced. The Triples are
+        sent in Turtle (text/turtle) with the prefixes of the client or in
+        N-Triples (application/n-triples).
+        """
+        data, encoding = self._compress(self._graph_data(data, format))
         async with self._crud_request(
-            "PUT", graph=graph, data=data, content_type=format
+            "PUT",
+            graph=graph,
+            data=data,
+            content_type=format,
+            content_encoding=encoding,
         ) as resp:
             resp.raise_for_status()
+        await self._invalidate_cache(graph)
 
     async def delete(self, graph: Optional[IRI] = None):
         async with self._crud_request("DELETE", graph=graph) as resp:
             resp.raise_for_status()
+        await self._invalidate_cache(graph)
 
     async def post(
-        self, data: Union[bytes, IOBase], *, format: str, graph: Optional[IRI] = None
+        self,
+        data: Union[bytes, IOBase, Triples, AsyncIterable],
+        *,
+        format: str,
+        graph: Optional[IRI] = None
     ):
+        """
+        The data can also be Triples or an async iterable of bytes or Triples
+        which is streamed to the server while it is produced. The Triples are
+        sent in Turtle (text/turtle) with the prefixes of the client or in
+        N-Triples (application/n-triples).
+        """
+        data, encoding = self._compress(self._graph_data(data, format))
         async with self._crud_request(
-            "POST", graph=graph, data=data, content_type=format
+            "POST",
+            graph=graph,
+            data=data,
+            content_type=format,
+            content_encoding=encoding,
         ) as resp:
             resp.raise_for_status()
+        await self._invalidate_cache(graph)
+
+    async def post_triples(
+        self,
+        triples: Union[Triples, Node, AsyncIterable],
+        *,
+        graph: Optional[IRI] = None,
+        format: str = "application/n-triples"
+    ):
+        """
+        Add triples to a graph with the CRUD endpoint. This is usually the
+        fastest way to load data in the store: N-Triples (the default) and
+        Turtle are cheaper to parse than a SPARQL update and they are not
+        form-URL-encoded. The triples can also be an async iterable of Triples
+        which are streamed to the server.
+        """
+        if isinstance(triples, Node):
+            triples = Triples([triples])
+        await self.post(triples, format=format, graph=graph)
 
     @property
     def closed(self):
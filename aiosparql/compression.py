@@ -0,0 +1,78 @@
+import asyncio
+import zlib
+from io import IOBase
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+__all__ = ["get_compressor", "compress", "compress_stream"]
+
+
+def _gzip_compressor():
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return compressor.compress, compressor.flush
+
+
+def _brotli_compressor():
+    compressor = brotli.Compressor()
+    return compressor.process, compressor.finish
+
+
+compressors = {"gzip": _gzip_compressor, "br": _brotli_compressor}
+
+
+def get_compressor(encoding: str):
+    """
+    Return the factory of the compressor of a content encoding (gzip or br).
+    A compressor is a tuple of functions (compress, finish).
+    """
+    try:
+        factory = compressors[encoding]
+    except KeyError:
+        raise ValueError("Unknown content encoding: %r" % encoding)
+    if encoding == "br" and brotli is None:
+        raise ValueError("The package brotli is required for the br encoding")
+    return factory
+
+
+def compress(encoding: str, data: bytes) -> bytes:
+    process, finish = get_compressor(encoding)()
+    return process(data) + finish()
+
+
+async def compress_stream(encoding: str, data, chunk_size: int = 65536):
+    """
+    Compress bytes, a file or an async iterable of bytes and yield the
+    compressed chunks. The compression and the reading of the file are done
+    in the thread pool of the loop, chunk_size bytes at a time, so the loop is
+    never blocked by a big payload.
+    """
+    loop = asyncio.get_event_loop()
+    process, finish = get_compressor(encoding)()
+    if isinstance(data, (bytes, bytearray)):
+        view = memoryview(data)
+        for i in range(0, len(view), chunk_size):
+            chunk = view[i : i + chunk_size]  # noqa
+            chunk = await loop.run_in_executor(None, process, chunk)
+            if chunk:
+                yield chunk
+    elif isinstance(data, IOBase):
+        while True:
+            chunk = await loop.run_in_executor(None, data.read, chunk_size)
+            if not chunk:
+                break
+            if isinstance(chunk, str):
+                chunk = chunk.encode("utf-8")
+            chunk = await loop.run_in_executor(None, process, chunk)
+            if chunk:
+                yield chunk
+    else:
+        async for chunk in data:
+            if isinstance(chunk, str):
+                chunk = chunk.encode("utf-8")
+            chunk = await loop.run_in_executor(None, process, chunk)
+            if chunk:
+                yield chunk
+    yield finish()
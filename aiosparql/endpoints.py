@@ -0,0 +1,198 @@
+import asyncio
+import time
+from typing import List
+
+import aiohttp
+
+__all__ = [
+    "EndpointPolicy",
+    "RoundRobinPolicy",
+    "LeastOutstandingPolicy",
+    "EWMAPolicy",
+    "endpoint_policies",
+]
+
+
+class EndpointStats:
+    __slots__ = (
+        "url",
+        "outstanding",
+        "requests",
+        "latency",
+        "failures",
+        "ejected_until",
+    )
+
+    def __init__(self, url):
+        self.url = url
+        self.outstanding = 0
+        self.requests = 0
+        self.latency = None
+        self.failures = 0
+        self.ejected_until = 0.0
+
+    def __repr__(self):
+        return "<EndpointStats %s outstanding=%d latency=%s failures=%d>" % (
+            self.url,
+            self.outstanding,
+            self.latency,
+            self.failures,
+        )
+
+
+class _Tracker:
+    """
+    A context manager that records a request to an endpoint: its duration
+    and whether the endpoint failed.
+    """
+
+    __slots__ = ("policy", "stats", "started")
+
+    def __init__(self, policy, stats):
+        self.policy = policy
+        self.stats = stats
+
+    def __enter__(self):
+        self.stats.outstanding += 1
+        self.stats.requests += 1
+        self.started = time.monotonic()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stats.outstanding -= 1
+        if exc_type is not None and issubclass(
+            exc_type, (asyncio.CancelledError, GeneratorExit)
+        ):
+            # NOTE: the request was interrupted, nothing is known about the
+            #       endpoint
+            return
+        failed = exc_type is not None and self.policy.is_failure(exc_val)
+        self.policy.finished(self.stats, time.monotonic() - self.started, failed)
+
+
+class EndpointPolicy:
+    """
+    Choose the endpoint of every query among the read endpoints of a client.
+    The subclasses implement choose() which receives the statistics of the
+    endpoints that are healthy.
+
+    The health is checked passively: an endpoint that fails max_failures
+    times in a row (connection error, timeout or 5xx status) is ejected for
+    ejection_time seconds. If all the endpoints are ejected, they are all
+    used anyway.
+    """
+
+    def __init__(
+        self,
+        endpoints: List[str],
+        *,
+        max_failures: int = 3,
+        ejection_time: float = 30.0
+    ):
+        if not endpoints:
+            raise ValueError("At least one endpoint is required")
+        self.stats = [EndpointStats(x) for x in endpoints]
+        self.max_failures = max_failures
+        self.ejection_time = ejection_time
+
+    @property
+    def endpoints(self) -> List[str]:
+        return [x.url for x in self.stats]
+
+    def healthy(self) -> List[EndpointStats]:
+        now = time.monotonic()
+        healthy = [x for x in self.stats if x.ejected_until <= now]
+        return healthy or self.stats
+
+    def select(self) -> EndpointStats:
+        if len(self.stats) == 1:
+            return self.stats[0]
+        return self.choose(self.healthy())
+
+    def choose(self, healthy: List[EndpointStats]) -> EndpointStats:
+        raise NotImplementedError
+
+    def track(self, stats: EndpointStats) -> _Tracker:
+        """
+        Return a context manager that records a request to an endpoint:
+
+        stats = policy.select()
+        with policy.track(stats):
+            ...
+        """
+        return _Tracker(self, stats)
+
+    def is_failure(self, exc: BaseException) -> bool:
+        if isinstance(exc, aiohttp.ClientResponseError):
+            return exc.status >= 500
+        return isinstance(exc, (aiohttp.ClientError, asyncio.TimeoutError))
+
+    def finished(self, stats: EndpointStats, latency: float, failed: bool) -> None:
+        if not failed:
+            stats.failures = 0
+            return
+        stats.failures += 1
+        if stats.failures >= self.max_failures:
+            stats.ejected_until = time.monotonic() + self.ejection_time
+            stats.failures = 0
+
+
+class RoundRobinPolicy(EndpointPolicy):
+    """
+    Use the endpoints one after the other.
+    """
+
+    def __init__(self, endpoints, **kwargs):
+        super().__init__(endpoints, **kwargs)
+        self._next = 0
+
+    def choose(self, healthy):
+        self._next += 1
+        return healthy[self._next % len(healthy)]
+
+
+class LeastOutstandingPolicy(EndpointPolicy):
+    """
+    Use the endpoint with the least requests running (the one with the least
+    requests sent in case of tie).
+    """
+
+    def choose(self, healthy):
+        return min(healthy, key=lambda x: (x.outstanding, x.requests))
+
+
+class EWMAPolicy(EndpointPolicy):
+    """
+    Use the endpoint with the lowest latency (an exponentially weighted moving
+    average of the durations of its requests) weighted by its number of
+    requests running. The endpoints without latency yet are used first.
+    """
+
+    def __init__(self, endpoints, *, decay: float = 0.3, **kwargs):
+        super().__init__(endpoints, **kwargs)
+        self.decay = decay
+
+    def choose(self, healthy):
+        return min(
+            healthy,
+            key=lambda x: (
+                (x.latency or 0.0) * (x.outstanding + 1),
+                x.outstanding,
+                x.requests,
+            ),
+        )
+
+    def finished(self, stats, latency, failed):
+        if not failed:
+            if stats.latency is None:
+                stats.latency = latency
+            else:
+                stats.latency += self.decay * (latency - stats.latency)
+        super().finished(stats, latency, failed)
+
+
+endpoint_policies = {
+    "round-robin": RoundRobinPolicy,
+    "least-outstanding": LeastOutstandingPolicy,
+    "ewma": EWMAPolicy,
+}
@@ -1,9 +1,12 @@
+import re
 from datetime import date, datetime, time
 from decimal import Decimal
 
 __all__ = [
     "escape_any",
+    "register_escaper",
     "escape_string",
+    "unescape_string",
     "escape_datetime",
     "escape_date",
     "escape_time",
@@ -31,29 +34,109 @@ def escape_any(value):
         true, which is the same as "true"^^xsd:boolean
         false, which is the same as "false"^^xsd:boolean
     """
-    if isinstance(value, type):
-        raise TypeError("object %r is not an instance" % value)
-    for type_, escape_method in escapers:
-        if isinstance(value, type_):
-            return escape_method(value)
+    try:
+        escape_method = _escapers_cache[type(value)]
+    except KeyError:
+        escape_method = _find_escaper(type(value))
+    return escape_method(value)
+
+
+def _escape_class(value):
+    raise TypeError("object %r is not an instance" % value)
+
+
+def _escape_other(value):
     return escape_string(str(value))
 
 
+def _find_escaper(cls):
+    """
+    Find the escape function of a type and keep it in cache. The first
+    matching type of escapers wins so the order of the list is respected (e.g.
+    bool must be before int).
+    """
+    if issubclass(cls, type):
+        escape_method = _escape_class
+    else:
+        for type_, escape_method in escapers:
+            if issubclass(cls, type_):
+                break
+        else:
+            escape_method = _escape_other
+    _escapers_cache[cls] = escape_method
+    return escape_method
+
+
+def register_escaper(type_, escape_method):
+    """
+    Register the function used by escape_any() to escape the instances of a
+    type (and its subclasses). It takes precedence over the existing ones.
+    """
+    escapers.insert(0, (type_, escape_method))
+
+
 _string_replacements = [
     # always replace first the \ to avoid doubling the future ones
     ("\\", "\\\\"),
     ('"', '\\"'),
     ("\n", "\\n"),
     ("\r", "\\r"),
+    ("\t", "\\t"),
+    ("\b", "\\b"),
+    ("\f", "\\f"),
 ]
 
 
 def escape_string(value):
+    """
+    Escape a string with the ECHAR escape sequences. The single quote does
+    not need to be escaped as the string is written between double quotes.
+
+    NOTE: str.replace() is much faster than str.translate() or re.sub() on
+          long strings, the string is only copied when it contains the
+          character to replace.
+    """
     for old, new in _string_replacements:
-        value = value.replace(old, new)
+        if old in value:
+            value = value.replace(old, new)
     return '"%s"' % value
 
 
+_re_escape_sequence = re.compile(r"\\(?:u([0-9A-Fa-f]{4})|U([0-9A-Fa-f]{8})|(.))", re.S)
+
+_echar_replacements = {
+    "t": "\t",
+    "b": "\b",
+    "n": "\n",
+    "r": "\r",
+    "f": "\f",
+    '"': '"',
+    "'": "'",
+    "\\": "\\",
+}
+
+
+def _unescape_sequence(match):
+    code = match.group(1) or match.group(2)
+    if code:
+        return chr(int(code, 16))
+    try:
+        return _echar_replacements[match.group(3)]
+    except KeyError:
+        raise ValueError("Invalid escape sequence: %r" % match.group(0))
+
+
+def unescape_string(value):
+    """
+    Decode the escape sequences (ECHAR and UCHAR) of the content of a string
+    literal (without the quotes).
+    https://www.w3.org/TR/2013/REC-sparql11-query-20130321/#grammarEscapes
+    """
+    if "\\" not in value:
+        return value
+    return _re_escape_sequence.sub(_unescape_sequence, value)
+
+
 def escape_datetime(value):
     return '"%s"^^xsd:dateTime' % value.isoformat()
 
@@ -78,12 +161,50 @@ def escape_float(value):
     return '"%s"^^xsd:double' % value
 
 
-escapers = [
-    (bool, escape_boolean),
-    (datetime, escape_datetime),
-    (date, escape_date),
-    (time, escape_time),
-    (float, escape_float),
-    (int, str),
-    (Decimal, str),
-]
+_escapers_cache = {}
+
+
+class _EscapersList(list):
+    """
+    The list of tuples (type, escape function) used by escape_any(). The
+    cache of escape_any() is cleared when it is modified.
+    """
+
+
+def _clearing_cache(method):
+    def wrapper(self, *args, **kwargs):
+        _escapers_cache.clear()
+        return method(self, *args, **kwargs)
+
+    wrapper.__name__ = method.__name__
+    return wrapper
+
+
+for _name in (
+    "__delitem__",
+    "__iadd__",
+    "__setitem__",
+    "append",
+    "clear",
+    "extend",
+    "insert",
+    "pop",
+    "remove",
+    "reverse",
+    "sort",
+):
+    setattr(_EscapersList, _name, _clearing_cache(getattr(list, _name)))
+del _name
+
+
+escapers = _EscapersList(
+    [
+        (bool, escape_boolean),
+        (datetime, escape_datetime),
+        (date, escape_date),
+        (time, escape_time),
+        (float, escape_float),
+        (int, str),
+        (Decimal, str),
+    ]
+)
@@ -0,0 +1,219 @@
+import asyncio
+import logging
+import time
+from typing import List, Optional
+
+import aiohttp
+
+__all__ = ["ClientHooks", "RequestTrace"]
+
+
+logger = logging.getLogger(__name__)
+
+
+class ClientHooks:
+    """
+    The hooks of SPARQLClient called at every step of a query or an update
+    with its RequestTrace. Subclass it and override the methods needed:
+
+     -  on_prepare: the query has been formatted (prepare_time)
+     -  on_request_start: an attempt starts (endpoint, attempt)
+     -  on_first_byte: the status and the headers of the response have been
+        received (status, first_byte, connection_wait, bytes_sent)
+     -  on_response_end: the body has been received (response_end,
+        bytes_received)
+     -  on_decode_end: the result has been decoded (decode_end), the attempt
+        is finished
+     -  on_request_error: the attempt failed (error)
+     -  on_request_cancel: the attempt was interrupted because the call was
+        cancelled or the caller stopped reading the result, it is not an
+        error
+
+    The hooks are called synchronously in the request path so they must be
+    fast, an exception raised by a hook is logged and ignored.
+    """
+
+    def on_prepare(self, trace: "RequestTrace") -> None:
+        pass
+
+    def on_request_start(self, trace: "RequestTrace") -> None:
+        pass
+
+    def on_first_byte(self, trace: "RequestTrace") -> None:
+        pass
+
+    def on_response_end(self, trace: "RequestTrace") -> None:
+        pass
+
+    def on_decode_end(self, trace: "RequestTrace") -> None:
+        pass
+
+    def on_request_error(self, trace: "RequestTrace") -> None:
+        pass
+
+    def on_request_cancel(self, trace: "RequestTrace") -> None:
+        pass
+
+
+class RequestTrace:
+    """
+    The timings of a call to query() or update(). template is the query
+    before formatting and query the query sent. The durations are in seconds
+    since the start of the attempt (started, time.monotonic()) and are
+    reset when the request is retried. context is a dict the hooks can use
+    to keep their state (e.g. a span).
+    """
+
+    __slots__ = (
+        "hooks",
+        "operation",
+        "template",
+        "query",
+        "prepare_time",
+        "endpoint",
+        "attempt",
+        "started",
+        "connection_wait",
+        "first_byte",
+        "response_end",
+        "decode_end",
+        "bytes_sent",
+        "bytes_received",
+        "status",
+        "error",
+        "context",
+        "_waiting",
+    )
+
+    def __init__(self, hooks: List[ClientHooks], operation: str, template: str):
+        self.hooks = hooks
+        self.operation = operation
+        self.template = template
+        self.query = None
+        self.prepare_time = None
+        self.endpoint = None
+        self.attempt = -1
+        self.context = {}
+        self._reset()
+
+    def _reset(self):
+        self.started = None
+        self.connection_wait = 0.0
+        self.first_byte = None
+        self.response_end = None
+        self.decode_end = None
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.status = None
+        self.error = None
+        self._waiting = None
+
+    def __repr__(self):
+        return "<RequestTrace %s %s attempt=%d status=%s>" % (
+            self.operation,
+            self.endpoint,
+            self.attempt,
+            self.status,
+        )
+
+    def emit(self, event: str) -> None:
+        for hook in self.hooks:
+            try:
+                getattr(hook, event)(self)
+            except Exception:
+                logger.exception("Hook %r failed on %s", hook, event)
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def attempt_to(self, endpoint: str) -> "RequestTrace":
+        """
+        Start a new attempt to the endpoint given, the trace is a context
+        manager that reports the errors of the attempt:
+
+        with trace.attempt_to(url):
+            ...
+        """
+        self._reset()
+        self.endpoint = endpoint
+        self.attempt += 1
+        return self
+
+    def __enter__(self):
+        self.started = time.monotonic()
+        self.emit("on_request_start")
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            return
+        if issubclass(exc_type, (asyncio.CancelledError, GeneratorExit)):
+            self.emit("on_request_cancel")
+        else:
+            self.error = exc_val
+            self.emit("on_request_error")
+
+    def received_headers(self, status: int) -> None:
+        self.status = status
+        self.first_byte = self.elapsed()
+        self.emit("on_first_byte")
+
+    def received_body(self, size: Optional[int] = None) -> None:
+        if size is not None:
+            self.bytes_received = size
+        self.response_end = self.elapsed()
+        self.emit("on_response_end")
+
+    def decoded(self) -> None:
+        self.decode_end = self.elapsed()
+        self.emit("on_decode_end")
+
+
+class _Untraced:
+    """
+    The context manager used in place of a trace when the client has no
+    hooks.
+    """
+
+    def __enter__(self):
+        return None
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return None
+
+
+untraced = _Untraced()
+
+
+async def _connection_wait_start(session, context, params):
+    trace = context.trace_request_ctx
+    if isinstance(trace, RequestTrace):
+        trace._waiting = time.monotonic()
+
+
+async def _connection_wait_end(session, context, params):
+    trace = context.trace_request_ctx
+    if isinstance(trace, RequestTrace) and trace._waiting is not None:
+        trace.connection_wait += time.monotonic() - trace._waiting
+        trace._waiting = None
+
+
+async def _request_chunk_sent(session, context, params):
+    trace = context.trace_request_ctx
+    if isinstance(trace, RequestTrace):
+        trace.bytes_sent += len(params.chunk)
+
+
+def trace_config() -> aiohttp.TraceConfig:
+    """
+    Return the aiohttp TraceConfig that records in the RequestTrace given as
+    trace_request_ctx the time spent waiting for a connection (from the pool
+    or a new one) and the number of bytes of the body sent.
+    """
+    config = aiohttp.TraceConfig()
+    config.on_connection_queued_start.append(_connection_wait_start)
+    config.on_connection_queued_end.append(_connection_wait_end)
+    config.on_connection_create_start.append(_connection_wait_start)
+    config.on_connection_create_end.append(_connection_wait_end)
+    config.on_request_chunk_sent.append(_request_chunk_sent)
+    return config
@@ -0,0 +1,173 @@
+from hashlib import sha1
+from typing import Optional
+
+from .hooks import ClientHooks, RequestTrace
+
+try:
+    from opentelemetry import trace as otel_trace
+    from opentelemetry.trace import SpanKind
+    from opentelemetry.trace.status import Status, StatusCode
+except ImportError:  # pragma: no cover
+    otel_trace = None
+
+try:
+    import prometheus_client
+except ImportError:  # pragma: no cover
+    prometheus_client = None
+
+__all__ = ["OpenTelemetryHooks", "PrometheusHooks", "template_label"]
+
+
+def template_label(template: Optional[str]) -> str:
+    """
+    Return a short label identifying a query template (the beginning of the
+    SHA-1 of the template) that can be used as a metric label.
+    """
+    if template is None:
+        return ""
+    return sha1(template.encode("utf-8")).hexdigest()[:12]
+
+
+class OpenTelemetryHooks(ClientHooks):
+    """
+    Create an OpenTelemetry span (kind CLIENT) for every attempt of the
+    queries and the updates with the events first_byte and response_end.
+    The statement is truncated to max_statement_length characters.
+
+    Requires the package opentelemetry-api.
+    """
+
+    def __init__(self, tracer=None, *, max_statement_length: int = 2048):
+        if otel_trace is None:
+            raise ValueError("The package opentelemetry-api is required")
+        self.tracer = tracer or otel_trace.get_tracer(__name__)
+        self.max_statement_length = max_statement_length
+
+    def on_request_start(self, trace: RequestTrace) -> None:
+        trace.context["opentelemetry.span"] = self.tracer.start_span(
+            "SPARQL %s" % trace.operation,
+            kind=SpanKind.CLIENT,
+            attributes={
+                "db.system": "sparql",
+                "db.operation": trace.operation,
+                "db.statement": (trace.query or "")[: self.max_statement_length],
+                "http.url": trace.endpoint,
+                "sparql.template": template_label(trace.template),
+                "sparql.attempt": trace.attempt,
+            },
+        )
+
+    def on_first_byte(self, trace: RequestTrace) -> None:
+        span = trace.context.get("opentelemetry.span")
+        if span is not None:
+            span.set_attribute("http.status_code", trace.status)
+            span.add_event(
+                "first_byte", {"sparql.connection_wait": trace.connection_wait}
+            )
+
+    def on_response_end(self, trace: RequestTrace) -> None:
+        span = trace.context.get("opentelemetry.span")
+        if span is not None:
+            span.add_event("response_end")
+
+    def on_decode_end(self, trace: RequestTrace) -> None:
+        self._end(trace)
+
+    def on_request_error(self, trace: RequestTrace) -> None:
+        span = trace.context.get("opentelemetry.span")
+        if span is not None:
+            span.record_exception(trace.error)
+            span.set_status(Status(StatusCode.ERROR, str(trace.error)))
+        self._end(trace)
+
+    def on_request_cancel(self, trace: RequestTrace) -> None:
+        span = trace.context.get("opentelemetry.span")
+        if span is not None:
+            span.set_attribute("sparql.cancelled", True)
+        self._end(trace)
+
+    def _end(self, trace):
+        span = trace.context.pop("opentelemetry.span", None)
+        if span is not None:
+            span.set_attribute("sparql.bytes_sent", trace.bytes_sent)
+            span.set_attribute("sparql.bytes_received", trace.bytes_received)
+            span.end()
+
+
+class PrometheusHooks(ClientHooks):
+    """
+    Record Prometheus histograms of the durations (formatting, waiting for a
+    connection, first byte, total) and of the size of the responses labelled
+    by endpoint, operation and template (see template_label()), and a
+    counter of the errors labelled by exception type.
+
+    Requires the package prometheus_client.
+    """
+
+    size_buckets = (1e2, 1e3, 1e4, 1e5, 1e6, 1e7, 1e8, float("inf"))
+
+    def __init__(self, *, registry=None, namespace: str = "aiosparql", buckets=None):
+        if prometheus_client is None:
+            raise ValueError("The package prometheus_client is required")
+        if registry is None:
+            registry = prometheus_client.REGISTRY
+        if buckets is None:
+            buckets = prometheus_client.Histogram.DEFAULT_BUCKETS
+        labels = ("endpoint", "operation", "template")
+
+        def histogram(name, documentation, labels=labels, buckets=buckets):
+            return prometheus_client.Histogram(
+                name,
+                documentation,
+                labels,
+                namespace=namespace,
+                registry=registry,
+                buckets=buckets,
+            )
+
+        self.prepare_duration = histogram(
+            "prepare_duration_seconds",
+            "Time spent formatting the queries",
+            labels=("operation", "template"),
+        )
+        self.connection_wait = histogram(
+            "connection_wait_seconds", "Time spent waiting for a connection"
+        )
+        self.first_byte = histogram(
+            "first_byte_seconds", "Time until the response headers are received"
+        )
+        self.request_duration = histogram(
+            "request_duration_seconds", "Duration of the requests (decoding included)"
+        )
+        self.response_size = histogram(
+            "response_size_bytes",
+            "Size of the response bodies",
+            buckets=self.size_buckets,
+        )
+        self.errors = prometheus_client.Counter(
+            "request_errors_total",
+            "Number of requests that failed",
+            labels + ("error",),
+            namespace=namespace,
+            registry=registry,
+        )
+
+    def on_prepare(self, trace: RequestTrace) -> None:
+        self.prepare_duration.labels(
+            trace.operation, template_label(trace.template)
+        ).observe(trace.prepare_time)
+
+    def on_decode_end(self, trace: RequestTrace) -> None:
+        labels = (trace.endpoint, trace.operation, template_label(trace.template))
+        self.connection_wait.labels(*labels).observe(trace.connection_wait)
+        self.first_byte.labels(*labels).observe(trace.first_byte)
+        self.request_duration.labels(*labels).observe(trace.decode_end)
+        self.response_size.labels(*labels).observe(trace.bytes_received)
+
+    def on_request_error(self, trace: RequestTrace) -> None:
+        self.errors.labels(
+            trace.endpoint,
+            trace.operation,
+            template_label(trace.template),
+            type(trace.error).__name__,
+        ).inc()
@@ -0,0 +1,194 @@
+import asyncio
+import time
+from collections import deque
+from typing import Optional
+
+import aiohttp
+
+__all__ = ["AIMDLimiter", "ConcurrencyLimitExceeded"]
+
+
+class ConcurrencyLimitExceeded(Exception):
+    """
+    Raised when a request cannot wait for the limiter because its queue is
+    full.
+    """
+
+
+class _Slot:
+    """
+    An asynchronous context manager that holds a slot of the limiter during a
+    request and gives it the duration of the request when it is released.
+    asyncio.TimeoutError is raised if the slot is not given within timeout
+    seconds (the request is not sent so it is not a drop).
+    """
+
+    __slots__ = ("limiter", "timeout", "started", "in_flight", "released")
+
+    def __init__(self, limiter, timeout=None):
+        self.limiter = limiter
+        self.timeout = timeout
+
+    async def __aenter__(self):
+        await self.limiter.acquire(self.timeout)
+        self.in_flight = self.limiter.in_flight
+        self.started = time.monotonic()
+        self.released = False
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        if self.released:
+            return
+        self.released = True
+        limiter = self.limiter
+        if exc_type is None:
+            limiter.release(time.monotonic() - self.started, False, self.in_flight)
+        elif limiter.is_drop(exc_val):
+            limiter.release(time.monotonic() - self.started, True, self.in_flight)
+        else:
+            # NOTE: the other errors (cancellation, 4xx, ...) say nothing
+            #       about the load of the database
+            limiter.release()
+
+    def release(self) -> None:
+        """
+        Release the slot before the end of the request (e.g. when the headers
+        of a streamed response are received), the duration is measured until
+        then.
+        """
+        if not self.released:
+            self.released = True
+            self.limiter.release(time.monotonic() - self.started, False, self.in_flight)
+
+
+class AIMDLimiter:
+    """
+    Limit the number of requests in flight to a limit that adapts to the
+    load of the database (additive increase, multiplicative decrease like
+    the AIMD limit of Netflix's concurrency-limits):
+
+     -  the limit grows by `increase` after every request that succeeded
+        while at least half of the limit was used
+     -  the limit is multiplied by backoff_ratio after every request that
+        was dropped (503, 429 or timeout) or slower than latency_threshold
+        seconds (if given)
+
+    The requests over the limit wait in a queue of at most max_queue
+    requests (unbounded if None), ConcurrencyLimitExceeded is raised when
+    the queue is full.
+
+    The attributes limit, in_flight, queue_depth, rejections and drops can be
+    read at any time, metrics() returns all of them in a dict.
+    """
+
+    def __init__(
+        self,
+        *,
+        initial_limit: int = 10,
+        min_limit: int = 1,
+        max_limit: int = 200,
+        increase: float = 1.0,
+        backoff_ratio: float = 0.9,
+        latency_threshold: Optional[float] = None,
+        max_queue: Optional[int] = None
+    ):
+        if not 1 <= min_limit <= initial_limit <= max_limit:
+            raise ValueError("min_limit <= initial_limit <= max_limit is required")
+        self._limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase = increase
+        self.backoff_ratio = backoff_ratio
+        self.latency_threshold = latency_threshold
+        self.max_queue = max_queue
+        self.in_flight = 0
+        self.rejections = 0
+        self.drops = 0
+        self._waiters = deque()
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    def metrics(self) -> dict:
+        return {
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "rejections": self.rejections,
+            "drops": self.drops,
+        }
+
+    def slot(self, timeout: Optional[float] = None) -> _Slot:
+        """
+        Return an asynchronous context manager that holds a slot during a
+        request, waiting at most timeout seconds for it (if given):
+
+        async with limiter.slot():
+            ...
+        """
+        return _Slot(self, timeout)
+
+    def is_drop(self, exc: BaseException) -> bool:
+        if isinstance(exc, aiohttp.ClientResponseError):
+            return exc.status in (429, 503)
+        return isinstance(exc, asyncio.TimeoutError)
+
+    async def acquire(self, timeout: Optional[float] = None) -> None:
+        """
+        Take a slot, waiting at most timeout seconds (if given) in the queue
+        before raising asyncio.TimeoutError.
+        """
+        if self.in_flight < self.limit and not self._waiters:
+            self.in_flight += 1
+            return
+        if self.max_queue is not None and len(self._waiters) >= self.max_queue:
+            self.rejections += 1
+            raise ConcurrencyLimitExceeded(
+                "%d requests in flight and %d waiting"
+                % (self.in_flight, len(self._waiters))
+            )
+        waiter = asyncio.get_event_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            if timeout is None:
+                await waiter
+            else:
+                await asyncio.wait_for(waiter, timeout)
+        except (asyncio.CancelledError, asyncio.TimeoutError):
+            if waiter.done() and not waiter.cancelled():
+                # NOTE: the slot was given just before the cancellation
+                self.release()
+            elif waiter in self._waiters:
+                self._waiters.remove(waiter)
+            raise
+
+    def release(
+        self,
+        latency: Optional[float] = None,
+        dropped: bool = False,
+        in_flight: int = 0,
+    ) -> None:
+        """
+        Release a slot and adapt the limit with the duration of the request
+        (None to leave the limit unchanged) and the number of requests that
+        were in flight when it was sent.
+        """
+        self.in_flight -= 1
+        if latency is not None:
+            if dropped or (
+                self.latency_threshold is not None and latency > self.latency_threshold
+            ):
+                self.drops += 1
+                self._limit = max(self.min_limit, self._limit * self.backoff_ratio)
+            elif in_flight * 2 >= self._limit:
+                self._limit = min(self.max_limit, self._limit + self.increase)
+        while self._waiters and self.in_flight < self.limit:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
@@ -0,0 +1,247 @@
+import codecs
+import re
+from datetime import date, datetime, time
+from decimal import Decimal
+
+from .escape import escape_string, unescape_string
+from .syntax import (
+    IRI,
+    BlankNode,
+    Literal,
+    Node,
+    PrefixedName,
+    RDFTerm,
+    UNDEF,
+    all_prefixes,
+)
+
+__all__ = ["NTriplesParser", "NTriplesSerializer", "to_ntriples"]
+
+XSD = "http://www.w3.org/2001/XMLSchema#"
+
+
+class NTriplesParser:
+    """
+    An incremental parser for the N-Triples format (application/n-triples):
+    https://www.w3.org/TR/n-triples/
+
+    Data is given chunk by chunk with feed() which returns the triples of the
+    lines that are complete as tuples (subject, predicate, object) of IRI,
+    BlankNode and Literal, example:
+
+    parser = NTriplesParser()
+    for chunk in chunks:
+        for s, p, o in parser.feed(chunk):
+            ...
+    parser.close()
+    """
+
+    re_triple = re.compile(
+        r"""
+        [ \t]*
+        (?:<(?P<s_iri>[^>]*)>|_:(?P<s_bnode>[^\s.]+(?:\.+[^\s.]+)*))
+        [ \t]*
+        <(?P<p_iri>[^>]*)>
+        [ \t]*
+        (?:
+            <(?P<o_iri>[^>]*)>
+            |_:(?P<o_bnode>[^\s.]+(?:\.+[^\s.]+)*)
+            |"(?P<literal>(?:[^"\\]|\\.)*)"
+                (?:@(?P<lang>[a-zA-Z]+(?:-[a-zA-Z0-9]+)*)|\^\^<(?P<datatype>[^>]*)>)?
+        )
+        [ \t]*\.[ \t]*(?:\#.*)?
+        """,
+        re.X,
+    )
+    re_empty = re.compile(r"[ \t]*(?:#.*)?")
+
+    def __init__(self):
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._line_number = 0
+
+    def feed(self, data):
+        """
+        Parse a chunk of bytes (or str) and return a list of the triples
+        decoded.
+        """
+        if isinstance(data, bytes):
+            data = self._decoder.decode(data)
+        self._buffer += data
+        end = self._buffer.rfind("\n")
+        if end == -1:
+            return []
+        lines, self._buffer = self._buffer[:end], self._buffer[end + 1 :]  # noqa
+        return self._parse_lines(lines)
+
+    def close(self):
+        """
+        Signal the end of the data and return the remaining triples.
+        """
+        lines = self._buffer + self._decoder.decode(b"", final=True)
+        self._buffer = ""
+        return self._parse_lines(lines)
+
+    def _parse_lines(self, lines):
+        triples = []
+        for line in lines.split("\n"):
+            self._line_number += 1
+            line = line.rstrip("\r")
+            match = self.re_triple.fullmatch(line)
+            if match is None:
+                if self.re_empty.fullmatch(line):
+                    continue
+                raise ValueError(
+                    "Invalid N-Triples at line %d: %r" % (self._line_number, line)
+                )
+            triples.append(self._triple(match))
+        return triples
+
+    def _iri(self, value):
+        if "\\" in value:
+            value = unescape_string(value)
+        return IRI(value)
+
+    def _triple(self, match):
+        if match.group("s_iri") is not None:
+            subject = self._iri(match.group("s_iri"))
+        else:
+            subject = BlankNode(match.group("s_bnode"))
+        predicate = self._iri(match.group("p_iri"))
+        if match.group("o_iri") is not None:
+            obj = self._iri(match.group("o_iri"))
+        elif match.group("o_bnode") is not None:
+            obj = BlankNode(match.group("o_bnode"))
+        else:
+            value = unescape_string(match.group("literal"))
+            if match.group("datatype") is not None:
+                obj = Literal(value, datatype=self._iri(match.group("datatype")))
+            else:
+                obj = Literal(value, match.group("lang"))
+        return subject, predicate, obj
+
+
+class NTriplesSerializer:
+    """
+    Write Triples (and Node) in the N-Triples format: every triple is on its
+    own line and the prefixed names are expanded to full IRIs.
+
+    The subjects and the predicates given as str are SPARQL syntax (like in
+    Triples): "<http://example.org>", "_:b0", "a" or a prefixed name which is
+    expanded with the prefixes given (mapping of prefix label to IRI, all the
+    namespaces defined by default). The objects given as str are literals.
+    """
+
+    re_prefixed_name = re.compile(r"([^\s:<>]*):([^\s<>]*)")
+
+    # NOTE: the order matters, bool is a subclass of int and datetime a
+    #       subclass of date
+    literal_datatypes = [
+        (bool, lambda x: "true" if x else "false", XSD + "boolean"),
+        (int, str, XSD + "integer"),
+        (float, str, XSD + "double"),
+        (Decimal, str, XSD + "decimal"),
+        (datetime, datetime.isoformat, XSD + "dateTime"),
+        (date, date.isoformat, XSD + "date"),
+        (time, time.isoformat, XSD + "time"),
+    ]
+
+    def __init__(self, prefixes=None):
+        if prefixes is None:
+            prefixes = {label: ns.__iri__ for label, ns in all_prefixes.items()}
+        self.prefixes = {
+            label: iri.value if isinstance(iri, IRI) else str(iri)
+            for label, iri in prefixes.items()
+        }
+        self._texts = {}
+
+    def serialize(self, triples) -> str:
+        """
+        Return the N-Triples document of a Triples or a Node.
+        """
+        return "".join(self.lines(triples))
+
+    def lines(self, triples):
+        """
+        Yield the lines of the N-Triples document of a Triples or a Node.
+        """
+        if isinstance(triples, Node):
+            triples = [triples]
+        for item in triples:
+            if isinstance(item, Node):
+                yield from self._node_lines(item)
+                continue
+            s, p, o = item
+            if o is None:
+                continue
+            yield "%s %s %s .\n" % (self.term(s), self.term(p), self.object(o))
+            if isinstance(o, Node):
+                yield from self._node_lines(o)
+
+    def _node_lines(self, node):
+        s = self.term(node.subject)
+        for p, o in node:
+            yield "%s %s %s .\n" % (s, self.term(p), self.object(o))
+            if isinstance(o, Node):
+                yield from self._node_lines(o)
+
+    def term(self, value) -> str:
+        """
+        Return the N-Triples text of a subject or a predicate.
+        """
+        if isinstance(value, IRI):
+            return value.ref
+        elif isinstance(value, PrefixedName):
+            return value.iri().ref
+        elif isinstance(value, BlankNode):
+            return str(value)
+        elif isinstance(value, Node):
+            return self.term(value.subject)
+        elif isinstance(value, str):
+            try:
+                return self._texts[value]
+            except KeyError:
+                text = self._texts[value] = self._parse_term(value)
+                return text
+        elif isinstance(value, RDFTerm) and not isinstance(value, (Literal, UNDEF)):
+            return self._parse_term(str(value))
+        raise ValueError("%r cannot be written in N-Triples" % (value,))
+
+    def _parse_term(self, text):
+        if text.startswith("<") and text.endswith(">") or text.startswith("_:"):
+            return text
+        elif text == "a":
+            return "<http://www.w3.org/1999/02/22-rdf-syntax-ns#type>"
+        match = self.re_prefixed_name.fullmatch(text)
+        if match and match.group(1) in self.prefixes:
+            return IRI(self.prefixes[match.group(1)] + match.group(2)).ref
+        raise ValueError("%r cannot be written in N-Triples" % text)
+
+    def object(self, value) -> str:
+        """
+        Return the N-Triples text of an object.
+        """
+        if isinstance(value, str):
+            return escape_string(value)
+        elif isinstance(value, Literal):
+            text = escape_string(value.value)
+            if value.datatype is not None:
+                return "%s^^%s" % (text, self.term(value.datatype))
+            elif value.lang is not None:
+                return "%s@%s" % (text, value.lang)
+            return text
+        elif isinstance(value, (IRI, PrefixedName, BlankNode, Node)):
+            return self.term(value)
+        for type_, to_text, datatype in self.literal_datatypes:
+            if isinstance(value, type_):
+                return "%s^^<%s>" % (escape_string(to_text(value)), datatype)
+        if isinstance(value, RDFTerm):
+            return self.term(value)
+        return escape_string(str(value))
+
+
+def to_ntriples(triples, prefixes=None) -> str:
+    """
+    Return the N-Triples document of a Triples or a Node.
+    """
+    return NTriplesSerializer(prefixes).serialize(triples)
@@ -0,0 +1,695 @@
+import codecs
+import csv
+import io
+import json
+import re
+import sys
+from array import array
+from collections.abc import Mapping
+
+from .escape import unescape_string
+from .syntax import IRI, BlankNode, Literal, RDFTerm
+
+__all__ = [
+    "JSONResultsParser",
+    "TSVResultsParser",
+    "CSVResultsParser",
+    "ResultSet",
+    "ResultRow",
+    "result_formats",
+]
+
+
+class JSONResultsParser:
+    """
+    An incremental parser for the SPARQL 1.1 Query Results JSON Format
+    (application/sparql-results+json):
+    https://www.w3.org/TR/sparql11-results-json/
+
+    Data is given chunk by chunk with feed() which returns the bindings that
+    could be completely decoded so far. Only one binding at a time is kept in
+    memory, everything before it is discarded, example:
+
+    parser = JSONResultsParser()
+    for chunk in chunks:
+        for binding in parser.feed(chunk):
+            ...
+    parser.close()
+    parser.vars  # ["s", "p", "o"]
+    """
+
+    re_whitespace = re.compile(r"[ \t\n\r]*")
+    decoder = json.JSONDecoder()
+
+    def __init__(self):
+        self.head = None
+        self.boolean = None
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._pos = 0
+        # position from which the next attempt to decode a value is worth it
+        self._retry_from = 0
+        self._state = self._parse_start
+        self._bindings = []
+        self._first = True
+        self._key = None
+        self._eof = False
+
+    @property
+    def vars(self):
+        if self.head is None:
+            return None
+        return self.head.get("vars", [])
+
+    @property
+    def done(self):
+        return self._state is None
+
+    def feed(self, data):
+        """
+        Parse a chunk of bytes (or str) and return a list of the bindings
+        decoded.
+        """
+        if isinstance(data, bytes):
+            data = self._decoder.decode(data)
+        if self._pos:
+            self._buffer = self._buffer[self._pos :]  # noqa
+            self._retry_from = max(self._retry_from - self._pos, 0)
+            self._pos = 0
+        self._buffer += data
+        while self._state is not None and self._state():
+            pass
+        bindings, self._bindings = self._bindings, []
+        return bindings
+
+    def close(self):
+        """
+        Signal the end of the data and return the remaining bindings. A
+        ValueError is raised if the document is truncated.
+        """
+        self._eof = True
+        bindings = self.feed(self._decoder.decode(b"", final=True))
+        if self._state is not None:
+            raise ValueError(
+                "Truncated SPARQL JSON results at: %r"
+                % self._buffer[self._pos : self._pos + 40]  # noqa
+            )
+        return bindings
+
+    def _skip_whitespace(self):
+        self._pos = self.re_whitespace.match(self._buffer, self._pos).end()
+        return self._pos < len(self._buffer)
+
+    def _expect(self, chars):
+        """
+        Consume the next non-whitespace character if it is part of chars.
+        Return the character consumed, None if more data is needed.
+        """
+        if not self._skip_whitespace():
+            return None
+        char = self._buffer[self._pos]
+        if char not in chars:
+            raise ValueError(
+                "Invalid SPARQL JSON results: expected %r at %r"
+                % (chars, self._buffer[self._pos : self._pos + 40])  # noqa
+            )
+        self._pos += 1
+        return char
+
+    def _decode_value(self, pos):
+        """
+        Decode a complete JSON value starting at pos. Return a tuple
+        (value, end) or None if more data is needed.
+        """
+        if not self._eof and len(self._buffer) <= self._retry_from:
+            return None
+        try:
+            value, end = self.decoder.raw_decode(self._buffer, pos)
+        except json.JSONDecodeError:
+            if self._eof:
+                raise
+            self._retry_from = len(self._buffer)
+            return None
+        # NOTE: a number at the end of the buffer might be cut in two
+        if end == len(self._buffer) and not self._eof and type(value) in (int, float):
+            self._retry_from = len(self._buffer)
+            return None
+        self._retry_from = 0
+        return value, end
+
+    def _decode_key(self):
+        """
+        Decode '"key":' and return the key, None if more data is needed.
+        """
+        if not self._skip_whitespace():
+            return None
+        if self._buffer[self._pos] != '"':
+            raise ValueError(
+                "Invalid SPARQL JSON results: expected a key at %r"
+                % self._buffer[self._pos : self._pos + 40]  # noqa
+            )
+        decoded = self._decode_value(self._pos)
+        if decoded is None:
+            return None
+        key, end = decoded
+        end = self.re_whitespace.match(self._buffer, end).end()
+        if end == len(self._buffer):
+            return None
+        if self._buffer[end] != ":":
+            raise ValueError("Invalid SPARQL JSON results: expected ':'")
+        self._pos = end + 1
+        return key
+
+    def _parse_start(self):
+        if self._expect("{") is None:
+            return False
+        self._state = self._parse_top_key
+        self._first = True
+        return True
+
+    def _parse_top_key(self):
+        if not self._skip_whitespace():
+            return False
+        if self._buffer[self._pos] == "}":
+            self._pos += 1
+            self._state = None
+            return True
+        pos = self._pos
+        if not self._first and self._expect(",") is None:
+            return False
+        key = self._decode_key()
+        if key is None:
+            self._pos = pos
+            return False
+        self._first = False
+        if key == "results":
+            self._state = self._parse_results_start
+        else:
+            self._key = key
+            self._state = self._parse_top_value
+        return True
+
+    def _parse_top_value(self):
+        if not self._skip_whitespace():
+            return False
+        decoded = self._decode_value(self._pos)
+        if decoded is None:
+            return False
+        value, self._pos = decoded
+        if self._key == "head":
+            self.head = value
+        elif self._key == "boolean":
+            self.boolean = value
+        self._state = self._parse_top_key
+        return True
+
+    def _parse_results_start(self):
+        if self._expect("{") is None:
+            return False
+        self._state = self._parse_results_key
+        self._first = True
+        return True
+
+    def _parse_results_key(self):
+        if not self._skip_whitespace():
+            return False
+        if self._buffer[self._pos] == "}":
+            self._pos += 1
+            self._state = self._parse_top_key
+            self._first = False
+            return True
+        pos = self._pos
+        if not self._first and self._expect(",") is None:
+            return False
+        key = self._decode_key()
+        if key is None:
+            self._pos = pos
+            return False
+        self._first = False
+        if key == "bindings":
+            self._state = self._parse_bindings_start
+        else:
+            self._state = self._parse_results_value
+        return True
+
+    def _parse_results_value(self):
+        if not self._skip_whitespace():
+            return False
+        decoded = self._decode_value(self._pos)
+        if decoded is None:
+            return False
+        _, self._pos = decoded
+        self._state = self._parse_results_key
+        return True
+
+    def _parse_bindings_start(self):
+        if self._expect("[") is None:
+            return False
+        self._state = self._parse_binding
+        self._first = True
+        return True
+
+    def _parse_binding(self):
+        if not self._skip_whitespace():
+            return False
+        if self._buffer[self._pos] == "]":
+            self._pos += 1
+            self._state = self._parse_results_key
+            self._first = False
+            return True
+        pos = self._pos
+        if not self._first and self._expect(",") is None:
+            return False
+        if not self._skip_whitespace():
+            self._pos = pos
+            return False
+        decoded = self._decode_value(self._pos)
+        if decoded is None:
+            self._pos = pos
+            return False
+        binding, self._pos = decoded
+        self._first = False
+        self._bindings.append(binding)
+        return True
+
+
+class LineResultsParser:
+    """
+    Base class of the incremental parsers of the line oriented results
+    formats. It has the same interface than JSONResultsParser and produces
+    the same bindings than the ones of the JSON format.
+    """
+
+    def __init__(self):
+        self.head = None
+        self.boolean = None
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._done = False
+
+    @property
+    def vars(self):
+        if self.head is None:
+            return None
+        return self.head["vars"]
+
+    @property
+    def done(self):
+        return self._done
+
+    def feed(self, data):
+        if isinstance(data, bytes):
+            data = self._decoder.decode(data)
+        self._buffer += data
+        end = self._records_end()
+        if end == -1:
+            return []
+        records, self._buffer = self._buffer[:end], self._buffer[end:]
+        return self._parse_records(records)
+
+    def close(self):
+        self._buffer += self._decoder.decode(b"", final=True)
+        records, self._buffer = self._buffer, ""
+        bindings = self._parse_records(records) if records else []
+        self._done = True
+        return bindings
+
+    def _records_end(self):
+        """
+        Return the position of the end of the last complete record in the
+        buffer, -1 if there is none.
+        """
+        end = self._buffer.rfind("\n")
+        return end if end == -1 else end + 1
+
+    def _parse_records(self, records):
+        raise NotImplementedError()
+
+
+class TSVResultsParser(LineResultsParser):
+    """
+    An incremental parser for the SPARQL 1.1 Query Results TSV Format
+    (text/tab-separated-values):
+    https://www.w3.org/TR/sparql11-results-csv-tsv/
+
+    The terms are written using the Turtle syntax so the results are as
+    precise as the JSON ones.
+    """
+
+    re_term = re.compile(
+        r"""
+        <(?P<iri>[^>]*)>
+        |_:(?P<bnode>.+)
+        |(?P<quote>["'])(?P<literal>(?:[^"'\\]|\\.|(?!(?P=quote))["'])*)(?P=quote)
+            (?:@(?P<lang>[A-Za-z0-9-]+)|\^\^<(?P<datatype>[^>]*)>)?
+        |(?P<boolean>true|false)
+        |(?P<integer>[+-]?[0-9]+)
+        |(?P<decimal>[+-]?[0-9]*\.[0-9]+)
+        |(?P<double>[+-]?(?:[0-9]+\.?[0-9]*|\.[0-9]+)[eE][+-]?[0-9]+)
+        """,
+        re.X,
+    )
+    xsd = "http://www.w3.org/2001/XMLSchema#"
+
+    def _parse_records(self, records):
+        lines = records.split("\n")
+        if lines[-1] == "":
+            lines.pop()
+        if self.head is None and lines:
+            self.head = {
+                "vars": [x.strip()[1:] for x in lines.pop(0).rstrip("\r").split("\t")]
+            }
+        vars = self.vars
+        bindings = []
+        for line in lines:
+            binding = {}
+            for var, value in zip(vars, line.rstrip("\r").split("\t")):
+                if value:
+                    binding[var] = self._parse_term(value)
+            bindings.append(binding)
+        return bindings
+
+    def _parse_term(self, value):
+        value = value.strip()
+        match = self.re_term.fullmatch(value)
+        if match is None:
+            raise ValueError("Invalid term in SPARQL TSV results: %r" % value)
+        kind = match.lastgroup
+        if kind == "iri":
+            return {"type": "uri", "value": match.group("iri")}
+        elif kind == "bnode":
+            return {"type": "bnode", "value": match.group("bnode")}
+        elif match.group("quote"):
+            term = {"type": "literal", "value": unescape_string(match.group("literal"))}
+            if match.group("lang"):
+                term["xml:lang"] = match.group("lang")
+            elif match.group("datatype"):
+                term["datatype"] = match.group("datatype")
+            return term
+        else:
+            return {"type": "literal", "value": value, "datatype": self.xsd + kind}
+
+
+class CSVResultsParser(LineResultsParser):
+    """
+    An incremental parser for the SPARQL 1.1 Query Results CSV Format
+    (text/csv):
+    https://www.w3.org/TR/sparql11-results-csv-tsv/
+
+    This format is lossy: the IRIs can not be distinguished from the
+    literals, they are both returned as literals without datatype nor
+    language. Only the blank nodes are recognized.
+    """
+
+    def __init__(self):
+        super(CSVResultsParser, self).__init__()
+        # position in the buffer up to which the quotes have been counted
+        self._scanned = 0
+        self._in_quotes = False
+
+    def _records_end(self):
+        # NOTE: a newline inside a quoted value does not end a record
+        end = -1
+        pos = self._scanned
+        newline = self._buffer.find("\n", pos)
+        while newline != -1:
+            if self._buffer.count('"', pos, newline) % 2:
+                self._in_quotes = not self._in_quotes
+            pos = newline + 1
+            if not self._in_quotes:
+                end = pos
+            newline = self._buffer.find("\n", pos)
+        self._scanned = pos if end == -1 else pos - end
+        return end
+
+    def _parse_records(self, records):
+        # NOTE: str.splitlines() would also split on the other line
+        #       boundaries (U+2028, \x0c, ...) which are not quoted in CSV
+        rows = csv.reader(io.StringIO(records, newline=""))
+        if self.head is None:
+            header = next(rows, None)
+            if header is None:
+                return []
+            self.head = {"vars": header}
+        vars = self.vars
+        bindings = []
+        for row in rows:
+            binding = {}
+            for var, value in zip(vars, row):
+                if not value:
+                    continue
+                if value.startswith("_:"):
+                    binding[var] = {"type": "bnode", "value": value[2:]}
+                else:
+                    binding[var] = {"type": "literal", "value": value}
+            bindings.append(binding)
+        return bindings
+
+
+# NOTE: the name of the result formats with their content type and parser
+result_formats = {
+    "json": ("application/sparql-results+json", JSONResultsParser),
+    "tsv": ("text/tab-separated-values", TSVResultsParser),
+    "csv": ("text/csv", CSVResultsParser),
+}
+
+# NOTE: every cell of a ResultSet is stored as an index in this list of
+#       (term type, annotation key) so it costs one byte instead of a dict
+_cell_kinds = [
+    (None, None),
+    ("uri", None),
+    ("literal", None),
+    ("literal", "xml:lang"),
+    ("literal", "datatype"),
+    ("bnode", None),
+    ("typed-literal", "datatype"),
+]
+_cell_kinds_index = {kind: i for i, kind in enumerate(_cell_kinds)}
+UNBOUND = 0
+
+
+def _cell_kind(term):
+    type_ = term["type"]
+    if "xml:lang" in term:
+        key = (type_, "xml:lang")
+    elif "datatype" in term:
+        key = (type_, "datatype")
+    else:
+        key = (type_, None)
+    try:
+        return _cell_kinds_index[key]
+    except KeyError:
+        if len(_cell_kinds) > 255:
+            raise ValueError("Too many term types: %r" % key)
+        _cell_kinds.append((sys.intern(type_), key[1]))
+        _cell_kinds_index[key] = len(_cell_kinds) - 1
+        return _cell_kinds_index[key]
+
+
+def _to_term(kind, value, annotation):
+    type_, key = _cell_kinds[kind]
+    if type_ is None:
+        return None
+    elif type_ == "uri":
+        return IRI(value)
+    elif type_ == "bnode":
+        return BlankNode(value)
+    elif type_ in ("literal", "typed-literal"):
+        if key == "xml:lang":
+            return Literal(value, annotation)
+        elif key == "datatype":
+            return Literal(value, datatype=IRI(annotation))
+        else:
+            return Literal(value)
+    else:
+        return RDFTerm(value)
+
+
+def _to_dict(kind, value, annotation):
+    type_, key = _cell_kinds[kind]
+    if type_ is None:
+        return None
+    term = {"type": type_, "value": value}
+    if key is not None:
+        term[key] = annotation
+    return term
+
+
+class _Column:
+    __slots__ = ("kinds", "values", "annotations")
+
+    def __init__(self, size=0):
+        self.kinds = array("B", bytes(size))
+        self.values = [None] * size
+        # NOTE: only created when a term with a language or a datatype is
+        #       added to the column
+        self.annotations = None
+
+    def append(self, term):
+        if term is None:
+            self.kinds.append(UNBOUND)
+            self.values.append(None)
+            if self.annotations is not None:
+                self.annotations.append(None)
+            return
+        kind = _cell_kind(term)
+        key = _cell_kinds[kind][1]
+        self.kinds.append(kind)
+        self.values.append(term["value"])
+        if key is not None:
+            if self.annotations is None:
+                self.annotations = [None] * (len(self.values) - 1)
+            self.annotations.append(sys.intern(term[key]))
+        elif self.annotations is not None:
+            self.annotations.append(None)
+
+    def annotation(self, index):
+        if self.annotations is None:
+            return None
+        return self.annotations[index]
+
+    def term(self, index):
+        return _to_term(self.kinds[index], self.values[index], self.annotation(index))
+
+    def to_dict(self, index):
+        return _to_dict(self.kinds[index], self.values[index], self.annotation(index))
+
+
+class ResultSet:
+    """
+    A compact, column oriented, storage of the bindings of a SPARQL SELECT
+    query.
+
+    The terms are stored as plain strings in one list per variable and only
+    converted to IRI, Literal or BlankNode when they are accessed:
+
+    result_set = ResultSet.from_json(await client.query(...))
+    result_set[0]["s"]  # IRI of the variable s in the first row
+    result_set.column("s")  # list of the values of s
+    result_set.to_dicts()  # bindings as they are in the JSON result
+    """
+
+    __slots__ = ("vars", "boolean", "_columns", "_size")
+
+    def __init__(self, vars=(), bindings=()):
+        self.vars = []
+        self.boolean = None
+        self._columns = {}
+        self._size = 0
+        self.add_vars(vars)
+        self.extend(bindings)
+
+    @classmethod
+    def from_json(cls, data):
+        """
+        Create a ResultSet from a decoded SPARQL JSON result.
+        """
+        result_set = cls(
+            data.get("head", {}).get("vars", []),
+            data.get("results", {}).get("bindings", []),
+        )
+        result_set.boolean = data.get("boolean")
+        return result_set
+
+    def add_vars(self, vars):
+        """
+        Add the variables that are not yet in the ResultSet, they are unbound
+        in the existing rows.
+        """
+        for var in vars:
+            if var not in self._columns:
+                var = sys.intern(var)
+                self.vars.append(var)
+                self._columns[var] = _Column(self._size)
+
+    def append(self, binding):
+        for var in binding:
+            if var not in self._columns:
+                self.add_vars(binding)
+                break
+        for var, column in self._columns.items():
+            column.append(binding.get(var))
+        self._size += 1
+
+    def extend(self, bindings):
+        for binding in bindings:
+            self.append(binding)
+
+    def __len__(self):
+        return self._size
+
+    def __iter__(self):
+        for index in range(self._size):
+            yield ResultRow(self, index)
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return self.column(key)
+        return self.row(key)
+
+    def __repr__(self):
+        return "<ResultSet vars=%r rows=%d>" % (self.vars, self._size)
+
+    def row(self, index):
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("ResultSet index out of range")
+        return ResultRow(self, index)
+
+    def column(self, var):
+        """
+        Return the list of the terms of a variable (None when not bound).
+        """
+        column = self._columns[var]
+        return [column.term(index) for index in range(self._size)]
+
+    def values(self, var):
+        """
+        Return the list of the raw string values of a variable (None when not
+        bound) without converting them to RDF terms.
+        """
+        return list(self._columns[var].values)
+
+    def to_dicts(self):
+        """
+        Return the bindings as they are in the SPARQL JSON result.
+        """
+        return [row.to_dict() for row in self]
+
+
+class ResultRow(Mapping):
+    """
+    A read-only mapping variable -> RDF term of a row of a ResultSet. Unbound
+    variables are not part of the mapping.
+    """
+
+    __slots__ = ("_result_set", "_index")
+
+    def __init__(self, result_set, index):
+        self._result_set = result_set
+        self._index = index
+
+    def __getitem__(self, var):
+        column = self._result_set._columns[var]
+        if column.kinds[self._index] == UNBOUND:
+            raise KeyError(var)
+        return column.term(self._index)
+
+    def __iter__(self):
+        for var, column in self._result_set._columns.items():
+            if column.kinds[self._index] != UNBOUND:
+                yield var
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return "<ResultRow %r>" % dict(self)
+
+    def to_dict(self):
+        return {
+            var: column.to_dict(self._index)
+            for var, column in self._result_set._columns.items()
+            if column.kinds[self._index] != UNBOUND
+        }
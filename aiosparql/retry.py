@@ -0,0 +1,179 @@
+import asyncio
+import logging
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+import aiohttp
+
+__all__ = ["RetryBudget", "RetryPolicy"]
+
+
+logger = logging.getLogger(__name__)
+
+
+class RetryBudget:
+    """
+    A token bucket that limits the number of retries so they cannot multiply
+    the load of a database that is already overloaded: every retry takes a
+    token, every request sent adds `ratio` token and `min_rate` tokens are
+    added every second. The bucket holds at most `capacity` tokens.
+
+    With the default values, the retries are at most 20% of the requests
+    (plus 1 retry per second) once the bucket is empty.
+    """
+
+    def __init__(
+        self, *, capacity: float = 10.0, ratio: float = 0.2, min_rate: float = 1.0
+    ):
+        self.capacity = capacity
+        self.ratio = ratio
+        self.min_rate = min_rate
+        self.tokens = capacity
+        self.exhausted = 0
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self._updated) * self.min_rate
+        )
+        self._updated = now
+
+    def deposit(self) -> None:
+        """
+        Record a request sent (not a retry).
+        """
+        self.tokens = min(self.capacity, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        """
+        Take a token for a retry, return False if there is none left.
+        """
+        self._refill()
+        if self.tokens < 1.0:
+            self.exhausted += 1
+            return False
+        self.tokens -= 1.0
+        return True
+
+
+class RetryPolicy:
+    """
+    Retry the requests that failed because of a server error (5xx or 429), a
+    connection error or a timeout up to `retries` times.
+
+    The delay before a retry is chosen at random between 0 and backoff
+    seconds, twice more at every attempt up to max_backoff ("full jitter").
+    If the server sends a Retry-After header, its delay is used instead
+    unless it is longer than max_retry_after in which case the request is not
+    retried.
+
+    Only the queries are retried unless retry_updates is set (an update that
+    failed may have been applied). Every retry takes a token from the budget
+    (a RetryBudget shared by all the clients using the policy, None for no
+    budget). A request is not retried after its deadline (the time of the
+    event loop at which it times out, if any).
+    """
+
+    _default_budget = object()
+
+    def __init__(
+        self,
+        retries: int = 2,
+        *,
+        backoff: float = 0.1,
+        max_backoff: float = 10.0,
+        max_retry_after: float = 60.0,
+        retry_updates: bool = False,
+        budget: Optional[RetryBudget] = _default_budget
+    ):
+        if budget is self._default_budget:
+            budget = RetryBudget()
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.max_retry_after = max_retry_after
+        self.retry_updates = retry_updates
+        self.budget = budget
+
+    def is_retryable(self, exc: BaseException) -> bool:
+        if isinstance(exc, aiohttp.ClientResponseError):
+            return exc.status >= 500 or exc.status == 429
+        return isinstance(exc, (aiohttp.ClientError, asyncio.TimeoutError))
+
+    def retry_after(self, exc: BaseException) -> Optional[float]:
+        """
+        Return the delay in seconds of the Retry-After header of the response
+        (None if there is none or if it is invalid).
+        """
+        headers = getattr(exc, "headers", None)
+        value = headers.get("Retry-After") if headers else None
+        if not value:
+            return None
+        value = value.strip()
+        if value.isdigit():
+            return float(value)
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError, IndexError):
+            return None
+
+    def started(self) -> None:
+        """
+        Record a request sent for the first time.
+        """
+        if self.budget is not None:
+            self.budget.deposit()
+
+    def delay(
+        self, attempt: int, exc: BaseException, deadline: Optional[float] = None
+    ) -> Optional[float]:
+        """
+        Return the delay before retrying a request that failed with exc at
+        the attempt given (starting from 0) or None if it must not be
+        retried. The delay is shortened to the time left before the
+        deadline.
+        """
+        if attempt >= self.retries or not self.is_retryable(exc):
+            return None
+        left = None
+        if deadline is not None:
+            left = deadline - asyncio.get_event_loop().time()
+            if left <= 0:
+                return None
+        delay = self.retry_after(exc)
+        if delay is None:
+            delay = random.uniform(
+                0, min(self.max_backoff, self.backoff * 2**attempt)
+            )
+            if left is not None:
+                delay = min(delay, left)
+        elif delay > self.max_retry_after or (left is not None and delay >= left):
+            return None
+        if self.budget is not None and not self.budget.withdraw():
+            logger.debug("Retry budget exhausted, not retrying (%s)", exc)
+            return None
+        return delay
+
+    async def run(self, call, *args, deadline: Optional[float] = None, **kwargs):
+        """
+        Call the coroutine function call with the arguments given and call it
+        again if it fails and it can be retried before the deadline (which
+        is not given to call).
+        """
+        self.started()
+        attempt = 0
+        while True:
+            try:
+                return await call(*args, **kwargs)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                delay = self.delay(attempt, exc, deadline)
+                if delay is None:
+                    raise
+                logger.debug("Request failed (%s), retrying in %.2fs", exc, delay)
+            await asyncio.sleep(delay)
+            attempt += 1
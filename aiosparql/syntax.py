@@ -1,8 +1,10 @@
+import io
 import re
+import weakref
 from itertools import groupby
 from textwrap import indent
 
-from .escape import escape_any, escape_string, escapers
+from .escape import _escapers_cache, escape_any, escape_string, escapers
 
 __all__ = [
     "RDFTerm",
@@ -11,6 +13,7 @@ __all__ = [
     "PrefixedName",
     "IRI",
     "Literal",
+    "BlankNode",
     "UNDEF",
     "Namespace",
     "RDF",
@@ -23,6 +26,8 @@ class RDFTerm:
     valid RDF term (i.e. that can be used in a SPARQL query).
     """
 
+    __slots__ = ("value",)
+
     def __init__(self, value):
         self.value = value
 
@@ -78,6 +83,11 @@ class Node(list):
     def _group_key(self, x):
         return (str(x[0]), str(x[1]))
 
+    def _count_triples(self):
+        return sum(
+            1 + (o._count_triples() if isinstance(o, Node) else 0) for _, o in self
+        )
+
     def __iter__(self):
         for p, o in sorted(super().__iter__(), key=self._group_key):
             if o is None:
@@ -117,36 +127,135 @@ class Triples(list):
         ), "tuples must be of length 3"
         return super(Triples, self).extend(value)
 
+    @classmethod
+    def from_columns(cls, subjects, predicates, objects):
+        """
+        Build the triples from 3 sequences of the same length: the subjects,
+        the predicates and the objects.
+        """
+        if not len(subjects) == len(predicates) == len(objects):
+            raise ValueError("the columns must have the same length")
+        triples = cls()
+        # NOTE: the tuples made by zip() are always valid, no need to check
+        #       them in Triples.extend()
+        list.extend(triples, zip(subjects, predicates, objects))
+        return triples
+
     def __str__(self):
-        return "".join(self._output_triples())
+        buffer = io.StringIO()
+        self.serialize_into(buffer)
+        return buffer.getvalue()
+
+    def serialize_into(self, buffer, flush_size=4096):
+        """
+        Write the same text than str() to a buffer (any object with a write()
+        method like io.StringIO or a text file). The text of a subject is
+        computed once per group of triples and the text of a predicate once
+        per object. The buffer is written every flush_size pieces of text.
+        """
+        write = buffer.write
+        parts = []
+        append = parts.append
+        predicates = {}
+        escape = escape_any
+        # NOTE: the escape function is taken directly from the cache of
+        #       escape_any() to save a function call per object
+        escapers_cache = _escapers_cache
+        first = True
+        # NOTE: same grouping than itertools.groupby() in _output_blocks(): the
+        #       consecutive triples of the same subject and the consecutive
+        #       occurrences of the same Node
+        group = node = None
+        for item in self:
+            if type(item) is tuple or isinstance(item, tuple):
+                s, p, o = item
+                try:
+                    p_text = predicates[id(p)]
+                except KeyError:
+                    p_text = predicates.setdefault(id(p), str(p))
+                try:
+                    o_text = escapers_cache[type(o)](o)
+                except KeyError:
+                    o_text = escape(o)
+                if group is not None and (group is s or group == s):
+                    assert p is not None, "predicate not defined"
+                    if o is not None:
+                        append(" ;\n    %s %s" % (p_text, o_text))
+                    continue
+                assert s is not None, "subject not defined"
+                if group is not None:
+                    append(" .\n\n")
+                elif not first:
+                    append("\n\n")
+                group, node = s, None
+                append("%s %s %s" % (s, p_text, o_text))
+            elif isinstance(item, Node) and item is not node:
+                if group is not None:
+                    append(" .\n\n")
+                elif not first:
+                    append("\n\n")
+                group, node = None, item
+                append(str(item))
+            else:
+                continue
+            first = False
+            if len(parts) >= flush_size:
+                write("".join(parts))
+                parts.clear()
+        if group is not None:
+            append(" .")
+        write("".join(parts))
 
     def indent(self, spaces):
         return indent(str(self), spaces)
 
     def _output_triples(self):
-        item = None
+        for i, (block, _) in enumerate(self._output_blocks()):
+            if i:
+                yield "\n\n"
+            yield block
+
+    def _output_blocks(self):
+        """
+        Yield the triples grouped by subject as tuples (text, number of
+        triples). The triples of a subject end with a dot so the blocks can be
+        joined with an empty line.
+        """
         for s, group in groupby(self, self._group_key):
             assert s is not None, "subject not defined"
-            if item is None:
-                pass
-            elif isinstance(item, tuple):
-                yield " .\n\n"
-            elif isinstance(item, Node):
-                yield "\n\n"
             item = next(group)
             if isinstance(item, tuple):
                 s, p, o = item
-                yield "%s %s %s" % (s, p, escape_any(o))
+                lines = ["%s %s %s" % (s, p, escape_any(o))]
                 for _, p, o in group:
                     assert p is not None, "predicate not defined"
                     if o is None:
                         continue
-                    yield " ;\n"
-                    yield "    %s %s" % (p, escape_any(o))
+                    lines.append("    %s %s" % (p, escape_any(o)))
+                yield " ;\n".join(lines) + " .", len(lines)
             elif isinstance(item, Node):
-                yield str(item)
-        if isinstance(item, tuple):
-            yield " ."
+                yield str(item), item._count_triples()
+
+    def chunks(self, max_bytes=None, max_triples=None):
+        """
+        Split the triples in texts of at most max_bytes bytes (encoded in
+        UTF-8) and max_triples triples. The triples of a subject are never
+        split: a subject that exceeds the limits is alone in its chunk.
+        """
+        chunk, size, count = [], 0, 0
+        for block, block_count in self._output_blocks():
+            block_size = len(block.encode("utf-8")) + 2 if max_bytes else 0
+            if chunk and (
+                (max_bytes and size + block_size > max_bytes)
+                or (max_triples and count + block_count > max_triples)
+            ):
+                yield "\n\n".join(chunk)
+                chunk, size, count = [], 0, 0
+            chunk.append(block)
+            size += block_size
+            count += block_count
+        if chunk:
+            yield "\n\n".join(chunk)
 
     def _group_key(self, x):
         if isinstance(x, tuple):
@@ -156,10 +265,13 @@ class Triples(list):
 
 
 class PrefixedName(RDFTerm):
+    __slots__ = ("base_iri", "prefix_label", "local_part", "_iri")
+
     def __init__(self, base_iri, prefix_label, local_part):
         self.base_iri = base_iri
         self.prefix_label = prefix_label
         self.local_part = local_part
+        self._iri = None
 
     def __str__(self):
         return "%s:%s" % (self.prefix_label, self.local_part)
@@ -180,17 +292,61 @@ class PrefixedName(RDFTerm):
         return hash(self.iri())
 
     def iri(self):
-        return IRI(self.base_iri.value + self.local_part)
+        if self._iri is None:
+            self._iri = IRI(self.base_iri.value + self.local_part)
+        return self._iri
 
 
 class IRI(RDFTerm):
+    """
+    An IRI reference. The instances are interned: IRI(x) returns the same
+    object as long as another IRI(x) is alive, so they must not be modified.
+    """
+
+    __slots__ = ("ref", "__weakref__")
     __re_invalid_chars__ = re.compile('[<>"{}|^`[-\\]\x00-\x20]')
+    # NOTE: a plain dict of weak references is used instead of a
+    #       WeakValueDictionary which is implemented in Python and is too slow
+    #       for a lookup done on every IRI(). The dead references are purged
+    #       when the dict doubles in size.
+    __interned__ = {}
+    __interned_limit__ = 1024
+
+    def __new__(cls, value):
+        if cls is IRI:
+            ref = cls.__interned__.get(value)
+            if ref is not None:
+                self = ref()
+                if self is not None:
+                    return self
+        self = object.__new__(cls)
+        self.value = value
+        if cls.__re_invalid_chars__.search(value) is None:
+            self.ref = "<%s>" % value
+        else:
+            self.ref = "<%s>" % cls.__re_invalid_chars__.sub(
+                lambda x: "%{:02X}".format(ord(x.group(0))), value
+            )
+        if cls is IRI:
+            cls.__interned__[value] = weakref.ref(self)
+            if len(cls.__interned__) > cls.__interned_limit__:
+                cls._purge_interned()
+        return self
+
+    @classmethod
+    def _purge_interned(cls):
+        cls.__interned__ = {
+            k: v for k, v in cls.__interned__.items() if v() is not None
+        }
+        cls.__interned_limit__ = max(1024, 2 * len(cls.__interned__))
 
     def __init__(self, value):
-        self.value = value
-        self.ref = "<%s>" % self.__re_invalid_chars__.sub(
-            lambda x: "%{:02X}".format(ord(x.group(0))), value
-        )
+        # NOTE: everything is done in __new__ so interned instances are not
+        #       initialized again
+        pass
+
+    def __getnewargs__(self):
+        return (self.value,)
 
     def __str__(self):
         return self.ref
@@ -212,16 +368,30 @@ class IRI(RDFTerm):
 
 
 class Literal(RDFTerm):
-    def __init__(self, value, lang=None):
+    __slots__ = ("lang", "datatype")
+
+    def __init__(self, value, lang=None, datatype=None):
         self.value = value
         self.lang = lang
+        self.datatype = datatype
 
     def __str__(self):
+        if self.datatype is not None:
+            return "%s^^%s" % (escape_string(self.value), self.datatype)
+        elif self.lang is None:
+            return escape_string(self.value)
         return "%s@%s" % (escape_string(self.value), self.lang)
 
+    def __repr__(self):
+        return "<Literal %s>" % self
+
     def __eq__(self, other):
         if isinstance(other, Literal):
-            return self.value == other.value and self.lang == other.lang
+            return (
+                self.value == other.value
+                and self.lang == other.lang
+                and self.datatype == other.datatype
+            )
         else:
             return self.value == other
 
@@ -229,7 +399,28 @@ class Literal(RDFTerm):
         return hash((self.value, self.lang))
 
 
+class BlankNode(RDFTerm):
+    __slots__ = ()
+
+    def __str__(self):
+        return "_:%s" % self.value
+
+    def __repr__(self):
+        return "<BlankNode %s>" % self
+
+    def __eq__(self, other):
+        if isinstance(other, BlankNode):
+            return self.value == other.value
+        else:
+            return str(self) == other
+
+    def __hash__(self):
+        return hash(str(self))
+
+
 class UNDEF(RDFTerm):
+    __slots__ = ()
+
     def __init__(self):
         pass
 
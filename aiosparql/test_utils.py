@@ -21,7 +21,9 @@ class TestSPARQLClient:
     async def start_server(self):
         await self._server.start_server(loop=self._loop)
         kwargs = dict(self._client_kwargs)
-        if kwargs.get("endpoint"):
+        if isinstance(kwargs.get("endpoint"), list):
+            kwargs["endpoint"] = [self.make_url(x) for x in kwargs["endpoint"]]
+        elif kwargs.get("endpoint"):
             kwargs["endpoint"] = self.make_url(kwargs["endpoint"])
         if kwargs.get("update_endpoint"):
             kwargs["update_endpoint"] = self.make_url(kwargs["update_endpoint"])
@@ -52,15 +54,36 @@ class TestSPARQLClient:
     def make_url(self, path):
         return str(self._server.make_url(path))
 
+    def prepare(self, query):
+        return self.session.prepare(query)
+
     def query(self, query, *args, **keywords):
         return self.session.query(query, *args, **keywords)
 
+    def query_iter(self, query, *args, **keywords):
+        return self.session.query_iter(query, *args, **keywords)
+
+    def query_results(self, query, *args, **keywords):
+        return self.session.query_results(query, *args, **keywords)
+
+    def query_many(self, queries, **kwargs):
+        return self.session.query_many(queries, **kwargs)
+
+    def paginate(self, query, *args, **keywords):
+        return self.session.paginate(query, *args, **keywords)
+
     def update(self, query, *args, **keywords):
         return self.session.update(query, *args, **keywords)
 
+    def insert_triples(self, *args, **kwargs):
+        return self.session.insert_triples(*args, **kwargs)
+
     def get(self, *args, **kwargs):
         return self.session.get(*args, **kwargs)
 
+    def iter_graph(self, *args, **kwargs):
+        return self.session.iter_graph(*args, **kwargs)
+
     def put(self, *args, **kwargs):
         return self.session.put(*args, **kwargs)
 
@@ -70,6 +93,9 @@ class TestSPARQLClient:
     def post(self, *args, **kwargs):
         return self.session.post(*args, **kwargs)
 
+    def post_triples(self, *args, **kwargs):
+        return self.session.post_triples(*args, **kwargs)
+
     async def close(self):
         if not self._closed:
             await self._session.close()
@@ -0,0 +1,40 @@
+from .ntriples import XSD
+from .syntax import IRI, Node, Triples, all_prefixes
+
+__all__ = ["turtle_header", "turtle_triples", "to_turtle"]
+
+
+def turtle_header(prefixes=None) -> str:
+    """
+    Return the @prefix directives of a mapping of prefix labels to IRIs (all
+    the namespaces defined by default). The prefix xsd is always declared.
+    """
+    if prefixes is None:
+        prefixes = {label: ns.__iri__ for label, ns in all_prefixes.items()}
+    if "xsd" not in prefixes:
+        # NOTE: the Python dates and floats are written with the xsd prefix
+        prefixes = dict(prefixes, xsd=IRI(XSD))
+    return "".join(
+        "@prefix %s: %s .\n" % (label, iri if isinstance(iri, IRI) else IRI(iri))
+        for label, iri in sorted(prefixes.items())
+    )
+
+
+def turtle_triples(triples) -> str:
+    """
+    Return the triples of a Triples or a Node in Turtle without the @prefix
+    directives. The text ends with an empty line so the triples of several
+    calls can be concatenated.
+    """
+    if isinstance(triples, Node):
+        triples = Triples([triples])
+    return str(triples) + "\n\n"
+
+
+def to_turtle(triples, prefixes=None) -> str:
+    """
+    Return the Turtle document of a Triples or a Node: the @prefix directives
+    followed by the triples grouped by subject, the prefixed names are kept
+    as they are.
+    """
+    return turtle_header(prefixes) + "\n" + turtle_triples(triples)[:-1]
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark of aiosparql.escape.escape_string against the previous
+implementation which called str.replace() for every escaped character.
+
+    python benchmarks/escape_string.py
+"""
+import timeit
+
+from aiosparql.escape import escape_string
+
+
+def previous_escape_string(value):
+    for old, new in [("\\", "\\\\"), ('"', '\\"'), ("\n", "\\n"), ("\r", "\\r")]:
+        value = value.replace(old, new)
+    return '"%s"' % value
+
+
+samples = [
+    ("short", "hello world", 200000),
+    ("short with quotes", 'say "hello"\n', 200000),
+    ("5 MB", "lorem ipsum dolor sit amet " * 200000, 20),
+    ("5 MB with one quote", "lorem ipsum dolor sit amet " * 200000 + '"', 20),
+    ("5 MB with many quotes", 'lorem "ipsum" dolor\n' * 250000, 20),
+]
+
+
+def main():
+    print("%-25s %12s %12s %8s" % ("sample", "previous", "current", "speedup"))
+    for name, value, number in samples:
+        previous = timeit.timeit(lambda: previous_escape_string(value), number=number)
+        current = timeit.timeit(lambda: escape_string(value), number=number)
+        print(
+            "%-25s %11.4fs %11.4fs %7.1fx"
+            % (name, previous, current, previous / current)
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark of the serialization of aiosparql.syntax.Triples: the
+Triples.serialize_into() path used by str() against the generator of text
+blocks used by Triples.chunks().
+
+    python benchmarks/serialize_triples.py [number of triples]
+"""
+import io
+import sys
+import timeit
+
+from aiosparql.syntax import IRI, RDF, Literal, Triples
+
+
+def make_triples(count):
+    subjects, predicates, objects = [], [], []
+    name, age = IRI("http://xmlns.com/foaf/0.1/name"), IRI("http://example.org/age")
+    for i in range(0, count, 3):
+        person = IRI("http://example.org/person/%d" % i)
+        subjects.extend([person, person, person])
+        predicates.extend([RDF.type, name, age])
+        objects.extend([IRI("http://xmlns.com/foaf/0.1/Person"), Literal("n%d" % i), i])
+    return Triples.from_columns(subjects, predicates, objects)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    triples = make_triples(count)
+    assert str(triples) == "".join(triples._output_triples())
+
+    def serialize_into():
+        triples.serialize_into(io.StringIO())
+
+    def generator():
+        "".join(triples._output_triples())
+
+    previous = min(timeit.repeat(generator, number=1, repeat=5))
+    current = min(timeit.repeat(serialize_into, number=1, repeat=5))
+    print("%d triples" % len(triples))
+    print("generator:       %.3fs" % previous)
+    print("serialize_into:  %.3fs (%.1fx)" % (current, previous / current))
+
+
+if __name__ == "__main__":
+    main()
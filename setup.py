@@ -32,6 +32,11 @@ setup(
     url="https://github.com/aio-libs/aiosparql",
     packages=find_packages(exclude=["tests.*", "tests"]),
     install_requires=["aiohttp>=3.5.0"],
+    extras_require={
+        "brotli": ["brotli"],
+        "opentelemetry": ["opentelemetry-api"],
+        "prometheus": ["prometheus_client"],
+    },
     tests_require=test_requirements,
     zip_safe=False,
     test_suite="tests",
@@ -0,0 +1,61 @@
+import asyncio
+import unittest
+
+from aiosparql.cache import MemoryResultCache
+
+
+def run(coro):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+class MemoryCache(unittest.TestCase):
+    def test_get_set(self):
+        async def test():
+            cache = MemoryResultCache()
+            self.assertIsNone(await cache.get("a"))
+            await cache.set("a", b"1", ttl=60)
+            self.assertEqual(await cache.get("a"), b"1")
+            await cache.set("a", b"22", ttl=60)
+            self.assertEqual(await cache.get("a"), b"22")
+            self.assertEqual(cache.size, 3)
+            await cache.set("b", b"1", ttl=-1)
+            self.assertIsNone(await cache.get("b"))
+            self.assertEqual(len(cache), 1)
+
+        run(test())
+
+    def test_lru_eviction(self):
+        async def test():
+            cache = MemoryResultCache(max_bytes=30)
+            for key in ("a", "b", "c"):
+                await cache.set(key, b"x" * 9, ttl=60)
+            await cache.get("a")
+            await cache.set("d", b"x" * 9, ttl=60)
+            self.assertIsNone(await cache.get("b"))
+            self.assertIsNotNone(await cache.get("a"))
+            self.assertEqual(cache.size, 30)
+            self.assertEqual(cache.evictions, 1)
+            await cache.set("e", b"x" * 30, ttl=60)
+            self.assertIsNone(await cache.get("e"))
+
+        run(test())
+
+    def test_invalidate(self):
+        async def test():
+            cache = MemoryResultCache()
+            await cache.set("a", b"1", ttl=60, graph="http://g1")
+            await cache.set("b", b"1", ttl=60, graph="http://g2")
+            await cache.set("c", b"1", ttl=60)
+            await cache.invalidate("http://g1")
+            self.assertIsNone(await cache.get("a"))
+            self.assertIsNone(await cache.get("c"))
+            self.assertIsNotNone(await cache.get("b"))
+            await cache.invalidate()
+            self.assertEqual(len(cache), 0)
+            self.assertEqual(cache.size, 0)
+
+        run(test())
@@ -1,11 +1,23 @@
+import asyncio
 import json
+import logging
+import re
 import unittest
 from textwrap import dedent
 
 import aiohttp
 from aiohttp import web
-from aiosparql.client import SPARQLClient, SPARQLQueryFormatter, SPARQLRequestFailed
-from aiosparql.syntax import IRI, RDF, Triples
+from aiosparql.cache import MemoryResultCache
+from aiosparql.client import (
+    SPARQLClient,
+    SPARQLQueryFormatter,
+    SPARQLQueryTemplate,
+    SPARQLRequestFailed,
+)
+from aiosparql.hooks import ClientHooks
+from aiosparql.limiter import AIMDLimiter
+from aiosparql.retry import RetryPolicy
+from aiosparql.syntax import IRI, RDF, Literal, Node, Triples
 from aiosparql.test_utils import AioSPARQLTestCase, unittest_run_loop
 
 
@@ -190,6 +202,376 @@ class Client(AioSPARQLTestCase):
         self.assertEqual(self.app["state"]["last_request"].query_string, "graph=foo")
 
 
+async def sparql_protocol_endpoint(request):
+    result = {
+        "method": request.method,
+        "content_type": request.content_type,
+        "params": dict(request.query),
+        "body": await request.text(),
+    }
+    return web.Response(text=json.dumps(result), content_type="application/json")
+
+
+class ClientDirectProtocol(AioSPARQLTestCase):
+    client_kwargs = {"endpoint": "/sparql", "protocol_mode": "direct"}
+
+    async def get_application(self):
+        app = web.Application()
+        app.router.add_route("*", "/sparql", sparql_protocol_endpoint)
+        return app
+
+    @unittest_run_loop
+    async def test_query(self):
+        res = await self.client.query("select * { ?s ?p 'é' }")
+        self.assertEqual(res["method"], "POST")
+        self.assertEqual(res["content_type"], "application/sparql-query")
+        self.assertTrue(res["body"].endswith("select * { ?s ?p 'é' }"))
+
+    @unittest_run_loop
+    async def test_update(self):
+        res = await self.client.update("insert data { <s> <p> 'o' }")
+        self.assertEqual(res["content_type"], "application/sparql-update")
+        self.assertTrue(res["body"].endswith("insert data { <s> <p> 'o' }"))
+
+    def test_unknown_protocol_mode(self):
+        with self.assertRaises(ValueError):
+            SPARQLClient("/sparql", protocol_mode="foo")
+
+
+class ClientAutoProtocol(AioSPARQLTestCase):
+    client_kwargs = {
+        "endpoint": "/sparql",
+        "protocol_mode": "auto",
+        "get_max_length": 200,
+    }
+
+    async def get_application(self):
+        app = web.Application()
+        app.router.add_route("*", "/sparql", sparql_protocol_endpoint)
+        return app
+
+    @unittest_run_loop
+    async def test_query(self):
+        res = await self.client.query("select * { ?s ?p ?o }")
+        self.assertEqual(res["method"], "GET")
+        self.assertTrue(res["params"]["query"].endswith("select * { ?s ?p ?o }"))
+        res = await self.client.query("select * { ?s ?p '%s' }" % ("x" * 200))
+        self.assertEqual(res["method"], "POST")
+        self.assertEqual(res["content_type"], "application/sparql-query")
+        # NOTE: the length is checked once the query is URL-encoded
+        res = await self.client.query("select * { ?s ?p '%s' }" % ("é" * 30))
+        self.assertEqual(res["method"], "POST")
+
+    @unittest_run_loop
+    async def test_update(self):
+        res = await self.client.update("insert data { <s> <p> 'o' }")
+        self.assertEqual(res["method"], "POST")
+        self.assertEqual(res["content_type"], "application/sparql-update")
+
+
+async def sparql_compressed_endpoint(request):
+    request.app["state"]["headers"] = request.headers
+    # NOTE: the body is decompressed by aiohttp
+    request.app["state"]["body"] = await request.read()
+    return web.Response(text="{}", content_type="application/json")
+
+
+class ClientCompression(AioSPARQLTestCase):
+    client_kwargs = {
+        "endpoint": "/sparql",
+        "crud_endpoint": "/crud",
+        "compression": "gzip",
+        "compression_threshold": 1000,
+    }
+
+    async def get_application(self):
+        app = web.Application()
+        app.router.add_post("/sparql", sparql_compressed_endpoint)
+        app.router.add_route("*", "/crud", sparql_compressed_endpoint)
+        app["state"] = {}
+        return app
+
+    @unittest_run_loop
+    async def test_update(self):
+        await self.client.update("insert data { <s> <p> 'o' }")
+        self.assertNotIn("Content-Encoding", self.app["state"]["headers"])
+        triples = Triples([("<s>", "<p>", "o%d" % i) for i in range(100)])
+        await self.client.update("insert data { {{}} }", triples)
+        self.assertEqual(self.app["state"]["headers"]["Content-Encoding"], "gzip")
+        body = self.app["state"]["body"].decode("utf-8")
+        self.assertTrue(body.startswith("update="))
+        self.assertIn("%22o99%22", body)
+
+    @unittest_run_loop
+    async def test_graph_upload(self):
+        triples = Triples([("<s>", "<p>", "o%d" % i) for i in range(100)])
+        await self.client.put(triples, format="text/turtle")
+        self.assertEqual(self.app["state"]["headers"]["Content-Encoding"], "gzip")
+        self.assertTrue(self.app["state"]["body"].endswith(b'<p> "o99" .\n\n'))
+
+        async def generate():
+            yield b"<s> <p> <o> .\n"
+
+        await self.client.post(generate(), format="application/n-triples")
+        self.assertEqual(self.app["state"]["headers"]["Content-Encoding"], "gzip")
+        self.assertEqual(self.app["state"]["body"], b"<s> <p> <o> .\n")
+
+    def test_unknown_compression(self):
+        with self.assertRaises(ValueError):
+            SPARQLClient("/sparql", compression="foo")
+
+
+async def sparql_counting_endpoint(request):
+    request.app["state"]["count"] += 1
+    result = {"count": request.app["state"]["count"]}
+    return web.Response(text=json.dumps(result), content_type="application/json")
+
+
+class ClientCache(AioSPARQLTestCase):
+    client_kwargs = {
+        "endpoint": "/sparql",
+        "graph": IRI("http://example.org/g"),
+        "cache": MemoryResultCache(),
+        "invalidate_cache_on_update": True,
+    }
+
+    async def get_application(self):
+        app = web.Application()
+        app.router.add_post("/sparql", sparql_counting_endpoint)
+        app["state"] = {"count": 0}
+        return app
+
+    @unittest_run_loop
+    async def test_cache(self):
+        cache = self.client_kwargs["cache"]
+        await cache.invalidate()
+        cache.hits = cache.misses = 0
+        query = "select * from {{graph}} { {{}} ?p ?o }"
+        self.assertEqual(await self.client.query(query, "<s>"), {"count": 1})
+        self.assertEqual(await self.client.query(query, "<s>"), {"count": 1})
+        self.assertEqual(await self.client.query(query, "<t>"), {"count": 2})
+        self.assertEqual(
+            await self.client.query(query, "<s>", cache_ttl=0), {"count": 3}
+        )
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+
+        other_graph = IRI("http://example.org/other")
+        await self.client.update("clear graph {{graph}}", graph=other_graph)
+        self.assertEqual(await self.client.query(query, "<s>"), {"count": 1})
+        await self.client.update("clear graph {{graph}}")
+        self.assertEqual(await self.client.query(query, "<s>"), {"count": 6})
+
+
+async def sparql_delayed_endpoint(request):
+    state = request.app["state"]
+    query = (await request.post())["query"].split("\n")[-1]
+    state["count"] += 1
+    await asyncio.sleep(0.05)
+    if query == "failure":
+        raise web.HTTPBadRequest()
+    state["finished"] += 1
+    return web.Response(
+        text=json.dumps({"query": query}), content_type="application/json"
+    )
+
+
+class ClientCoalesceQueries(AioSPARQLTestCase):
+    client_kwargs = {"endpoint": "/sparql", "coalesce_queries": True}
+
+    async def get_application(self):
+        app = web.Application()
+        app.router.add_post("/sparql", sparql_delayed_endpoint)
+        app["state"] = {"count": 0, "finished": 0}
+        return app
+
+    @unittest_run_loop
+    async def test_coalesce(self):
+        results = await asyncio.gather(
+            *[self.client.query("a") for _ in range(5)], self.client.query("b")
+        )
+        self.assertEqual(results[:5], [{"query": "a"}] * 5)
+        self.assertIs(results[0], results[4])
+        self.assertEqual(self.app["state"]["count"], 2)
+        results = await asyncio.gather(
+            *[self.client.query("failure") for _ in range(3)], return_exceptions=True
+        )
+        self.assertTrue(all(isinstance(x, SPARQLRequestFailed) for x in results))
+        self.assertEqual(self.app["state"]["count"], 3)
+
+    @unittest_run_loop
+    async def test_cancel(self):
+        first = asyncio.ensure_future(self.client.query("a"))
+        second = asyncio.ensure_future(self.client.query("a"))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        self.assertEqual(await second, {"query": "a"})
+        self.assertTrue(first.cancelled())
+        self.assertEqual(self.app["state"]["count"], 1)
+
+        only = asyncio.ensure_future(self.client.query("b"))
+        await asyncio.sleep(0.01)
+        only.cancel()
+        await asyncio.sleep(0.1)
+        self.assertEqual(self.app["state"]["finished"], 1)
+        self.assertEqual(self.client.session._in_flight, {})
+
+    @unittest_run_loop
+    async def test_timeouts(self):
+        results = await asyncio.gather(
+            self.client.query("a", timeout=0.01),
+            self.client.query("a", timeout=1.0),
+            self.client.query("a", timeout=0.01),
+            return_exceptions=True,
+        )
+        self.assertIsInstance(results[0], asyncio.TimeoutError)
+        self.assertEqual(results[1], {"query": "a"})
+        self.assertIsInstance(results[2], asyncio.TimeoutError)
+        self.assertEqual(self.app["state"]["count"], 1)
+
+        with self.assertRaises(asyncio.TimeoutError):
+            await self.client.query("b", timeout=0.01)
+        await asyncio.sleep(0.1)
+        self.assertEqual(self.app["state"]["finished"], 1)
+        self.assertEqual(self.client.session._in_flight, {})
+
+
+async def sparql_paginated_endpoint(request):
+    query = (await request.post())["query"]
+    request.app["state"]["queries"].append(query)
+    subjects = ["http://example.org/s%02d" % i for i in range(25)]
+    match = re.search(r'FILTER\(STR\(\?s\) > "([^"]*)"\)', query)
+    if match:
+        subjects = [x for x in subjects if x > match.group(1)]
+    offset = re.search(r"OFFSET (\d+)", query)
+    offset = int(offset.group(1)) if offset else 0
+    limit = int(re.search(r"LIMIT (\d+)", query).group(1))
+    bindings = [{"s": {"type": "uri", "value": x}} for x in subjects]
+    result = {
+        "head": {"vars": ["s"]},
+        "results": {"bindings": bindings[offset : offset + limit]},  # noqa
+    }
+    return web.Response(text=json.dumps(result), content_type="application/json")
+
+
+class ClientPaginate(AioSPARQLTestCase):
+    client_kwargs = {"endpoint": "/sparql"}
+
+    async def get_application(self):
+        app = web.Application()
+        app.router.add_post("/sparql", sparql_paginated_endpoint)
+        app["state"] = {"queries": []}
+        return app
+
+    @unittest_run_loop
+    async def test_offset(self):
+        query = "SELECT ?s WHERE { ?s a {{}} } ORDER BY ?s"
+        bindings = [
+            x async for x in self.client.paginate(query, RDF.type, page_size=10)
+        ]
+        self.assertEqual(len(bindings), 25)
+        self.assertEqual(bindings[-1]["s"]["value"], "http://example.org/s24")
+        queries = self.app["state"]["queries"]
+        self.assertTrue(queries[0].endswith("ORDER BY ?s\nLIMIT 10\nOFFSET 0"))
+        self.assertIn("LIMIT 10\nOFFSET 20", "".join(queries))
+
+    @unittest_run_loop
+    async def test_offset_prefetch(self):
+        queries = self.app["state"]["queries"]
+        for prefetch in (0, 1, 2):
+            queries.clear()
+            pages = self.client.paginate(
+                "SELECT ?s WHERE { ?s ?p ?o }", page_size=5, prefetch=prefetch
+            )
+            await pages.__anext__()
+            await asyncio.sleep(0.05)
+            # NOTE: the page read and the pages prefetched
+            self.assertEqual(len(queries), 1 + prefetch)
+            self.assertEqual(len([x async for x in pages]), 24)
+            self.assertLessEqual(len(queries), 6 + prefetch)
+
+    @unittest_run_loop
+    async def test_keyset(self):
+        query = "SELECT ?s FROM {{graph}} WHERE { ?s a {{}} {{keyset}} }"
+        pages = self.client.paginate(
+            query,
+            RDF.type,
+            graph=IRI("http://example.org/g"),
+            page_size=10,
+            order_by="?s",
+        )
+        bindings = [x async for x in pages]
+        self.assertEqual(
+            [x["s"]["value"] for x in bindings],
+            ["http://example.org/s%02d" % i for i in range(25)],
+        )
+        queries = self.app["state"]["queries"]
+        self.assertEqual(len(queries), 3)
+        self.assertTrue(queries[0].startswith("PREFIX rdf: "))
+        # NOTE: the filter is in the WHERE clause of the query itself
+        self.assertTrue(
+            queries[0].endswith(
+                "SELECT ?s FROM <http://example.org/g> WHERE { ?s a rdf:type }"
+                "\nORDER BY ?s\nLIMIT 10"
+            )
+        )
+        self.assertTrue(
+            queries[2].endswith(
+                "SELECT ?s FROM <http://example.org/g> WHERE { ?s a rdf:type "
+                'FILTER(STR(?s) > "http://example.org/s19") }\nORDER BY ?s\nLIMIT 10'
+            )
+        )
+        with self.assertRaises(ValueError):
+            self.client.paginate(query, page_size=0)
+        with self.assertRaises(ValueError):
+            self.client.paginate("SELECT ?s WHERE { ?s ?p ?o }", order_by="s")
+
+
+async def sparql_replica_endpoint(request):
+    if request.path == "/broken":
+        raise web.HTTPServiceUnavailable()
+    return web.Response(
+        text=json.dumps({"path": request.path}), content_type="application/json"
+    )
+
+
+class ClientEndpoints(AioSPARQLTestCase):
+    client_kwargs = {
+        "endpoint": ["/replica1", "/replica2", "/broken"],
+        "update_endpoint": "/update",
+        "limit_per_host": 2,
+    }
+
+    async def get_application(self):
+        app = web.Application()
+        for path in ("/replica1", "/replica2", "/broken", "/update"):
+            app.router.add_post(path, sparql_replica_endpoint)
+        return app
+
+    @unittest_run_loop
+    async def test_endpoints(self):
+        self.assertEqual(self.client.session.session.connector.limit_per_host, 2)
+        paths = []
+        for _ in range(12):
+            try:
+                paths.append((await self.client.query("ask {}"))["path"])
+            except SPARQLRequestFailed as exc:
+                self.assertEqual(exc.status, 503)
+                paths.append("/broken")
+        # NOTE: the broken endpoint is ejected after 3 failures
+        self.assertEqual(paths.count("/broken"), 3)
+        self.assertEqual(paths[-3:].count("/broken"), 0)
+        self.assertEqual(set(paths[-3:]), {"/replica1", "/replica2"})
+        res = await self.client.update("clear all")
+        self.assertEqual(res["path"], "/update")
+        self.assertEqual(
+            self.client.session.endpoint, self.client.make_url("/replica1")
+        )
+
+    def test_unknown_endpoint_policy(self):
+        with self.assertRaises(ValueError):
+            SPARQLClient("/sparql", endpoint_policy="foo")
+
+
 class ClientCustomPrefixes(AioSPARQLTestCase):
     client_kwargs = {
         "endpoint": "/sparql",
@@ -227,6 +609,50 @@ class ClientCustomPrefixes(AioSPARQLTestCase):
         )
 
 
+class ClientMinimalPrefixes(AioSPARQLTestCase):
+    client_kwargs = {
+        "endpoint": "/sparql",
+        "prefixes": {"foo": IRI("http://foo#"), "bar": IRI("http://bar#")},
+        "minimal_prefixes": True,
+    }
+
+    async def get_application(self):
+        app = web.Application()
+        app.router.add_post("/sparql", sparql_endpoint)
+        return app
+
+    @unittest_run_loop
+    async def test_minimal_prefixes(self):
+        res = await self.client.query("SELECT * { ?s a foo:Bar }")
+        self.assertEqual(
+            res["post"]["query"],
+            "PREFIX foo: <http://foo#>\n\nSELECT * { ?s a foo:Bar }",
+        )
+        res = await self.client.query("SELECT * { <http://foo/bar> ?p ?o }")
+        self.assertEqual(res["post"]["query"], "SELECT * { <http://foo/bar> ?p ?o }")
+
+    @unittest_run_loop
+    async def test_prefixes_in_arguments(self):
+        template = self.client.prepare("SELECT * { ?s bar:x ?o . {{}} }")
+        res = await self.client.query(template, Triples([("?s", RDF.type, "o")]))
+        self.assertEqual(
+            res["post"]["query"],
+            dedent(
+                """\
+            PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
+
+            PREFIX bar: <http://bar#>
+
+            SELECT * { ?s bar:x ?o . ?s rdf:type "o" . }"""
+            ),
+        )
+        res = await self.client.query(template, "")
+        self.assertEqual(
+            res["post"]["query"],
+            "PREFIX bar: <http://bar#>\n\nSELECT * { ?s bar:x ?o .  }",
+        )
+
+
 class Formatter(unittest.TestCase):
     formatter = SPARQLQueryFormatter()
 
@@ -239,6 +665,77 @@ class Formatter(unittest.TestCase):
         self.assertEqual(self._format("a{{}}d", "bc"), "abcd")
 
 
+class QueryTemplate(unittest.TestCase):
+    def _format(self, string, *args, **kwargs):
+        return SPARQLQueryTemplate(string).format(*args, **kwargs)
+
+    def test_format(self):
+        self.assertEqual(self._format("a\n  {{}}\nd", "b\nc"), "a\n  b\n  c\nd")
+        self.assertEqual(self._format("a\n{{}}\nd", "b\nc"), "a\nb\nc\nd")
+        self.assertEqual(self._format("a{{}}d", "bc"), "abcd")
+        self.assertEqual(self._format("{{1}}{{0}}{{1}}", "a", "b"), "bab")
+        self.assertEqual(self._format("{{foo}} {{bar[1]}}", foo=1, bar="ab"), "1 b")
+        self.assertEqual(self._format("no field"), "no field")
+        with self.assertRaises(ValueError):
+            SPARQLQueryTemplate("{{}} {{0}}")
+
+    def test_same_as_formatter(self):
+        query = """
+            SELECT *
+            FROM {{graph}}
+            WHERE {
+                {{}}
+            }
+            """
+        triples = Triples([("john", RDF.type, "doe"), ("john", "p", "o")])
+        graph = IRI("http://example.org")
+        self.assertEqual(
+            SPARQLQueryTemplate(query, "PREFIX foo: <bar>\n").format(
+                triples, graph=graph
+            ),
+            SPARQLQueryFormatter().vformat(
+                "PREFIX foo: <bar>\n\n" + dedent(query).strip(),
+                [triples],
+                {"graph": graph},
+            ),
+        )
+
+
+class ClientPrepare(AioSPARQLTestCase):
+    client_kwargs = {
+        "endpoint": "/sparql",
+        "graph": IRI("http://mu.semte.ch/test-application"),
+        "template_cache_size": 2,
+    }
+
+    async def get_application(self):
+        app = web.Application()
+        app.router.add_post("/sparql", sparql_endpoint)
+        return app
+
+    @unittest_run_loop
+    async def test_prepare(self):
+        template = self.client.prepare("SELECT * FROM {{graph}} WHERE { {{}} }")
+        self.assertIs(
+            self.client.prepare("SELECT * FROM {{graph}} WHERE { {{}} }"), template
+        )
+        res = await self.client.query(template, "?s ?p ?o")
+        self.assertEqual(
+            res["post"]["query"],
+            dedent(
+                """\
+            PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
+
+            SELECT * FROM <http://mu.semte.ch/test-application> WHERE { ?s ?p ?o }"""
+            ),
+        )
+        self.client.prepare("foo")
+        self.client.prepare("bar")
+        self.assertIsNot(
+            self.client.prepare("SELECT * FROM {{graph}} WHERE { {{}} }"), template
+        )
+
+
 async def test_client_context(loop):
     async with SPARQLClient(
         endpoint="http://example.org", graph="http://example/graph"
@@ -247,3 +744,748 @@ async def test_client_context(loop):
         assert not client.closed
     assert client.session.closed
     assert client.closed
+
+
+sample_results = {
+    "head": {"vars": ["s", "o"]},
+    "results": {
+        "bindings": [
+            {
+                "s": {"type": "uri", "value": "http://example.org/%d" % i},
+                "o": {"type": "literal", "value": "value %d" % i},
+            }
+            for i in range(100)
+        ]
+    },
+}
+
+
+def sample_results_tsv():
+    lines = ["?s\t?o"]
+    for binding in sample_results["results"]["bindings"]:
+        lines.append('<%s>\t"%s"' % (binding["s"]["value"], binding["o"]["value"]))
+    return "\n".join(lines) + "\n"
+
+
+def sample_results_csv():
+    lines = ["s,o"]
+    for binding in sample_results["results"]["bindings"]:
+        lines.append("%s,%s" % (binding["s"]["value"], binding["o"]["value"]))
+    return "\r\n".join(lines) + "\r\n"
+
+
+async def sparql_results_endpoint(request):
+    request.app["state"]["last_request"] = request
+    resp = web.StreamResponse()
+    resp.content_type = request.headers["Accept"]
+    await resp.prepare(request)
+    if request.headers["Accept"] == "text/tab-separated-values":
+        data = sample_results_tsv().encode("utf-8")
+    elif request.headers["Accept"] == "text/csv":
+        data = sample_results_csv().encode("utf-8")
+    else:
+        data = json.dumps(sample_results).encode("utf-8")
+    for i in range(0, len(data), 100):
+        await resp.write(data[i : i + 100])  # noqa
+    await resp.write_eof()
+    return resp
+
+
+class ClientQueryIter(AioSPARQLTestCase):
+    client_kwargs = {"endpoint": "/sparql"}
+
+    async def get_application(self):
+        app = web.Application()
+        app.router.add_post("/sparql", sparql_results_endpoint)
+        app["state"] = {}
+        return app
+
+    @unittest_run_loop
+    async def test_query_iter(self):
+        bindings = [x async for x in self.client.query_iter("SELECT * {?s ?p ?o}")]
+        self.assertEqual(bindings, sample_results["results"]["bindings"])
+        request = self.app["state"]["last_request"]
+        self.assertEqual(request.headers["Accept"], "application/sparql-results+json")
+
+    @unittest_run_loop
+    async def test_query_results(self):
+        result_set = await self.client.query_results("SELECT * {?s ?p ?o}")
+        self.assertEqual(result_set.vars, ["s", "o"])
+        self.assertEqual(len(result_set), 100)
+        self.assertEqual(result_set[0]["s"], IRI("http://example.org/0"))
+        self.assertEqual(result_set.to_dicts(), sample_results["results"]["bindings"])
+
+    @unittest_run_loop
+    async def test_result_format(self):
+        res = await self.client.query("SELECT * {?s ?p ?o}", result_format="tsv")
+        self.assertEqual(res["head"], sample_results["head"])
+        self.assertEqual(res["results"], sample_results["results"])
+        request = self.app["state"]["last_request"]
+        self.assertEqual(request.headers["Accept"], "text/tab-separated-values")
+
+        result_set = await self.client.query_results("SELECT *", result_format="csv")
+        self.assertEqual(result_set.vars, ["s", "o"])
+        self.assertEqual(result_set[0]["s"], Literal("http://example.org/0"))
+        request = self.app["state"]["last_request"]
+        self.assertEqual(request.headers["Accept"], "text/csv")
+
+        with self.assertRaises(ValueError):
+            await self.client.query("SELECT *", result_format="foo")
+
+
+class ClientResultFormat(AioSPARQLTestCase):
+    client_kwargs = {"endpoint": "/sparql", "result_format": "tsv"}
+
+    async def get_application(self):
+        app = web.Application()
+        app.router.add_post("/sparql", sparql_results_endpoint)
+        app["state"] = {}
+        return app
+
+    @unittest_run_loop
+    async def test_query_iter(self):
+        bindings = [x async for x in self.client.query_iter("SELECT * {?s ?p ?o}")]
+        self.assertEqual(bindings, sample_results["results"]["bindings"])
+        request = self.app["state"]["last_request"]
+        self.assertEqual(request.headers["Accept"], "text/tab-separated-values")
+
+
+async def slow_sparql_endpoint(request):
+    state = request.app["state"]
+    query = (await request.post())["query"].split("\n")[-1]
+    state["running"] += 1
+    state["max_running"] = max(state["max_running"], state["running"])
+    try:
+        await asyncio.sleep(0.01 * (int(query) % 3))
+    finally:
+        state["running"] -= 1
+    if query == "13":
+        raise web.HTTPBadRequest()
+    return web.Response(
+        text=json.dumps({"query": query}), content_type="application/json"
+    )
+
+
+class ClientQueryMany(AioSPARQLTestCase):
+    client_kwargs = {"endpoint": "/sparql"}
+
+    async def get_application(self):
+        app = web.Application()
+        app.router.add_post("/sparql", slow_sparql_endpoint)
+        app["state"] = {"running": 0, "max_running": 0}
+        return app
+
+    @unittest_run_loop
+    async def test_ordered(self):
+        queries = ["%s" % i for i in range(1, 11)]
+        queries[0] = ("{{}}{{}}", ("", "1"))
+        queries[1] = ("{{x}}2", (), {"x": ""})
+        results = [x async for x in self.client.query_many(queries, concurrency=3)]
+        self.assertEqual(results, [(i, {"query": str(i + 1)}) for i in range(10)])
+        self.assertEqual(self.app["state"]["max_running"], 3)
+
+    @unittest_run_loop
+    async def test_unordered(self):
+        queries = ["%s" % i for i in range(12)]
+        results = [
+            x
+            async for x in self.client.query_many(queries, concurrency=4, ordered=False)
+        ]
+        self.assertEqual(
+            sorted(results, key=lambda x: x[0]),
+            [(i, {"query": str(i)}) for i in range(12)],
+        )
+        self.assertNotEqual([x[0] for x in results], list(range(12)))
+        self.assertLessEqual(self.app["state"]["max_running"], 4)
+
+    @unittest_run_loop
+    async def test_errors(self):
+        queries = ["%s" % i for i in range(20)]
+        results = [
+            x
+            async for x in self.client.query_many(
+                queries, concurrency=5, return_exceptions=True
+            )
+        ]
+        self.assertEqual(len(results), 20)
+        self.assertIsInstance(results[13][1], SPARQLRequestFailed)
+        self.assertEqual(results[14], (14, {"query": "14"}))
+
+        with self.assertRaises(SPARQLRequestFailed):
+            async for _ in self.client.query_many(queries, concurrency=5):
+                pass
+        await asyncio.sleep(0.05)
+        self.assertEqual(self.app["state"]["running"], 0)
+
+    @unittest_run_loop
+    async def test_break(self):
+        queries = ("%s" % i for i in range(1000))
+        async for index, _ in self.client.query_many(queries, concurrency=5):
+            if index == 2:
+                break
+        await asyncio.sleep(0.05)
+        self.assertEqual(self.app["state"]["running"], 0)
+        self.assertGreaterEqual(len(list(queries)), 1000 - 8)
+
+
+async def flaky_update_endpoint(request):
+    state = request.app["state"]
+    update = (await request.post())["update"]
+    state["attempts"] += 1
+    if state["attempts"] % 3 == 0:
+        raise web.HTTPServiceUnavailable()
+    state["updates"].append(update)
+    return web.Response(text="{}", content_type="application/json")
+
+
+class ClientInsertTriples(AioSPARQLTestCase):
+    client_kwargs = {
+        "endpoint": "/sparql",
+        "graph": IRI("http://mu.semte.ch/test-application"),
+    }
+
+    async def get_application(self):
+        app = web.Application()
+        app.router.add_post("/sparql", flaky_update_endpoint)
+        app["state"] = {"attempts": 0, "updates": []}
+        return app
+
+    @unittest_run_loop
+    async def test_insert_triples(self):
+        triples = Triples([("<s%d>" % (i // 3), "<p>", "o%d" % i) for i in range(30)])
+        count = await self.client.insert_triples(
+            triples, max_triples=7, concurrency=2, retry_delay=0.001
+        )
+        self.assertEqual(count, 5)
+        updates = self.app["state"]["updates"]
+        self.assertEqual(len(updates), 5)
+        self.assertEqual(self.app["state"]["attempts"], 7)
+        self.assertEqual(
+            sorted(updates)[0],
+            dedent(
+                """\
+            PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
+
+            INSERT DATA {
+                GRAPH <http://mu.semte.ch/test-application> {
+                    <s0> <p> "o0" ;
+                        <p> "o1" ;
+                        <p> "o2" .
+
+                    <s1> <p> "o3" ;
+                        <p> "o4" ;
+                        <p> "o5" .
+                }
+            }"""
+            ),
+        )
+        for i in range(30):
+            self.assertEqual(sum('"o%d"' % i in x for x in updates), 1)
+
+    @unittest_run_loop
+    async def test_insert_triples_failure(self):
+        triples = Triples([("<s%d>" % i, "<p>", "o") for i in range(10)])
+        with self.assertRaises(SPARQLRequestFailed):
+            await self.client.insert_triples(
+                triples, max_triples=1, retries=0, concurrency=1
+            )
+
+    @unittest_run_loop
+    async def test_insert_triples_retry_policy(self):
+        triples = Triples([("<s%d>" % i, "<p>", "o") for i in range(10)])
+        client = SPARQLClient(
+            self.client.make_url("/sparql"),
+            retry_policy=RetryPolicy(1, backoff=0.0, budget=None),
+        )
+        try:
+            # NOTE: retries is ignored, every update is retried once
+            count = await client.insert_triples(
+                triples, max_triples=2, retries=5, concurrency=1
+            )
+            self.assertEqual(count, 5)
+            self.assertEqual(len(self.app["state"]["updates"]), 5)
+            self.assertEqual(self.app["state"]["attempts"], 7)
+            client.retry_policy.retries = 0
+            self.app["state"]["attempts"] = 2
+            with self.assertRaises(SPARQLRequestFailed):
+                await client.insert_triples(Triples([("<s>", "<p>", "o")]), retries=5)
+            self.assertEqual(self.app["state"]["attempts"], 3)
+        finally:
+            await client.close()
+
+
+async def crud_upload_endpoint(request):
+    request.app["state"]["body"] = await request.read()
+    request.app["state"]["headers"] = request.headers
+    raise web.HTTPNoContent()
+
+
+class ClientGraphUpload(AioSPARQLTestCase):
+    client_kwargs = {
+        "endpoint": "/sparql",
+        "crud_endpoint": "/crud",
+        "prefixes": {"foo": IRI("http://foo#")},
+    }
+
+    async def get_application(self):
+        app = web.Application()
+        app.router.add_route("*", "/crud", crud_upload_endpoint)
+        app["state"] = {}
+        return app
+
+    @unittest_run_loop
+    async def test_async_iterable(self):
+        async def generate():
+            for i in range(3):
+                yield b"<s> <p> <o%d> .\n" % i
+
+        await self.client.put(generate(), format="application/n-triples")
+        self.assertEqual(
+            self.app["state"]["body"],
+            b"<s> <p> <o0> .\n<s> <p> <o1> .\n<s> <p> <o2> .\n",
+        )
+        self.assertEqual(self.app["state"]["headers"]["Transfer-Encoding"], "chunked")
+
+    @unittest_run_loop
+    async def test_triples(self):
+        async def generate():
+            yield Triples([("<s>", RDF.type, "o")])
+            yield Triples([("<t>", "foo:p", 1)])
+
+        await self.client.post(generate(), format="text/turtle")
+        self.assertEqual(
+            self.app["state"]["body"].decode("utf-8"),
+            dedent(
+                """\
+            @prefix foo: <http://foo#> .
+            @prefix rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#> .
+            @prefix xsd: <http://www.w3.org/2001/XMLSchema#> .
+
+            <s> rdf:type "o" .
+
+            <t> foo:p 1 .
+
+            """
+            ),
+        )
+        self.assertEqual(self.app["state"]["headers"]["Content-Type"], "text/turtle")
+
+        await self.client.put(Triples([("<s>", "<p>", "o")]), format="text/turtle")
+        self.assertTrue(self.app["state"]["body"].endswith(b'\n\n<s> <p> "o" .\n\n'))
+        await self.client.post(Triples([("<s>", "<p>", 1.5)]), format="text/turtle")
+        body = self.app["state"]["body"].decode("utf-8")
+        self.assertIn("@prefix xsd: <http://www.w3.org/2001/XMLSchema#> .\n", body)
+        self.assertTrue(body.endswith('<s> <p> "1.5"^^xsd:double .\n\n'))
+        with self.assertRaises(ValueError):
+            await self.client.put(Triples([("<s>", "<p>", "o")]), format="foo/bar")
+
+    @unittest_run_loop
+    async def test_post_triples(self):
+        triples = Triples([("<s>", RDF.type, Literal("o", "en")), ("<t>", "foo:p", 1)])
+        await self.client.post_triples(triples, graph=IRI("http://example.org/g"))
+        self.assertEqual(
+            self.app["state"]["body"].decode("utf-8"),
+            dedent(
+                """\
+            <s> <http://www.w3.org/1999/02/22-rdf-syntax-ns#type> "o"@en .
+            <t> <http://foo#p> "1"^^<http://www.w3.org/2001/XMLSchema#integer> .
+            """
+            ),
+        )
+        headers = self.app["state"]["headers"]
+        self.assertEqual(headers["Content-Type"], "application/n-triples")
+
+        await self.client.post_triples(
+            Node("<s>", {"foo:p": "o"}), format="text/turtle"
+        )
+        self.assertTrue(self.app["state"]["body"].endswith(b'\n\n<s> foo:p "o" .\n\n'))
+
+
+async def crud_ntriples_endpoint(request):
+    request.app["state"]["last_request"] = request
+    resp = web.StreamResponse()
+    resp.content_type = "application/n-triples"
+    await resp.prepare(request)
+    for i in range(100):
+        await resp.write(b'<http://example.org/s> <http://example.org/p> "%d" .\n' % i)
+    await resp.write_eof()
+    return resp
+
+
+class ClientGraphDownload(AioSPARQLTestCase):
+    client_kwargs = {"endpoint": "/sparql", "crud_endpoint": "/crud"}
+
+    async def get_application(self):
+        app = web.Application()
+        app.router.add_get("/crud", crud_ntriples_endpoint)
+        app["state"] = {}
+        return app
+
+    @unittest_run_loop
+    async def test_iter_graph(self):
+        triples = [x async for x in self.client.iter_graph(IRI("http://example.org/g"))]
+        self.assertEqual(len(triples), 100)
+        self.assertEqual(
+            triples[5],
+            (IRI("http://example.org/s"), IRI("http://example.org/p"), Literal("5")),
+        )
+        request = self.app["state"]["last_request"]
+        self.assertEqual(request.headers["Accept"], "application/n-triples")
+        self.assertEqual(request.query_string, "graph=http://example.org/g")
+        with self.assertRaises(ValueError):
+            async for _ in self.client.iter_graph(format="text/turtle"):
+                pass
+
+
+async def flaky_endpoint(request):
+    state = request.app["state"]
+    state["requests"] += 1
+    if state["failures"]:
+        state["failures"] -= 1
+        raise web.HTTPServiceUnavailable(headers={"Retry-After": "0"})
+    if request.path == "/update":
+        return web.Response(text="{}", content_type="application/json")
+    return web.Response(
+        text=json.dumps({"head": {"vars": ["s"]}, "results": {"bindings": [{}]}}),
+        content_type="application/json",
+    )
+
+
+class ClientRetry(AioSPARQLTestCase):
+    client_kwargs = {
+        "endpoint": "/sparql",
+        "update_endpoint": "/update",
+        "retry_policy": RetryPolicy(2, backoff=0.0),
+    }
+
+    async def get_application(self):
+        app = web.Application()
+        app["state"] = {"requests": 0, "failures": 0}
+        app.router.add_post("/sparql", flaky_endpoint)
+        app.router.add_post("/update", flaky_endpoint)
+        return app
+
+    def fail(self, failures):
+        state = self.app["state"]
+        state["requests"] = 0
+        state["failures"] = failures
+
+    @unittest_run_loop
+    async def test_query(self):
+        self.fail(2)
+        result = await self.client.query("select * {?s ?p ?o}")
+        self.assertEqual(result["results"]["bindings"], [{}])
+        self.assertEqual(self.app["state"]["requests"], 3)
+        self.fail(3)
+        with self.assertRaises(SPARQLRequestFailed):
+            await self.client.query("select * {?s ?p ?o}")
+        self.assertEqual(self.app["state"]["requests"], 3)
+
+    @unittest_run_loop
+    async def test_query_iter(self):
+        self.fail(1)
+        bindings = [x async for x in self.client.query_iter("select * {?s ?p ?o}")]
+        self.assertEqual(bindings, [{}])
+        self.assertEqual(self.app["state"]["requests"], 2)
+
+    @unittest_run_loop
+    async def test_update(self):
+        self.fail(1)
+        with self.assertRaises(SPARQLRequestFailed):
+            await self.client.update("clear all")
+        self.assertEqual(self.app["state"]["requests"], 1)
+        policy = self.client.session.retry_policy
+        policy.retry_updates = True
+        try:
+            self.fail(1)
+            await self.client.update("clear all")
+            self.assertEqual(self.app["state"]["requests"], 2)
+        finally:
+            policy.retry_updates = False
+
+
+async def slow_endpoint(request):
+    state = request.app["state"]
+    state["in_flight"] += 1
+    state["max_in_flight"] = max(state["max_in_flight"], state["in_flight"])
+    await asyncio.sleep(0.01)
+    state["in_flight"] -= 1
+    if state["overloaded"]:
+        raise web.HTTPServiceUnavailable()
+    return web.Response(text="{}", content_type="application/json")
+
+
+class ClientConcurrencyLimiter(AioSPARQLTestCase):
+    client_kwargs = {"endpoint": "/sparql"}
+
+    async def get_application(self):
+        app = web.Application()
+        app["state"] = {"in_flight": 0, "max_in_flight": 0, "overloaded": False}
+        app.router.add_post("/sparql", slow_endpoint)
+        app.router.add_post("/results", sparql_results_endpoint)
+        app.router.add_post("/slow", deadline_endpoint)
+        return app
+
+    @unittest_run_loop
+    async def test_limiter(self):
+        limiter = AIMDLimiter(initial_limit=2, max_limit=3)
+        client = SPARQLClient(
+            self.client.make_url("/sparql"), concurrency_limiter=limiter
+        )
+        try:
+            await asyncio.gather(*[client.query("ask {}") for _ in range(10)])
+            self.assertEqual(self.app["state"]["max_in_flight"], 3)
+            self.assertEqual(limiter.limit, 3)
+            self.app["state"]["overloaded"] = True
+            for _ in range(3):
+                with self.assertRaises(SPARQLRequestFailed):
+                    await client.update("clear all")
+            self.assertEqual(limiter.limit, 2)
+            self.assertEqual(limiter.drops, 3)
+            self.assertEqual(limiter.in_flight, 0)
+        finally:
+            await client.close()
+
+    @unittest_run_loop
+    async def test_limiter_timeout(self):
+        limiter = AIMDLimiter(initial_limit=1, max_limit=1)
+        client = SPARQLClient(
+            self.client.make_url("/slow"), concurrency_limiter=limiter
+        )
+        try:
+            first = asyncio.ensure_future(client.query("ask { slow }"))
+            await asyncio.sleep(0.01)
+            loop = asyncio.get_event_loop()
+            started = loop.time()
+            with self.assertRaises(asyncio.TimeoutError):
+                await client.query("ask {}", timeout=0.1)
+            self.assertLess(loop.time() - started, 0.3)
+            self.assertEqual(limiter.queue_depth, 0)
+            await first
+            self.assertEqual(limiter.in_flight, 0)
+            self.assertEqual(limiter.drops, 0)
+            (stats,) = client.endpoint_policy.stats
+            self.assertEqual(stats.failures, 0)
+            self.assertEqual(stats.requests, 1)
+        finally:
+            await client.close()
+
+    @unittest_run_loop
+    async def test_limiter_query_iter(self):
+        limiter = AIMDLimiter(initial_limit=1)
+        client = SPARQLClient(
+            self.client.make_url("/results"), concurrency_limiter=limiter
+        )
+        try:
+            bindings = client.query_iter("SELECT *", result_format="tsv")
+            await bindings.__anext__()
+            # NOTE: the slot is released when the headers are received
+            self.assertEqual(limiter.in_flight, 0)
+            await client.query("SELECT *")
+            self.assertEqual(len([x async for x in bindings]), 99)
+            self.assertEqual(limiter.in_flight, 0)
+        finally:
+            await client.close()
+
+
+async def deadline_endpoint(request):
+    data = await request.post()
+    if "slow" in data.get("query", data.get("update", "")):
+        await asyncio.sleep(0.5)
+    result = {
+        "params": dict(request.query),
+        "header": request.headers.get("X-BIGDATA-MAX-QUERY-MILLIS"),
+    }
+    return web.Response(text=json.dumps(result), content_type="application/json")
+
+
+class ClientTimeouts(AioSPARQLTestCase):
+    client_kwargs = {
+        "endpoint": "/sparql",
+        "request_timeout": 2.0,
+        "timeout_hint": "fuseki",
+    }
+
+    async def get_application(self):
+        app = web.Application()
+        app.router.add_post("/sparql", deadline_endpoint)
+        return app
+
+    @unittest_run_loop
+    async def test_timeout(self):
+        with self.assertRaises(asyncio.TimeoutError):
+            await self.client.query("ask { slow }", timeout=0.05)
+        with self.assertRaises(asyncio.TimeoutError):
+            await self.client.query_results("ask { slow }", timeout=0.05)
+        with self.assertRaises(asyncio.TimeoutError):
+            await self.client.update("slow", timeout=0.05)
+        res = await self.client.query("ask { slow }")
+        self.assertEqual(res["params"], {"timeout": "2"})
+        res = await self.client.update("clear all")
+        self.assertEqual(res["params"], {})
+
+    @unittest_run_loop
+    async def test_timeout_hints(self):
+        url = self.client.make_url("/sparql")
+        async with SPARQLClient(url, timeout_hint="stardog") as client:
+            res = await client.query("ask {}")
+            self.assertEqual(res["params"], {})
+            res = await client.query("ask {}", timeout=1.5)
+            self.assertTrue(1000 < int(res["params"]["timeout"]) <= 1500)
+        async with SPARQLClient(url, timeout_hint="blazegraph") as client:
+            res = await client.query("ask {}", timeout=1.0)
+            self.assertEqual(res["params"], {})
+            self.assertTrue(0 < int(res["header"]) <= 1000)
+        with self.assertRaises(ValueError):
+            SPARQLClient(url, timeout_hint="foo")
+
+
+class RecordingHooks(ClientHooks):
+    def __init__(self):
+        self.events = []
+
+    def record(self, event, trace):
+        self.events.append((event, trace))
+
+    def on_prepare(self, trace):
+        self.record("prepare", trace)
+
+    def on_request_start(self, trace):
+        self.record("request_start", trace)
+
+    def on_first_byte(self, trace):
+        self.record("first_byte", trace)
+
+    def on_response_end(self, trace):
+        self.record("response_end", trace)
+
+    def on_decode_end(self, trace):
+        self.record("decode_end", trace)
+
+    def on_request_error(self, trace):
+        self.record("request_error", trace)
+
+    def on_request_cancel(self, trace):
+        self.record("request_cancel", trace)
+
+
+class BrokenHooks(ClientHooks):
+    def on_request_start(self, trace):
+        raise RuntimeError("broken hook")
+
+
+class ClientHooksTests(AioSPARQLTestCase):
+    client_kwargs = {"endpoint": "/sparql"}
+
+    async def get_application(self):
+        app = web.Application()
+        app["state"] = {}
+        app.router.add_post("/sparql", sparql_results_endpoint)
+        app.router.add_post("/update", sparql_endpoint)
+        return app
+
+    @unittest_run_loop
+    async def test_hooks(self):
+        hooks = RecordingHooks()
+        client = SPARQLClient(
+            self.client.make_url("/sparql"),
+            update_endpoint=self.client.make_url("/update"),
+            hooks=[hooks, BrokenHooks()],
+        )
+        try:
+            await client.query("SELECT * {?s ?p ?o}")
+            events = [x for x, _ in hooks.events]
+            self.assertEqual(
+                events,
+                [
+                    "prepare",
+                    "request_start",
+                    "first_byte",
+                    "response_end",
+                    "decode_end",
+                ],
+            )
+            trace = hooks.events[-1][1]
+            self.assertEqual(trace.operation, "query")
+            self.assertEqual(trace.template, "SELECT * {?s ?p ?o}")
+            self.assertIn("SELECT * {?s ?p ?o}", trace.query)
+            self.assertEqual(trace.status, 200)
+            self.assertGreater(trace.bytes_sent, len(trace.query))
+            self.assertGreater(trace.bytes_received, 1000)
+            self.assertTrue(0 <= trace.first_byte <= trace.response_end)
+            self.assertTrue(trace.response_end <= trace.decode_end)
+            self.assertGreaterEqual(trace.prepare_time, 0)
+
+            hooks.events.clear()
+            bindings = client.query_iter("SELECT *", result_format="tsv")
+            self.assertEqual(len([x async for x in bindings]), 100)
+            self.assertEqual(hooks.events[-1][0], "decode_end")
+            self.assertGreater(hooks.events[-1][1].bytes_received, 1000)
+
+            hooks.events.clear()
+            bindings = client.query_iter("SELECT *", result_format="tsv")
+            await bindings.__anext__()
+            await bindings.aclose()
+            self.assertEqual(
+                [x for x, _ in hooks.events],
+                ["prepare", "request_start", "first_byte", "request_cancel"],
+            )
+            self.assertIsNone(hooks.events[-1][1].error)
+
+            hooks.events.clear()
+            with self.assertRaises(SPARQLRequestFailed):
+                await client.update("failure")
+            self.assertEqual(
+                [x for x, _ in hooks.events],
+                ["prepare", "request_start", "first_byte", "request_error"],
+            )
+            trace = hooks.events[-1][1]
+            self.assertEqual(trace.status, 400)
+            self.assertIsInstance(trace.error, SPARQLRequestFailed)
+        finally:
+            await client.close()
+
+
+class ClientQueryLog(AioSPARQLTestCase):
+    client_kwargs = {"endpoint": "/sparql", "query_log_max_length": 20}
+
+    async def get_application(self):
+        app = web.Application()
+        app.router.add_post("/sparql", sparql_endpoint)
+        return app
+
+    @unittest_run_loop
+    async def test_query_log(self):
+        query = "SELECT *\nWHERE { ?s ?p ?o }\n" + "#" * 100
+        with self.assertLogs("aiosparql.client", "DEBUG") as logs:
+            await self.client.query(query)
+        record = logs.records[0]
+        self.assertEqual(record.sparql_operation, "query")
+        self.assertEqual(record.sparql_endpoint, self.client.make_url("/sparql"))
+        # NOTE: the prefixes are added before the query
+        self.assertGreater(record.sparql_query_length, len(query))
+        message = record.getMessage()
+        self.assertIn("1: PREFIX", message)
+        self.assertNotIn("#" * 100, message)
+        more = record.sparql_query_length - 20
+        self.assertIn("... (%d more characters)" % more, message)
+
+    @unittest_run_loop
+    async def test_query_log_disabled(self):
+        def render(query):
+            raise AssertionError("the query must not be rendered")
+
+        client = self.client.session
+        client._pretty_print_query = render
+        logger = logging.getLogger("aiosparql.client")
+        level = logger.level
+        logger.setLevel(logging.INFO)
+        try:
+            await self.client.query("SELECT * WHERE { ?s ?p ?o }")
+        finally:
+            logger.setLevel(level)
+        client._query_log_sample_rate = 0.0
+        with self.assertLogs("aiosparql.client", "DEBUG") as logs:
+            await self.client.query("SELECT * WHERE { ?s ?p ?o }")
+            logger.debug("nothing else")
+        self.assertEqual(len(logs.records), 1)
@@ -0,0 +1,39 @@
+import asyncio
+import gzip
+import unittest
+from io import BytesIO
+
+from aiosparql.compression import compress, compress_stream, get_compressor
+
+
+class Compression(unittest.TestCase):
+    data = b"<s> <p> <o> .\n" * 10000
+
+    def _compress_stream(self, data, chunk_size=1000):
+        async def collect():
+            return b"".join(
+                [x async for x in compress_stream("gzip", data, chunk_size)]
+            )
+
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(collect())
+        finally:
+            loop.close()
+
+    def test_compress(self):
+        compressed = compress("gzip", self.data)
+        self.assertLess(len(compressed), len(self.data))
+        self.assertEqual(gzip.decompress(compressed), self.data)
+
+    def test_compress_stream(self):
+        async def generate():
+            for i in range(0, len(self.data), 4096):
+                yield self.data[i : i + 4096]  # noqa
+
+        for data in (self.data, BytesIO(self.data), generate()):
+            self.assertEqual(gzip.decompress(self._compress_stream(data)), self.data)
+
+    def test_unknown_encoding(self):
+        with self.assertRaises(ValueError):
+            get_compressor("foo")
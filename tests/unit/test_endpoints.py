@@ -0,0 +1,56 @@
+import asyncio
+import unittest
+
+import aiohttp
+from aiosparql.endpoints import EWMAPolicy, LeastOutstandingPolicy, RoundRobinPolicy
+
+
+class Policies(unittest.TestCase):
+    endpoints = ["http://a/sparql", "http://b/sparql", "http://c/sparql"]
+
+    def test_round_robin(self):
+        policy = RoundRobinPolicy(self.endpoints)
+        urls = [policy.select().url for _ in range(6)]
+        self.assertEqual(sorted(urls), sorted(self.endpoints * 2))
+        self.assertEqual(urls[:3], urls[3:])
+        with self.assertRaises(ValueError):
+            RoundRobinPolicy([])
+
+    def test_least_outstanding(self):
+        policy = LeastOutstandingPolicy(self.endpoints)
+        with policy.track(policy.select()), policy.track(policy.select()):
+            self.assertEqual(policy.select().url, "http://c/sparql")
+        self.assertEqual([x.outstanding for x in policy.stats], [0, 0, 0])
+
+    def test_ewma(self):
+        policy = EWMAPolicy(self.endpoints, decay=0.5)
+        for stats, latency in zip(policy.stats, (0.3, 0.1, 0.2)):
+            policy.finished(stats, latency, False)
+        self.assertEqual(policy.select().url, "http://b/sparql")
+        policy.finished(policy.stats[1], 0.5, False)
+        self.assertAlmostEqual(policy.stats[1].latency, 0.3)
+        self.assertEqual(policy.select().url, "http://c/sparql")
+
+    def test_ejection(self):
+        policy = RoundRobinPolicy(self.endpoints, max_failures=2)
+        for _ in range(2):
+            with self.assertRaises(aiohttp.ClientConnectionError):
+                with policy.track(policy.stats[0]):
+                    raise aiohttp.ClientConnectionError()
+        self.assertNotIn(policy.stats[0], policy.healthy())
+        self.assertNotIn("http://a/sparql", [policy.select().url for _ in range(4)])
+        for stats in policy.stats:
+            policy.finished(stats, 0.1, True)
+            policy.finished(stats, 0.1, True)
+        self.assertEqual(policy.healthy(), policy.stats)
+
+    def test_is_failure(self):
+        policy = RoundRobinPolicy(self.endpoints)
+        self.assertTrue(policy.is_failure(asyncio.TimeoutError()))
+        self.assertTrue(
+            policy.is_failure(aiohttp.ClientResponseError(None, (), status=503))
+        )
+        self.assertFalse(
+            policy.is_failure(aiohttp.ClientResponseError(None, (), status=400))
+        )
+        self.assertFalse(policy.is_failure(ValueError()))
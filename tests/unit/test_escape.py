@@ -4,12 +4,15 @@ from decimal import Decimal
 
 from aiosparql.escape import (
     escape_any,
+    escapers,
+    register_escaper,
     escape_boolean,
     escape_date,
     escape_datetime,
     escape_float,
     escape_string,
     escape_time,
+    unescape_string,
 )
 from aiosparql.syntax import Node, RDFTerm
 
@@ -34,6 +37,28 @@ class Escape(unittest.TestCase):
         with self.assertRaises(TypeError):
             escape_any(int)
 
+    def test_escape_any_cache(self):
+        class Boolean(int):
+            pass
+
+        class Custom:
+            pass
+
+        self.assertEqual(escape_any(False), "false")
+        self.assertEqual(escape_any(0), "0")
+        self.assertEqual(escape_any(Boolean(1)), "1")
+        register_escaper(Boolean, escape_boolean)
+        try:
+            self.assertEqual(escape_any(Boolean(1)), "true")
+            self.assertEqual(escape_any(1), "1")
+            register_escaper(Custom, lambda x: "custom")
+            self.assertEqual(escape_any(Custom()), "custom")
+            with self.assertRaises(TypeError):
+                escape_any(Custom)
+        finally:
+            del escapers[:2]
+        self.assertEqual(escape_any(Boolean(1)), "1")
+
     def test_escape_boolean(self):
         self.assertEqual(escape_boolean(True), "true")
         self.assertEqual(escape_boolean(False), "false")
@@ -64,3 +89,16 @@ class Escape(unittest.TestCase):
         self._test_escape_string("foo\n\rbar", r'"foo\n\rbar"')
         self._test_escape_string('foo "bar"', r'"foo \"bar\""')
         self._test_escape_string("foo\\bar", r'"foo\\bar"')
+        self._test_escape_string("foo\t\b\fbar", r'"foo\t\b\fbar"')
+        self._test_escape_string("foo 'bar'", "\"foo 'bar'\"")
+        value = 'foo\t"bar"\\\n'
+        self.assertEqual(unescape_string(escape_string(value)[1:-1]), value)
+
+    def test_unescape_string(self):
+        self.assertEqual(unescape_string("foo"), "foo")
+        self.assertEqual(
+            unescape_string(r"foo\n\r\t\b\f\"\'\\bar"), "foo\n\r\t\b\f\"'\\bar"
+        )
+        self.assertEqual(unescape_string(r"\u00e9\U0001F600"), "\u00e9\U0001F600")
+        with self.assertRaises(ValueError):
+            unescape_string(r"\x")
@@ -0,0 +1,183 @@
+import unittest
+
+import aiohttp
+from aiosparql import instrumentation
+from aiosparql.hooks import RequestTrace
+from aiosparql.instrumentation import (
+    OpenTelemetryHooks,
+    PrometheusHooks,
+    template_label,
+)
+
+TEMPLATE = "SELECT * WHERE { ?s ?p {{}} }"
+ENDPOINT = "http://localhost:8890/sparql"
+
+
+def request(hooks, error=None):
+    """
+    Run the events of a query through the hooks like SPARQLClient, the
+    attempt fails with error if given.
+    """
+    trace = RequestTrace([hooks], "query", TEMPLATE)
+    trace.query = "SELECT * WHERE { ?s ?p 1 }"
+    trace.prepare_time = 0.001
+    trace.emit("on_prepare")
+    try:
+        with trace.attempt_to(ENDPOINT):
+            trace.bytes_sent = 30
+            trace.received_headers(200)
+            if error is not None:
+                raise error
+            trace.received_body(1234)
+            trace.decoded()
+    except BaseException as exc:
+        if exc is not error:
+            raise
+    return trace
+
+
+class TemplateLabel(unittest.TestCase):
+    def test_template_label(self):
+        self.assertEqual(template_label(None), "")
+        self.assertEqual(len(template_label(TEMPLATE)), 12)
+        self.assertEqual(template_label(TEMPLATE), template_label(TEMPLATE))
+        self.assertNotEqual(template_label(TEMPLATE), template_label("ASK {}"))
+
+
+class FakeSpan:
+    def __init__(self, name, kind, attributes):
+        self.name = name
+        self.kind = kind
+        self.attributes = dict(attributes)
+        self.events = []
+        self.exceptions = []
+        self.status = None
+        self.ended = False
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def add_event(self, name, attributes=None):
+        self.events.append(name)
+
+    def record_exception(self, exception):
+        self.exceptions.append(exception)
+
+    def set_status(self, status):
+        self.status = status
+
+    def end(self):
+        self.ended = True
+
+
+class FakeTracer:
+    def __init__(self):
+        self.spans = []
+
+    def start_span(self, name, kind=None, attributes=None):
+        span = FakeSpan(name, kind, attributes or {})
+        self.spans.append(span)
+        return span
+
+
+@unittest.skipIf(
+    instrumentation.otel_trace is None, "opentelemetry-api is not installed"
+)
+class OpenTelemetry(unittest.TestCase):
+    def setUp(self):
+        self.tracer = FakeTracer()
+        self.hooks = OpenTelemetryHooks(self.tracer, max_statement_length=10)
+
+    def test_span(self):
+        trace = request(self.hooks)
+        (span,) = self.tracer.spans
+        self.assertEqual(span.name, "SPARQL query")
+        self.assertEqual(span.kind, instrumentation.SpanKind.CLIENT)
+        self.assertEqual(
+            span.attributes,
+            {
+                "db.system": "sparql",
+                "db.operation": "query",
+                "db.statement": "SELECT * W",
+                "http.url": ENDPOINT,
+                "sparql.template": template_label(TEMPLATE),
+                "sparql.attempt": 0,
+                "http.status_code": 200,
+                "sparql.bytes_sent": 30,
+                "sparql.bytes_received": 1234,
+            },
+        )
+        self.assertEqual(span.events, ["first_byte", "response_end"])
+        self.assertTrue(span.ended)
+        self.assertIsNone(span.status)
+        self.assertEqual(trace.context, {})
+
+    def test_error(self):
+        error = aiohttp.ServerDisconnectedError()
+        request(self.hooks, error)
+        (span,) = self.tracer.spans
+        self.assertEqual(span.exceptions, [error])
+        self.assertEqual(span.status.status_code, instrumentation.StatusCode.ERROR)
+        self.assertTrue(span.ended)
+
+    def test_cancel(self):
+        request(self.hooks, GeneratorExit())
+        (span,) = self.tracer.spans
+        self.assertEqual(span.exceptions, [])
+        self.assertIsNone(span.status)
+        self.assertTrue(span.attributes["sparql.cancelled"])
+        self.assertTrue(span.ended)
+
+
+@unittest.skipIf(
+    instrumentation.prometheus_client is None, "prometheus_client is not installed"
+)
+class Prometheus(unittest.TestCase):
+    def setUp(self):
+        self.registry = instrumentation.prometheus_client.CollectorRegistry()
+        self.hooks = PrometheusHooks(registry=self.registry, namespace="test")
+
+    def sample(self, name, **labels):
+        return self.registry.get_sample_value("test_" + name, labels)
+
+    def test_histograms(self):
+        request(self.hooks)
+        template = template_label(TEMPLATE)
+        # NOTE: the query is formatted before an endpoint is chosen
+        self.assertEqual(
+            self.sample(
+                "prepare_duration_seconds_count", operation="query", template=template
+            ),
+            1,
+        )
+        labels = {"endpoint": ENDPOINT, "operation": "query", "template": template}
+        for name in (
+            "connection_wait_seconds",
+            "first_byte_seconds",
+            "request_duration_seconds",
+        ):
+            self.assertEqual(self.sample(name + "_count", **labels), 1)
+        self.assertEqual(self.sample("response_size_bytes_sum", **labels), 1234)
+        self.assertEqual(
+            self.sample("response_size_bytes_bucket", le="1000.0", **labels), 0
+        )
+        self.assertIsNone(self.sample("request_errors_total", error="", **labels))
+
+    def test_errors(self):
+        request(self.hooks, aiohttp.ServerDisconnectedError())
+        request(self.hooks, GeneratorExit())
+        labels = {
+            "endpoint": ENDPOINT,
+            "operation": "query",
+            "template": template_label(TEMPLATE),
+        }
+        self.assertEqual(
+            self.sample(
+                "request_errors_total", error="ServerDisconnectedError", **labels
+            ),
+            1,
+        )
+        self.assertIsNone(
+            self.sample("request_errors_total", error="GeneratorExit", **labels)
+        )
+        self.assertIsNone(self.sample("request_duration_seconds_count", **labels))
@@ -0,0 +1,118 @@
+import asyncio
+import unittest
+
+import aiohttp
+from aiosparql.limiter import AIMDLimiter, ConcurrencyLimitExceeded
+
+
+def run(coro):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+class Limiter(unittest.TestCase):
+    def test_aimd(self):
+        limiter = AIMDLimiter(initial_limit=4, max_limit=5, latency_threshold=1.0)
+        limiter.in_flight = 3
+        limiter.release(0.1, False, 3)
+        self.assertEqual(limiter.limit, 5)
+        limiter.release(0.1, False, 3)
+        self.assertEqual(limiter.limit, 5)
+        limiter.release(0.1, True, 3)
+        self.assertEqual(limiter.limit, 4)
+        limiter.in_flight = 2
+        limiter.release(2.0, False, 3)
+        self.assertEqual(limiter.limit, 4)
+        self.assertEqual(limiter.drops, 2)
+        limiter.release(0.1, False, 1)
+        self.assertEqual(limiter.limit, 4)
+        self.assertEqual(limiter.in_flight, 0)
+        with self.assertRaises(ValueError):
+            AIMDLimiter(initial_limit=0)
+
+    def test_is_drop(self):
+        limiter = AIMDLimiter()
+        self.assertTrue(limiter.is_drop(asyncio.TimeoutError()))
+        self.assertTrue(
+            limiter.is_drop(aiohttp.ClientResponseError(None, (), status=503))
+        )
+        self.assertFalse(
+            limiter.is_drop(aiohttp.ClientResponseError(None, (), status=400))
+        )
+
+    def test_queue(self):
+        async def test():
+            limiter = AIMDLimiter(initial_limit=2, max_limit=2, max_queue=1)
+            started = []
+
+            async def request(i):
+                async with limiter.slot():
+                    started.append(i)
+                    await asyncio.sleep(0.01)
+
+            tasks = [asyncio.ensure_future(request(i)) for i in range(3)]
+            await asyncio.sleep(0)
+            self.assertEqual(started, [0, 1])
+            self.assertEqual(limiter.metrics()["queue_depth"], 1)
+            with self.assertRaises(ConcurrencyLimitExceeded):
+                await limiter.acquire()
+            self.assertEqual(limiter.rejections, 1)
+            await asyncio.gather(*tasks)
+            self.assertEqual(started, [0, 1, 2])
+            self.assertEqual(
+                limiter.metrics(),
+                {
+                    "limit": 2,
+                    "in_flight": 0,
+                    "queue_depth": 0,
+                    "rejections": 1,
+                    "drops": 0,
+                },
+            )
+
+        run(test())
+
+    def test_cancel(self):
+        async def test():
+            limiter = AIMDLimiter(initial_limit=1, max_limit=1)
+            await limiter.acquire()
+            task = asyncio.ensure_future(limiter.acquire())
+            await asyncio.sleep(0)
+            task.cancel()
+            await asyncio.sleep(0)
+            limiter.release()
+            self.assertEqual(limiter.in_flight, 0)
+            self.assertEqual(limiter.queue_depth, 0)
+
+        run(test())
+
+    def test_release_early(self):
+        async def test():
+            limiter = AIMDLimiter(initial_limit=1, max_limit=1)
+            with self.assertRaises(aiohttp.ClientPayloadError):
+                async with limiter.slot() as slot:
+                    slot.release()
+                    self.assertEqual(limiter.in_flight, 0)
+                    async with limiter.slot():
+                        pass
+                    raise aiohttp.ClientPayloadError()
+            self.assertEqual(limiter.in_flight, 0)
+            self.assertEqual(limiter.drops, 0)
+
+        run(test())
+
+    def test_slot_timeout(self):
+        async def test():
+            limiter = AIMDLimiter(initial_limit=1, max_limit=1)
+            async with limiter.slot(0.0):
+                with self.assertRaises(asyncio.TimeoutError):
+                    async with limiter.slot(0.01):
+                        pass
+                self.assertEqual(limiter.queue_depth, 0)
+            self.assertEqual(limiter.in_flight, 0)
+            self.assertEqual(limiter.drops, 0)
+
+        run(test())
@@ -0,0 +1,103 @@
+import unittest
+from datetime import date
+from decimal import Decimal
+
+from aiosparql.ntriples import NTriplesParser, to_ntriples
+from aiosparql.syntax import IRI, RDF, UNDEF, BlankNode, Literal, Node, Triples
+
+sample_data = """\
+# a comment
+<http://example.org/s> <http://example.org/p> <http://example.org/o> .
+_:b0 <http://example.org/p> "foo \\"bar\\"\\n\\u00e9" . # another comment
+
+<http://example.org/s>\t<http://example.org/p>\t"foo"@en-US.
+<http://example.org/s> <http://example.org/p> _:b1.x .
+<http://example.org/s> <http://example.org/p> "1"^^<http://www.w3.org/2001/XMLSchema#integer> .\r
+"""
+
+expected = [
+    (
+        IRI("http://example.org/s"),
+        IRI("http://example.org/p"),
+        IRI("http://example.org/o"),
+    ),
+    (BlankNode("b0"), IRI("http://example.org/p"), Literal('foo "bar"\né')),
+    (IRI("http://example.org/s"), IRI("http://example.org/p"), Literal("foo", "en-US")),
+    (IRI("http://example.org/s"), IRI("http://example.org/p"), BlankNode("b1.x")),
+    (
+        IRI("http://example.org/s"),
+        IRI("http://example.org/p"),
+        Literal("1", datatype=IRI("http://www.w3.org/2001/XMLSchema#integer")),
+    ),
+]
+
+
+class NTriples(unittest.TestCase):
+    def _parse(self, data, chunk_size):
+        parser = NTriplesParser()
+        triples = []
+        for i in range(0, len(data), chunk_size):
+            triples.extend(parser.feed(data[i : i + chunk_size]))  # noqa
+        triples.extend(parser.close())
+        return triples
+
+    def test_parse(self):
+        data = sample_data.encode("utf-8")
+        for chunk_size in (1, 7, len(data)):
+            triples = self._parse(data, chunk_size)
+            self.assertEqual(triples, expected)
+            self.assertIsInstance(triples[1][0], BlankNode)
+            self.assertIsInstance(triples[2][2], Literal)
+            self.assertIsNone(triples[1][2].lang)
+
+    def test_no_final_newline(self):
+        self.assertEqual(
+            self._parse(b"<s> <p> <o> .", 100), [(IRI("s"), IRI("p"), IRI("o"))]
+        )
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            self._parse(b"<s> <p> .\n", 100)
+
+
+class NTriplesSerializer(unittest.TestCase):
+    def test_round_trip(self):
+        parser = NTriplesParser()
+        triples = parser.feed(to_ntriples(Triples(expected))) + parser.close()
+        self.assertEqual(triples, expected)
+
+    def test_terms(self):
+        node = Node("_:n", {RDF.type: "ex:Foo", "ex:p": Node("<m>", {"a": "ex:Bar"})})
+        triples = Triples(
+            [
+                ("ex:s", "<http://example.org/p>", True),
+                ("ex:s", "a", 1.5),
+                ("ex:s", RDF.value, Decimal("1.50")),
+                ("ex:s", RDF.value, date(2020, 1, 2)),
+                ("ex:s", RDF.value, None),
+                ("ex:s", RDF.value, node),
+            ]
+        )
+        rdf = "http://www.w3.org/1999/02/22-rdf-syntax-ns#"
+        xsd = "http://www.w3.org/2001/XMLSchema#"
+        self.assertEqual(
+            to_ntriples(triples, {"ex": IRI("http://example.org/"), "rdf": rdf}),
+            (
+                '<http://example.org/s> <http://example.org/p> "true"^^<{xsd}boolean> .\n'
+                '<http://example.org/s> <{rdf}type> "1.5"^^<{xsd}double> .\n'
+                '<http://example.org/s> <{rdf}value> "1.50"^^<{xsd}decimal> .\n'
+                '<http://example.org/s> <{rdf}value> "2020-01-02"^^<{xsd}date> .\n'
+                "<http://example.org/s> <{rdf}value> _:n .\n"
+                "_:n <http://example.org/p> <m> .\n"
+                '<m> <{rdf}type> "ex:Bar" .\n'
+                '_:n <{rdf}type> "ex:Foo" .\n'
+            ).format(rdf=rdf, xsd=xsd),
+        )
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            to_ntriples(Triples([("?s", "<p>", "o")]))
+        with self.assertRaises(ValueError):
+            to_ntriples(Triples([("unknown:s", "<p>", "o")]))
+        with self.assertRaises(ValueError):
+            to_ntriples(Triples([(UNDEF(), "<p>", "o")]))
@@ -0,0 +1,220 @@
+import json
+import unittest
+
+from aiosparql.results import (
+    CSVResultsParser,
+    JSONResultsParser,
+    ResultSet,
+    TSVResultsParser,
+)
+from aiosparql.syntax import IRI, BlankNode, Literal
+
+results = {
+    "head": {"vars": ["s", "o"]},
+    "results": {
+        "distinct": False,
+        "bindings": [
+            {
+                "s": {"type": "uri", "value": "http://example.org/%d" % i},
+                "o": {"type": "literal", "value": 'é "{[%d]}"' % i, "xml:lang": "fr"},
+            }
+            for i in range(20)
+        ],
+    },
+}
+
+
+class JSONResults(unittest.TestCase):
+    def _parse(self, data, chunk_size):
+        parser = JSONResultsParser()
+        bindings = []
+        for i in range(0, len(data), chunk_size):
+            bindings.extend(parser.feed(data[i : i + chunk_size]))  # noqa
+        bindings.extend(parser.close())
+        return parser, bindings
+
+    def test_chunks(self):
+        for indent in (None, 2):
+            data = json.dumps(results, indent=indent).encode("utf-8")
+            for chunk_size in (1, 3, 64, len(data)):
+                parser, bindings = self._parse(data, chunk_size)
+                self.assertEqual(bindings, results["results"]["bindings"])
+                self.assertEqual(parser.vars, ["s", "o"])
+                self.assertTrue(parser.done)
+
+    def test_incremental(self):
+        parser = JSONResultsParser()
+        data = json.dumps(results)
+        first = data.index("}}, {") + 2
+        self.assertEqual(parser.feed(data[:first]), results["results"]["bindings"][:1])
+        self.assertEqual(len(parser.feed(data[first:])), 19)
+        self.assertEqual(parser.close(), [])
+
+    def test_boolean(self):
+        parser, bindings = self._parse(b'{"head": {}, "boolean": true}', 5)
+        self.assertEqual(bindings, [])
+        self.assertIs(parser.boolean, True)
+        self.assertEqual(parser.vars, [])
+
+    def test_head_after_results(self):
+        parser, bindings = self._parse(
+            b'{"results": {"bindings": []}, "head": {"vars": ["x"]}}', 7
+        )
+        self.assertEqual(bindings, [])
+        self.assertEqual(parser.vars, ["x"])
+
+    def test_truncated(self):
+        parser = JSONResultsParser()
+        parser.feed(b'{"head": {"vars": []}, "results": {"bindings": [{}')
+        with self.assertRaises(ValueError):
+            parser.close()
+
+    def test_invalid(self):
+        parser = JSONResultsParser()
+        with self.assertRaises(ValueError):
+            parser.feed(b"[]")
+
+
+class LineResults(unittest.TestCase):
+    def _parse(self, parser, data, chunk_size):
+        bindings = []
+        for i in range(0, len(data), chunk_size):
+            bindings.extend(parser.feed(data[i : i + chunk_size]))  # noqa
+        bindings.extend(parser.close())
+        return bindings
+
+    def test_tsv(self):
+        xsd = "http://www.w3.org/2001/XMLSchema#"
+        data = (
+            "?s\t?o\t?x\n"
+            '<http://example.org/1>\t"foo\\tbar"@en\t\n'
+            '_:b0\t"5"^^<%sint>\t12\n'
+            "\t'it\"s'\ttrue\r\n"
+            "\t1.5\t1e3" % xsd
+        ).encode("utf-8")
+        expected = [
+            {
+                "s": {"type": "uri", "value": "http://example.org/1"},
+                "o": {"type": "literal", "value": "foo\tbar", "xml:lang": "en"},
+            },
+            {
+                "s": {"type": "bnode", "value": "b0"},
+                "o": {"type": "literal", "value": "5", "datatype": xsd + "int"},
+                "x": {"type": "literal", "value": "12", "datatype": xsd + "integer"},
+            },
+            {
+                "o": {"type": "literal", "value": 'it"s'},
+                "x": {"type": "literal", "value": "true", "datatype": xsd + "boolean"},
+            },
+            {
+                "o": {"type": "literal", "value": "1.5", "datatype": xsd + "decimal"},
+                "x": {"type": "literal", "value": "1e3", "datatype": xsd + "double"},
+            },
+        ]
+        for chunk_size in (1, 4, len(data)):
+            parser = TSVResultsParser()
+            self.assertEqual(self._parse(parser, data, chunk_size), expected)
+            self.assertEqual(parser.vars, ["s", "o", "x"])
+            self.assertTrue(parser.done)
+
+    def test_tsv_invalid(self):
+        with self.assertRaises(ValueError):
+            self._parse(TSVResultsParser(), b"?s\nfoo bar\n", 10)
+
+    def test_csv(self):
+        data = 's,o\r\nhttp://example.org/1,"multi\r\nline ""quoted"""\r\n_:b1,\r\nx,y'
+        expected = [
+            {
+                "s": {"type": "literal", "value": "http://example.org/1"},
+                "o": {"type": "literal", "value": 'multi\r\nline "quoted"'},
+            },
+            {"s": {"type": "bnode", "value": "b1"}},
+            {
+                "s": {"type": "literal", "value": "x"},
+                "o": {"type": "literal", "value": "y"},
+            },
+        ]
+        for chunk_size in (1, 3, len(data)):
+            parser = CSVResultsParser()
+            self.assertEqual(self._parse(parser, data, chunk_size), expected)
+            self.assertEqual(parser.vars, ["s", "o"])
+
+    def test_csv_line_separators(self):
+        data = "s,o\nhttp://a,x\u2028y\x0cz\x1e\x85\nb,c\n"
+        expected = [
+            {
+                "s": {"type": "literal", "value": "http://a"},
+                "o": {"type": "literal", "value": "x\u2028y\x0cz\x1e\x85"},
+            },
+            {
+                "s": {"type": "literal", "value": "b"},
+                "o": {"type": "literal", "value": "c"},
+            },
+        ]
+        for chunk_size in (1, len(data)):
+            parser = CSVResultsParser()
+            self.assertEqual(self._parse(parser, data, chunk_size), expected)
+
+
+class ResultSetTests(unittest.TestCase):
+    data = {
+        "head": {"vars": ["s", "o", "x"]},
+        "results": {
+            "bindings": [
+                {
+                    "s": {"type": "uri", "value": "http://example.org/1"},
+                    "o": {"type": "literal", "value": "foo", "xml:lang": "en"},
+                },
+                {
+                    "s": {"type": "bnode", "value": "b0"},
+                    "o": {
+                        "type": "typed-literal",
+                        "value": "5",
+                        "datatype": "http://www.w3.org/2001/XMLSchema#integer",
+                    },
+                    "x": {"type": "literal", "value": "bar"},
+                },
+            ]
+        },
+    }
+
+    def test_rows(self):
+        result_set = ResultSet.from_json(self.data)
+        self.assertEqual(len(result_set), 2)
+        self.assertEqual(result_set.vars, ["s", "o", "x"])
+        self.assertEqual(
+            dict(result_set[0]),
+            {
+                "s": IRI("http://example.org/1"),
+                "o": Literal("foo", "en"),
+            },
+        )
+        self.assertNotIn("x", result_set[0])
+        row = result_set[-1]
+        self.assertIsInstance(row["s"], BlankNode)
+        self.assertEqual(str(row["s"]), "_:b0")
+        self.assertEqual(
+            row["o"],
+            Literal("5", datatype=IRI("http://www.w3.org/2001/XMLSchema#integer")),
+        )
+        self.assertEqual(row["x"], Literal("bar"))
+        with self.assertRaises(IndexError):
+            result_set[2]
+
+    def test_columns(self):
+        result_set = ResultSet.from_json(self.data)
+        self.assertEqual(result_set["x"], [None, Literal("bar")])
+        self.assertEqual(result_set.column("o")[0], Literal("foo", "en"))
+        self.assertEqual(result_set.values("s"), ["http://example.org/1", "b0"])
+
+    def test_to_dicts(self):
+        result_set = ResultSet.from_json(self.data)
+        self.assertEqual(result_set.to_dicts(), self.data["results"]["bindings"])
+
+    def test_new_vars(self):
+        result_set = ResultSet(["a"])
+        result_set.append({"a": {"type": "literal", "value": "1"}})
+        result_set.append({"b": {"type": "literal", "value": "2"}})
+        self.assertEqual(result_set.vars, ["a", "b"])
+        self.assertEqual(result_set["b"], [None, Literal("2")])
+        self.assertEqual(result_set["a"], [Literal("1"), None])
@@ -0,0 +1,100 @@
+import asyncio
+import unittest
+from email.utils import formatdate
+from time import time
+
+import aiohttp
+from aiosparql.client import SPARQLRequestFailed
+from aiosparql.retry import RetryBudget, RetryPolicy
+
+
+def failure(status, **headers):
+    return SPARQLRequestFailed(None, (), status=status, headers=headers)
+
+
+class Retry(unittest.TestCase):
+    def test_delay(self):
+        policy = RetryPolicy(3, backoff=1.0, max_backoff=3.0, budget=None)
+        for attempt, limit in enumerate((1.0, 2.0, 3.0)):
+            delay = policy.delay(attempt, failure(503))
+            self.assertTrue(0 <= delay <= limit)
+        self.assertIsNone(policy.delay(3, failure(503)))
+        self.assertIsNotNone(policy.delay(0, failure(429)))
+        self.assertIsNotNone(policy.delay(0, aiohttp.ServerDisconnectedError()))
+        self.assertIsNotNone(policy.delay(0, asyncio.TimeoutError()))
+        self.assertIsNone(policy.delay(0, failure(400)))
+        self.assertIsNone(policy.delay(0, ValueError()))
+
+    def test_retry_after(self):
+        policy = RetryPolicy(max_retry_after=30.0, budget=None)
+        self.assertEqual(policy.delay(0, failure(503, **{"Retry-After": "7"})), 7.0)
+        self.assertIsNone(policy.delay(0, failure(503, **{"Retry-After": "120"})))
+        date = formatdate(time() + 10, usegmt=True)
+        delay = policy.retry_after(failure(503, **{"Retry-After": date}))
+        self.assertTrue(8 <= delay <= 10)
+        self.assertIsNone(policy.retry_after(failure(503, **{"Retry-After": "foo"})))
+        self.assertIsNone(policy.retry_after(failure(503)))
+
+    def test_budget(self):
+        budget = RetryBudget(capacity=2.0, ratio=0.5, min_rate=0.0)
+        policy = RetryPolicy(5, backoff=0.0, budget=budget)
+        self.assertEqual(policy.delay(0, failure(503)), 0.0)
+        self.assertEqual(policy.delay(1, failure(503)), 0.0)
+        self.assertIsNone(policy.delay(2, failure(503)))
+        self.assertEqual(budget.exhausted, 1)
+        policy.started()
+        policy.started()
+        self.assertEqual(budget.tokens, 1.0)
+        self.assertIsNotNone(policy.delay(0, failure(503)))
+
+    def test_run(self):
+        calls = []
+
+        async def call(value):
+            calls.append(value)
+            if len(calls) < 3:
+                raise aiohttp.ClientConnectionError()
+            return value
+
+        loop = asyncio.new_event_loop()
+        try:
+            policy = RetryPolicy(2, backoff=0.0)
+            self.assertEqual(loop.run_until_complete(policy.run(call, 1)), 1)
+            self.assertEqual(calls, [1, 1, 1])
+            calls.clear()
+            policy = RetryPolicy(1, backoff=0.0)
+            with self.assertRaises(aiohttp.ClientConnectionError):
+                loop.run_until_complete(policy.run(call, 1))
+            self.assertEqual(len(calls), 2)
+        finally:
+            loop.close()
+
+    def test_deadline(self):
+        calls = []
+
+        async def call():
+            calls.append(None)
+            raise asyncio.TimeoutError()
+
+        async def check():
+            budget = RetryBudget(capacity=5.0, min_rate=0.0)
+            policy = RetryPolicy(5, backoff=1.0, budget=budget)
+            now = asyncio.get_event_loop().time()
+            self.assertIsNone(policy.delay(0, failure(503), now - 1.0))
+            self.assertEqual(budget.tokens, 5.0)
+            self.assertTrue(0 <= policy.delay(0, failure(503), now + 0.1) <= 0.1)
+            retry_after = failure(503, **{"Retry-After": "7"})
+            self.assertIsNone(policy.delay(0, retry_after, now + 5.0))
+            self.assertEqual(policy.delay(0, retry_after, now + 10.0), 7.0)
+            budget.tokens = 5.0
+            with self.assertRaises(asyncio.TimeoutError):
+                await policy.run(call, deadline=now + 0.05)
+            return budget.tokens
+
+        loop = asyncio.new_event_loop()
+        try:
+            tokens = loop.run_until_complete(check())
+            self.assertTrue(len(calls) <= 3)
+            self.assertTrue(tokens >= 5.0 - len(calls) + 1)
+        finally:
+            loop.close()
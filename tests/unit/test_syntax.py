@@ -1,8 +1,11 @@
+import io
+import pickle
 import unittest
 from textwrap import dedent, indent
 
 from aiosparql.syntax import (
     IRI,
+    BlankNode,
     RDF,
     UNDEF,
     Literal,
@@ -69,6 +72,67 @@ class Syntax(unittest.TestCase):
         )
         self.assertEqual(triples.indent("  "), indent(str(triples), "  "))
 
+    def test_triples_chunks(self):
+        triples = Triples(
+            [
+                ("john", RDF.type, "doe"),
+                ("john", "foo", "bar"),
+                Node("jane", [("foo", "bar"), ("child", Node("kid", {"foo": "baz"}))]),
+                ("paul", "foo", "ÿ" * 10),
+            ]
+        )
+        self.assertEqual(list(triples.chunks()), [str(triples)])
+        self.assertEqual(
+            list(triples.chunks(max_triples=2)),
+            [
+                'john rdf:type "doe" ;\n    foo "bar" .',
+                str(triples[2]),
+                'paul foo "%s" .' % ("ÿ" * 10),
+            ],
+        )
+        self.assertEqual(
+            list(triples.chunks(max_triples=4)),
+            [
+                'john rdf:type "doe" ;\n    foo "bar" .',
+                str(triples[2]) + '\n\npaul foo "%s" .' % ("ÿ" * 10),
+            ],
+        )
+        self.assertEqual(len(list(triples.chunks(max_bytes=60))), 3)
+        self.assertEqual(len(list(triples.chunks(max_bytes=1))), 3)
+
+    def test_triples_from_columns(self):
+        triples = Triples.from_columns(
+            ["john", "john", "jane"], [RDF.type, "foo", "foo"], ["doe", None, 1]
+        )
+        self.assertEqual(
+            triples,
+            [("john", RDF.type, "doe"), ("john", "foo", None), ("jane", "foo", 1)],
+        )
+        self.assertEqual(str(triples), 'john rdf:type "doe" .\n\njane foo 1 .')
+        with self.assertRaises(ValueError):
+            Triples.from_columns(["john"], [], [])
+
+    def test_triples_serialize_into(self):
+        node = Node("paul", [("foo", Node("ringo", {"bar": "baz"}))])
+        triples = Triples(
+            [
+                ("john", RDF.type, "doe"),
+                (IRI("john"), "foo", "bar"),
+                node,
+                node,
+                ("john", "foo", None),
+                ("jane", "foo", "bar"),
+                Node("george", {"foo": "bar"}),
+            ]
+        )
+        expected = "".join(triples._output_triples())
+        self.assertEqual(str(triples), expected)
+        for flush_size in (1, 2, 4096):
+            buffer = io.StringIO()
+            triples.serialize_into(buffer, flush_size=flush_size)
+            self.assertEqual(buffer.getvalue(), expected)
+        self.assertEqual(str(Triples()), "")
+
     def test_iri(self):
         self.assertEqual(str(IRI("http://example.org")), "<http://example.org>")
         self.assertEqual(IRI("http://example.org"), IRI("http://example.org"))
@@ -80,6 +144,16 @@ class Syntax(unittest.TestCase):
             IRI("http://example.org/") + "boo", IRI("http://example.org/boo")
         )
 
+    def test_iri_interned(self):
+        iri = IRI("http://example.org/a b")
+        self.assertIs(IRI("http://example.org/a b"), iri)
+        self.assertEqual(str(iri), "<http://example.org/a%20b>")
+        self.assertIs(pickle.loads(pickle.dumps(iri)), iri)
+        self.assertFalse(hasattr(iri, "__dict__"))
+        del iri
+        IRI._purge_interned()
+        self.assertNotIn("http://example.org/a b", IRI.__interned__)
+
     def test_undef(self):
         self.assertEqual(str(UNDEF()), "UNDEF")
         self.assertEqual(UNDEF(), UNDEF())
@@ -94,6 +168,21 @@ class Syntax(unittest.TestCase):
             len(set([Literal("foobar", "en"), Literal("foobar", "es")])), 2
         )
 
+    def test_literal_datatype(self):
+        xsd_integer = IRI("http://www.w3.org/2001/XMLSchema#integer")
+        self.assertEqual(
+            str(Literal("5", datatype=xsd_integer)),
+            '"5"^^<http://www.w3.org/2001/XMLSchema#integer>',
+        )
+        self.assertNotEqual(Literal("5", datatype=xsd_integer), Literal("5"))
+        self.assertEqual(str(Literal("5")), '"5"')
+
+    def test_blank_node(self):
+        self.assertEqual(str(BlankNode("b0")), "_:b0")
+        self.assertEqual(BlankNode("b0"), BlankNode("b0"))
+        self.assertEqual(BlankNode("b0"), "_:b0")
+        self.assertEqual(len(set([BlankNode("b0"), BlankNode("b0")])), 1)
+
     def test_prefixed_name(self):
         self.assertEqual(PrefixedName(IRI("foo"), "bar", "baz"), IRI("foobaz"))
         self.assertEqual(
@@ -111,6 +200,8 @@ class Syntax(unittest.TestCase):
             ),
             1,
         )
+        name = PrefixedName(IRI("foo"), "bar", "baz")
+        self.assertIs(name.iri(), name.iri())
         mapping = {"foobaz": "ok"}
         self.assertEqual(
             mapping.get(PrefixedName(IRI("foo"), "bar", "baz"), "notok"), "ok"
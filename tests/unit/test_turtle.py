@@ -0,0 +1,43 @@
+import unittest
+from textwrap import dedent
+
+from aiosparql.ntriples import XSD
+from aiosparql.syntax import IRI, RDF, Literal, Node, Triples
+from aiosparql.turtle import to_turtle, turtle_header, turtle_triples
+
+
+class Turtle(unittest.TestCase):
+    def test_turtle_header(self):
+        self.assertEqual(
+            turtle_header({"foo": IRI("http://foo#"), "bar": "http://bar#"}),
+            "@prefix bar: <http://bar#> .\n"
+            "@prefix foo: <http://foo#> .\n"
+            "@prefix xsd: <http://www.w3.org/2001/XMLSchema#> .\n",
+        )
+        header = turtle_header()
+        self.assertIn("@prefix rdf: <%s> .\n" % RDF.__iri__.value, header)
+        self.assertIn("@prefix xsd: <http://www.w3.org/2001/XMLSchema#> .\n", header)
+
+    def test_to_turtle(self):
+        triples = Triples(
+            [("<s>", RDF.type, "foo:Bar"), ("<s>", "foo:p", Literal("baz"))]
+        )
+        self.assertEqual(
+            to_turtle(triples, {"foo": IRI("http://foo#")}),
+            dedent(
+                """\
+                @prefix foo: <http://foo#> .
+                @prefix xsd: <http://www.w3.org/2001/XMLSchema#> .
+
+                <s> rdf:type "foo:Bar" ;
+                    foo:p "baz" .
+                """
+            ),
+        )
+        self.assertEqual(
+            to_turtle(Node("<s>", {"foo:p": 1}), {"xsd": XSD}),
+            "@prefix xsd: <%s> .\n\n<s> foo:p 1 .\n" % XSD,
+        )
+
+    def test_turtle_triples(self):
+        self.assertEqual(turtle_triples(Node("<s>", {"foo:p": 1})), "<s> foo:p 1 .\n\n")